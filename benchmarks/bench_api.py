@@ -0,0 +1,236 @@
+"""
+Benchmark reprodutível da API de pedidos.
+
+Executa o `app` FastAPI no próprio processo (httpx + ASGITransport) contra um MongoDB
+local ou contra o backend em memória (`--backend memory`, sem dependências externas),
+gera pedidos sintéticos com quantidade realista de itens, dispara cada endpoint com
+concorrência fixa e reporta vazão e latências p50/p95/p99 em JSON.
+
+Uso:
+    python -m benchmarks.bench_api --output bench_output.json
+    python -m benchmarks.bench_api --backend memory
+    python -m benchmarks.bench_api --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_api --baseline benchmarks/baseline.json --threshold 0.15
+
+Com `--baseline`, o processo termina com código 1 se algum cenário regredir além
+do limite (p95 maior ou vazão menor que o baseline, em proporção).
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from src.config import db as db_config
+from src.config.storage import STORAGE_BACKENDS, configure_storage
+from src.main import app
+from src.security import create_access_token
+
+# Cenários na ordem de execução
+SCENARIOS = ("create_order", "get_order", "list_orders", "list_orders_cursor", "update_order")
+
+
+# --- 1. Dados Sintéticos ---
+def make_order(rng: random.Random, max_items: int) -> Dict[str, Any]:
+    """Gera um pedido com número de itens enviesado para poucos itens (como em produção)."""
+    item_count = min(max_items, max(1, int(rng.expovariate(1 / 4)) + 1))
+    return {
+        "customer_id": rng.randint(1, 1_000),
+        "items": [
+            {
+                "product_id": rng.randint(1, 5_000),
+                "quantity": rng.randint(1, 5),
+                "price": round(rng.uniform(1.0, 500.0), 2),
+            }
+            for _ in range(item_count)
+        ],
+        "shipping_address": f"Rua {rng.randint(1, 9_999)}, Centro",
+    }
+
+
+# --- 2. Execução e Estatísticas ---
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por nearest-rank sobre uma lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(
+    name: str,
+    operation: Callable[[int], Awaitable[httpx.Response]],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Executa `requests` chamadas com `concurrency` workers e resume as latências."""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await operation(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    configure_storage(args.backend)
+    if args.backend == "mongo":
+        db_config.MONGO_DETAILS = args.mongo_url
+        db_config.DB_NAME = args.db_name
+
+        await db_config.connect_to_mongo()
+        database = db_config.get_database()
+        if database is None:
+            raise SystemExit(f"MongoDB indisponível em {args.mongo_url}")
+        await database[db_config.COLLECTION_NAME].delete_many({})
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    order_ids: List[str] = []
+    page_cursor: Dict[str, Optional[str]] = {"next": None}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+
+        async def create_order(_: int) -> httpx.Response:
+            response = await client.post("/orders/", json=make_order(rng, args.max_items))
+            if response.status_code == 201:
+                order_ids.append(response.json()["id"])
+            return response
+
+        async def get_order(i: int) -> httpx.Response:
+            return await client.get(f"/orders/{order_ids[i % len(order_ids)]}")
+
+        async def list_orders(_: int) -> httpx.Response:
+            return await client.get("/orders/", params={"limit": args.page_size})
+
+        async def list_orders_cursor(_: int) -> httpx.Response:
+            params: Dict[str, Any] = {"limit": args.page_size}
+            if page_cursor["next"]:
+                params["cursor"] = page_cursor["next"]
+            response = await client.get("/orders/", params=params)
+            page_cursor["next"] = response.headers.get("X-Next-Cursor")
+            return response
+
+        async def update_order(i: int) -> httpx.Response:
+            order = make_order(rng, args.max_items)
+            return await client.patch(f"/orders/{order_ids[i % len(order_ids)]}", json={"items": order["items"]})
+
+        # Base inicial para leituras e atualizações (independe do cenário create_order)
+        seed_response = await client.post(
+            "/orders/bulk", json=[make_order(rng, args.max_items) for _ in range(args.seed_orders)]
+        )
+        seed_response.raise_for_status()
+        order_ids.extend(item["id"] for item in seed_response.json()["results"] if item["status"] == "created")
+
+        operations = {
+            "create_order": create_order,
+            "get_order": get_order,
+            "list_orders": list_orders,
+            "list_orders_cursor": list_orders_cursor,
+            "update_order": update_order,
+        }
+
+        results = []
+        for name in SCENARIOS:
+            if args.scenarios and name not in args.scenarios:
+                continue
+            results.append(await run_scenario(name, operations[name], args.requests, args.concurrency))
+
+    await db_config.close_mongo_connection()
+    return {
+        "config": {
+            "backend": args.backend,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "max_items": args.max_items,
+            "page_size": args.page_size,
+            "seed_orders": args.seed_orders,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+# --- 3. Comparação com o Baseline ---
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Retorna as regressões (p95 ou vazão) acima do limite em relação ao baseline."""
+    previous = {result["scenario"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(result["scenario"])
+        if not old:
+            continue
+        if result["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            regressions.append(f"{result['scenario']}: p95 {old['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result["throughput_rps"] < old["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{result['scenario']}: vazão {old['throughput_rps']} -> {result['throughput_rps']} req/s"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(STORAGE_BACKENDS), default="mongo")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="api_crud_bench", help="Banco descartável: a coleção é esvaziada no início.")
+    parser.add_argument("--requests", type=int, default=2_000, help="Requisições por cenário.")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-items", type=int, default=50, help="Máximo de itens por pedido sintético.")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--seed-orders", type=int, default=1_000, help="Pedidos inseridos antes dos cenários.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="*", choices=SCENARIOS, help="Executa apenas os cenários indicados.")
+    parser.add_argument("--output", help="Arquivo para salvar o relatório JSON.")
+    parser.add_argument("--baseline", help="Relatório JSON anterior para comparação.")
+    parser.add_argument("--save-baseline", help="Salva o relatório atual como baseline.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regressão tolerada (0.10 = 10%%).")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmarks(args))
+    output = json.dumps(report, indent=2)
+    print(output)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.threshold)
+        if regressions:
+            print("❌ Regressões acima do limite:\n" + "\n".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print("✅ Nenhuma regressão acima do limite.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark da verificação de JWT: decodificação completa vs. cache de tokens.
+
+Uso:
+    python -m benchmarks.bench_verify_token [--iterations 50000]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from src.security import create_access_token, decode_token, get_token_cache_stats, token_cache, verify_token
+
+
+def bench_uncached(token: str, iterations: int) -> float:
+    """Tempo médio (µs) de um `jwt.decode` completo por verificação."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode_token(token)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def bench_cached(token: str, iterations: int) -> float:
+    """Tempo médio (µs) de `verify_token` com o token já presente no cache."""
+    await token_cache.clear()
+    await verify_token(token) # Aquece o cache
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await verify_token(token)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "101"})
+    uncached_us = bench_uncached(token, args.iterations)
+    cached_us = asyncio.run(bench_cached(token, args.iterations))
+
+    print(json.dumps({
+        "iterations": args.iterations,
+        "uncached_us_per_op": round(uncached_us, 3),
+        "cached_us_per_op": round(cached_us, 3),
+        "speedup": round(uncached_us / cached_us, 1),
+        "cache": get_token_cache_stats().as_dict(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Optional
+
+import orjson
+from pymongo.errors import ExecutionTimeout
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.metrics import Counter, Gauge, registry
+
+# Header com o orçamento de tempo da requisição, definido pelo cliente (em ms)
+REQUEST_TIMEOUT_HEADER = b"x-request-timeout-ms"
+
+# Código do MongoDB para consultas interrompidas por maxTimeMS (MaxTimeMSExpired)
+MAX_TIME_MS_EXPIRED_CODE = 50
+
+# Instante (time.monotonic) em que a requisição atual deixa de ser útil para o cliente
+request_deadline_var: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining_ms() -> Optional[int]:
+    """
+    Tempo restante até o prazo da requisição atual, ou None sem prazo.
+    Usado como `maxTimeMS` das consultas ao MongoDB.
+
+    :raises ExecutionTimeout: Se o prazo já se esgotou: a consulta nem é enviada, e a
+        requisição recebe o mesmo 503 de uma consulta interrompida pelo servidor.
+    """
+    deadline = request_deadline_var.get()
+    if deadline is None:
+        return None
+    timeout_ms = int((deadline - time.monotonic()) * 1000)
+    if timeout_ms <= 0:
+        raise ExecutionTimeout("Prazo da requisição esgotado antes da consulta.", MAX_TIME_MS_EXPIRED_CODE)
+    return timeout_ms
+
+
+class AdmissionLimiter:
+    """
+    Limite de concorrência com fila de espera limitada (semáforo FIFO).
+
+    Até `max_concurrent` requisições executam ao mesmo tempo; até `max_queue` aguardam
+    uma vaga. Com a fila cheia, ou se a espera exceder o tempo concedido, a requisição é
+    recusada imediatamente, em vez de se acumular no pool de conexões do MongoDB.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self.admitted = 0
+        self.shed: Dict[str, int] = {}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """
+        Aguarda uma vaga por até `timeout` segundos.
+
+        :return: None se admitida; senão, o motivo da recusa ("queue_full" ou "timeout").
+        """
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return self._reject("queue_full")
+        if timeout <= 0:
+            return self._reject("timeout")
+
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            return self._reject("timeout")
+        except asyncio.CancelledError:
+            # A vaga pode ter sido repassada no mesmo instante do cancelamento
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            self._discard(waiter)
+            raise
+        self.admitted += 1
+        return None
+
+    def release(self) -> None:
+        """Libera a vaga, repassando-a diretamente ao próximo da fila (sem furar a ordem)."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+    def _reject(self, reason: str) -> str:
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+        admission_shed_total.inc(self.name, reason)
+        return reason
+
+    def _discard(self, waiter: "asyncio.Future[None]") -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+def classify_request(method: str, path: str) -> Optional[str]:
+    """
+    Classe de admissão da rota: "read", "write" ou "export" (streaming longo).
+    None para rotas sem limite (health check, métricas, documentação, feed SSE).
+    """
+    if path.startswith("/orders"):
+        if path == "/orders/changes":
+            return None # Conexões de longa duração: não ocupam vagas de leitura
+        if path == "/orders/export":
+            return "export"
+        if method in ("GET", "HEAD") or path == "/orders/batch-get":
+            return "read"
+        return "write"
+    if path.startswith("/analytics"):
+        return "read" if method in ("GET", "HEAD") else "write"
+    return None
+
+
+# --- Métricas de Admissão ---
+admission_shed_total = registry.register(Counter(
+    "admission_shed_total", "Requisições recusadas pelo controle de admissão.", ("route_class", "reason"),
+))
+admission_in_flight = registry.register(Gauge(
+    "admission_in_flight", "Requisições admitidas em execução por classe de rota.", ("route_class",),
+))
+admission_queue_depth = registry.register(Gauge(
+    "admission_queue_depth", "Requisições aguardando vaga por classe de rota.", ("route_class",),
+))
+
+admission_limiters: Dict[str, AdmissionLimiter] = {}
+
+
+def configure_admission(concurrency: Dict[str, int], max_queue: int) -> Dict[str, AdmissionLimiter]:
+    """Cria um limitador por classe de rota (orçamentos separados para leitura e escrita)."""
+    admission_limiters.clear()
+    for route_class, max_concurrent in concurrency.items():
+        admission_limiters[route_class] = AdmissionLimiter(route_class, max_concurrent, max_queue)
+    return admission_limiters
+
+
+def get_admission_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.stats() for name, limiter in admission_limiters.items()}
+
+
+def _collect_admission_stats() -> None:
+    for name, limiter in admission_limiters.items():
+        admission_in_flight.set(name, value=limiter.in_flight)
+        admission_queue_depth.set(name, value=limiter.queued)
+
+registry.add_collector(_collect_admission_stats)
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI de controle de admissão e descarte de carga (load shedding).
+
+    Cada requisição é classificada por `classify`; a classe define o limitador usado.
+    A espera na fila é limitada por `max_wait_ms` e pelo prazo da requisição (header
+    `X-Request-Timeout-Ms` ou `default_timeout_ms`), que também fica disponível em
+    `request_deadline_var` para as consultas ao MongoDB (`maxTimeMS`).
+    Requisições recusadas recebem 503 com `Retry-After`, sem tocar no banco.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiters: Dict[str, AdmissionLimiter],
+        max_wait_ms: float = 1000.0,
+        retry_after_seconds: int = 1,
+        default_timeout_ms: Optional[int] = None,
+        classify: Callable[[str, str], Optional[str]] = classify_request,
+    ):
+        self.app = app
+        self.limiters = limiters
+        self.max_wait_ms = max_wait_ms
+        self.retry_after_seconds = retry_after_seconds
+        self.default_timeout_ms = default_timeout_ms
+        self.classify = classify
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.classify(scope["method"], scope["path"])
+        limiter = self.limiters.get(route_class) if route_class else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        timeout_ms = self._request_timeout_ms(scope)
+        deadline = now + timeout_ms / 1000 if timeout_ms is not None else None
+        wait = self.max_wait_ms / 1000
+        if deadline is not None:
+            wait = min(wait, deadline - now)
+
+        reason = await limiter.acquire(wait)
+        if reason is not None:
+            await self._reject(send, route_class, reason)
+            return
+
+        token = request_deadline_var.set(deadline)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline_var.reset(token)
+            limiter.release()
+
+    def _request_timeout_ms(self, scope: Scope) -> Optional[int]:
+        for name, value in scope.get("headers", []):
+            if name == REQUEST_TIMEOUT_HEADER:
+                try:
+                    return max(0, int(value))
+                except ValueError:
+                    break
+        return self.default_timeout_ms
+
+    async def _reject(self, send: Send, route_class: str, reason: str) -> None:
+        body = orjson.dumps({
+            "detail": "Servidor sobrecarregado. Tente novamente em instantes.",
+            "route_class": route_class,
+            "reason": reason,
+        })
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(self.retry_after_seconds).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from pymongo.errors import DuplicateKeyError
+
+from src.config.storage import get_archive_storage, get_storage
+from src.storage.base import OrderQuery, OrderStorage
+
+logger = logging.getLogger(__name__)
+
+
+class OrderArchiver:
+    """
+    Arquivamento em segundo plano: move pedidos finalizados (`statuses`) criados há mais
+    de `after_days` dias da coleção quente para a camada fria, em lotes de `batch_size`.
+
+    Cada lote é copiado para o arquivo (`insert_many`) e só então excluído da camada
+    quente, com o mesmo filtro da seleção e a mesma `version` copiada: um pedido alterado
+    entre a cópia e a exclusão permanece na camada quente, e a cópia arquivada é descartada.
+    Uma execução interrompida no meio de um lote é retomada na próxima sem duplicar pedidos:
+    a cópia que já existir no arquivo é substituída pelo documento quente atual.
+
+    As leituras só consultam a camada fria com `reads_archive` ligado: no startup, se o
+    arquivamento está ativo ou o arquivo já tem pedidos, e a partir do primeiro lote movido.
+    """
+
+    def __init__(
+        self,
+        after_days: int = 90,
+        statuses: Sequence[str] = (),
+        batch_size: int = 1000,
+        interval_seconds: float = 3600.0,
+        pause_seconds: float = 0.1,
+    ):
+        self.after_days = after_days
+        self.statuses = tuple(statuses)
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.pause_seconds = pause_seconds # Pausa entre lotes, para não disputar o banco com as requisições
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._lock = asyncio.Lock()
+        self.runs = 0
+        self.archived = 0
+        self.last_run_at: Optional[str] = None
+        self.last_archived = 0
+        self.last_error: Optional[str] = None
+        self.reads_archive = False
+
+    def configure(self, after_days: int, statuses: Sequence[str], batch_size: int, interval_seconds: float) -> None:
+        self.after_days = after_days
+        self.statuses = tuple(statuses)
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+
+    async def configure_reads(self, archive_enabled: bool) -> None:
+        """Liga as leituras da camada fria se o arquivamento está ativo ou o arquivo não está vazio."""
+        archive = get_archive_storage()
+        self.reads_archive = archive_enabled or (archive.is_available() and await archive.has_documents())
+
+    def archive_for_reads(self) -> Optional[OrderStorage]:
+        """Camada fria a consultar nas leituras, ou None se ela não pode ter pedidos."""
+        archive = get_archive_storage()
+        if not self.reads_archive or not archive.is_available():
+            return None
+        return archive
+
+    def horizon(self) -> datetime:
+        """
+        Data (UTC, sem fuso) antes da qual um pedido pode estar arquivado: pedidos
+        criados a partir dela estão sempre na camada quente.
+        """
+        return datetime.utcnow() - timedelta(days=self.after_days)
+
+    def start(self) -> None:
+        """Inicia o arquivamento periódico, se ainda não estiver rodando."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run_once(self) -> int:
+        """
+        Arquiva todos os pedidos elegíveis no momento (uma execução por vez).
+
+        :return: Quantidade de pedidos movidos para o arquivo.
+        """
+        async with self._lock:
+            hot, archive = get_storage(), get_archive_storage()
+            if not hot.is_available() or not archive.is_available():
+                return 0
+
+            cutoff = self.horizon()
+            archived = 0
+            try:
+                for status in self.statuses:
+                    # Coberto pelo índice (status, created_at, _id) da camada quente
+                    query = OrderQuery(status=status, created_to=cutoff)
+                    while True:
+                        batch = await hot.find_page(query, self.batch_size)
+                        if batch:
+                            # Antes da primeira exclusão na camada quente
+                            self.reads_archive = True
+                        moved = await self._move_batch(hot, archive, batch, query) if batch else 0
+                        archived += moved
+                        # Lote incompleto: fim dos elegíveis; nenhum movido: só restam falhas
+                        if len(batch) < self.batch_size or not moved:
+                            break
+                        await asyncio.sleep(self.pause_seconds)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                raise
+            finally:
+                self.runs += 1
+                self.archived += archived
+                self.last_archived = archived
+                self.last_run_at = datetime.utcnow().isoformat()
+
+            if archived:
+                logger.info("Arquivamento concluído: %d pedidos movidos para a camada fria.", archived)
+            return archived
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "after_days": self.after_days,
+            "statuses": list(self.statuses),
+            "reads_archive": self.reads_archive,
+            "runs": self.runs,
+            "archived": self.archived,
+            "last_run_at": self.last_run_at,
+            "last_archived": self.last_archived,
+            "last_error": self.last_error,
+        }
+
+    async def _move_batch(
+        self,
+        hot: OrderStorage,
+        archive: OrderStorage,
+        batch: List[Dict[str, Any]],
+        query: OrderQuery,
+    ) -> int:
+        errors = await archive.insert_many(batch)
+        failed = set()
+        for index, error in errors.items():
+            order_doc = batch[index]
+            if isinstance(error, DuplicateKeyError):
+                # Copiado por uma execução interrompida: a cópia pode ser anterior a um PATCH
+                # feito depois dela, então é substituída pelo documento quente lido agora
+                try:
+                    await archive.replace_one(order_doc)
+                    continue
+                except Exception as e:
+                    error = e
+            failed.add(order_doc["_id"])
+            logger.error("Erro ao arquivar pedido: %s", error, extra={"order_id": str(order_doc["_id"])})
+
+        # Excluídos (DELETE) entre a leitura do lote e a cópia: a exclusão já passou pelo
+        # arquivo antes da cópia existir, então a cópia é descartada aqui. Um DELETE
+        # posterior a esta verificação encontra a cópia e a exclui (ver `delete_order`)
+        present = {order_doc["_id"] for order_doc in await hot.find_many(
+            [order_doc["_id"] for order_doc in batch if order_doc["_id"] not in failed], fields=(),
+        )}
+        gone = [order_doc["_id"] for order_doc in batch if order_doc["_id"] not in failed and order_doc["_id"] not in present]
+        if gone:
+            await archive.delete_many(gone)
+
+        copied = [order_doc for order_doc in batch if order_doc["_id"] in present]
+        object_ids = [order_doc["_id"] for order_doc in copied]
+        # Só exclui da camada quente se o pedido ainda está na versão copiada para o arquivo
+        deleted = await hot.delete_many(object_ids, query, versions=[order_doc.get("version", 1) for order_doc in copied])
+        if deleted < len(object_ids):
+            # Alterados entre a cópia e a exclusão: continuam quentes, a cópia é descartada
+            still_hot = await hot.find_many(object_ids, fields=())
+            await archive.delete_many([order_doc["_id"] for order_doc in still_hot])
+        return deleted
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Falha no arquivamento de pedidos: %s", e)
+            await asyncio.sleep(self.interval_seconds)
+
+
+# Arquivador do processo (configurado no startup, ver src/main.py)
+order_archiver = OrderArchiver()
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# Insere documentos sem ordem garantida e devolve os erros por índice (ver OrderStorage.insert_many)
+InsertMany = Callable[[List[Dict[str, Any]]], Awaitable[Dict[int, Exception]]]
+
+
+class InsertBatcher:
+    """
+    Agrupa inserts concorrentes ("group commit") em um único `insert_many` não ordenado.
+
+    Cada chamada a `submit` entra em uma fila; a fila é descarregada quando atinge
+    `max_batch_size` documentos ou quando `max_wait_ms` se passa desde o primeiro
+    documento pendente. Cada chamador recebe o próprio documento inserido ou o
+    próprio erro, como se tivesse feito um `insert_one`.
+    """
+
+    def __init__(
+        self,
+        insert_many: InsertMany,
+        max_batch_size: int = 100,
+        max_wait_ms: float = 2.0,
+    ):
+        self.insert_many = insert_many
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[Dict[str, Any], "asyncio.Future[Dict[str, Any]]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes: Set["asyncio.Task[None]"] = set()
+        self.batches = 0
+        self.documents = 0
+
+    async def submit(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Enfileira o documento e aguarda a escrita do lote em que ele entrar.
+
+        :return: O próprio documento, já com o '_id' gerado.
+        :raises DuplicateKeyError: Se o documento violar um índice único.
+        """
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+        self._pending.append((document, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    async def close(self) -> None:
+        """Descarrega os documentos pendentes e aguarda as escritas em andamento."""
+        self._flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "documents": self.documents,
+            "avg_batch_size": round(self.documents / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], "asyncio.Future[Dict[str, Any]]"]]) -> None:
+        docs = [document for document, _ in batch]
+        self.batches += 1
+        self.documents += len(docs)
+
+        try:
+            errors = await self.insert_many(docs)
+        except Exception as e:
+            # Falha do lote inteiro (ex.: rede): todos os chamadores recebem o mesmo erro
+            errors = {i: e for i in range(len(batch))}
+
+        for i, (document, future) in enumerate(batch):
+            if future.done(): # Chamador cancelado
+                continue
+            if i in errors:
+                future.set_exception(errors[i])
+            else:
+                future.set_result(document)
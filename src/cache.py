@@ -0,0 +1,168 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+
+# --- 1. Métricas do Cache ---
+@dataclass
+class CacheStats:
+    """
+    Contadores de uso do cache. Os contadores de eventos (hits, misses, evictions,
+    expirations, invalidations) só crescem, mesmo após `clear`; `entries` e `size_bytes`
+    refletem o conteúdo atual.
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+# --- 2. Interface de Backend (Plugável) ---
+class CacheBackend(ABC):
+    """
+    Contrato de um backend de cache de bytes.
+
+    A interface é assíncrona para que um backend compartilhado (ex.: Redis) possa
+    ser plugado em implantações com vários workers sem alterar a camada CRUD.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Retorna o valor armazenado ou None (ausente ou expirado)."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        """Armazena o valor; `ttl_seconds` sobrescreve o TTL padrão do backend."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove a chave, se existir (invalidação)."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove todas as chaves."""
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """Retorna um retrato dos contadores do backend."""
+
+
+# --- 3. Backend em Memória (LRU + TTL + Limite de Bytes) ---
+class MemoryCacheBackend(CacheBackend):
+    """
+    Cache em processo com despejo LRU, expiração por TTL e limite de tamanho em bytes.
+
+    Não é compartilhado entre workers: cada processo mantém a sua própria cópia.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # chave -> (valor, instante de expiração em time.monotonic())
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self._stats.expirations += 1
+            self._stats.misses += 1
+            return None
+
+        self._data.move_to_end(key) # Marca como usado recentemente
+        self._stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            return # Valor maior que o cache inteiro: não armazena
+
+        if key in self._data:
+            self._remove(key)
+
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._stats.size_bytes += size
+
+        # Despeja os menos usados até respeitar os limites de entradas e bytes
+        while len(self._data) > self.max_entries or self._stats.size_bytes > self.max_bytes:
+            oldest_key = next(iter(self._data))
+            self._remove(oldest_key)
+            self._stats.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        if key in self._data:
+            self._remove(key)
+            self._stats.invalidations += 1
+
+    async def clear(self) -> None:
+        # Remove apenas as entradas: os contadores são monotônicos (exportados em /metrics)
+        self._data.clear()
+        self._stats.size_bytes = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(**{**self._stats.as_dict(), "entries": len(self._data)})
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._data.pop(key)
+        self._stats.size_bytes -= len(value)
+
+
+# --- 4. Proteção contra Preenchimento com Dado Antigo ---
+class CacheFillGuard:
+    """
+    Impede que uma leitura iniciada antes de uma invalidação grave no cache o valor
+    antigo depois dela (ex.: GET lento concorrente com um PATCH).
+
+    O leitor chama `begin(key)` antes de consultar o backend de dados e, antes do `set`,
+    `is_current(key, token)`; `invalidate(key)` e `invalidate_all()` tornam obsoletos os
+    tokens emitidos até ali. `end(key)` libera o estado da chave (só as chaves com
+    leituras em andamento ocupam memória).
+    """
+
+    def __init__(self):
+        self._epoch = 0 # Incrementado a cada invalidação total (clear)
+        # chave -> [leituras em andamento, geração da chave]
+        self._loads: Dict[str, List[int]] = {}
+
+    def begin(self, key: str) -> Tuple[int, int]:
+        entry = self._loads.setdefault(key, [0, 0])
+        entry[0] += 1
+        return self._epoch, entry[1]
+
+    def is_current(self, key: str, token: Tuple[int, int]) -> bool:
+        """Indica se a chave não foi invalidada desde o `begin` que emitiu o token."""
+        entry = self._loads.get(key)
+        return entry is not None and token == (self._epoch, entry[1])
+
+    def end(self, key: str) -> None:
+        entry = self._loads.get(key)
+        if entry is None:
+            return
+        entry[0] -= 1
+        if entry[0] <= 0:
+            del self._loads[key]
+
+    def invalidate(self, key: str) -> None:
+        entry = self._loads.get(key)
+        if entry is not None:
+            entry[1] += 1
+
+    def invalidate_all(self) -> None:
+        self._epoch += 1
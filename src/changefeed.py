@@ -0,0 +1,306 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from pymongo.errors import OperationFailure
+
+from src.config import db as db_config
+
+logger = logging.getLogger(__name__)
+
+# Códigos do MongoDB para change streams indisponíveis (ex.: servidor standalone, sem replica set)
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573, 40324}
+
+# Tempo máximo de espera do servidor por novos eventos em cada getMore
+CHANGE_STREAM_MAX_AWAIT_MS = 1000
+
+# Streams dedicados simultâneos de assinantes que retomam por token (cada getMore ocupa
+# uma conexão do pool por até CHANGE_STREAM_MAX_AWAIT_MS enquanto o assinante não alcança o feed)
+MAX_RESUMED_STREAMS = 32
+
+# Espera entre tentativas de reabrir o change stream após uma falha (cresce até o máximo)
+RETRY_DELAY_SECONDS = 0.5
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+ChangeListener = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Marca de fim de uma assinatura (assinante lento demais ou feed encerrado)
+_CLOSED = object()
+
+
+def change_matches(change: Dict[str, Any], customer_id: Optional[int] = None, status: Optional[str] = None) -> bool:
+    """
+    Indica se um evento de change stream pertence aos filtros. Exclusões não trazem o
+    documento: só são entregues a quem não filtra por cliente nem por status.
+    """
+    if customer_id is None and status is None:
+        return True
+    document = change.get("fullDocument")
+    if not document:
+        return False
+    if customer_id is not None and document.get("customer_id") != customer_id:
+        return False
+    if status is not None and document.get("status") != status:
+        return False
+    return True
+
+
+def build_change_pipeline(customer_id: Optional[int] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Filtro equivalente a `change_matches`, aplicado no servidor (streams retomados)."""
+    match: Dict[str, Any] = {}
+    if customer_id is not None:
+        match["fullDocument.customer_id"] = customer_id
+    if status is not None:
+        match["fullDocument.status"] = status
+    return [{"$match": match}] if match else []
+
+
+class FeedSubscription:
+    """Fila de eventos de um assinante do feed, com os filtros aplicados na entrega."""
+
+    def __init__(self, customer_id: Optional[int], status: Optional[str], max_pending: int):
+        self.customer_id = customer_id
+        self.status = status
+        self.closed = False
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max_pending)
+
+    def offer(self, change: Dict[str, Any]) -> bool:
+        """Entrega o evento sem bloquear; retorna False se a fila estiver cheia."""
+        if self.closed:
+            return True
+        if not change_matches(change, self.customer_id, self.status):
+            return True
+        try:
+            self._queue.put_nowait(change)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self) -> None:
+        """Encerra a assinatura: eventos pendentes são descartados e `next` retorna o fim."""
+        self.closed = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_CLOSED)
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Aguarda o próximo evento por até `timeout` segundos.
+
+        :return: O evento, ou None se nada chegou no período.
+        :raises StopAsyncIteration: Se a assinatura foi encerrada.
+        """
+        try:
+            change = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if change is _CLOSED:
+            raise StopAsyncIteration
+        return change
+
+
+def _token_position(token: Optional[Dict[str, Any]]) -> str:
+    # O '_data' dos resume tokens (hex) ordena como os eventos da mesma coleção
+    return (token or {}).get("_data", "")
+
+
+class ResumedSubscription:
+    """
+    Assinante que reconectou com um resume token: recebe os eventos perdidos de um change
+    stream próprio apenas até alcançar o feed compartilhado e passa, então, para uma
+    assinatura comum (criada antes do stream, para não perder eventos na troca). Eventos
+    recebidos pelos dois caminhos são entregues uma vez.
+    """
+
+    def __init__(self, feed: "OrderChangeFeed", resume_token: str, customer_id: Optional[int], status: Optional[str]):
+        self.feed = feed
+        self.subscription = feed.subscribe(customer_id, status)
+        # Último evento do feed antes da assinatura: os seguintes já chegam à fila dela
+        self.handoff = feed.resume_token
+        self._stream = feed.watch({"_data": resume_token}, customer_id, status)
+        self.last_sent = resume_token
+        self.catching_up = True
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Próximo evento, ou None se nada chegou (até `timeout` segundos após a troca; antes
+        dela, até CHANGE_STREAM_MAX_AWAIT_MS).
+
+        :raises StopAsyncIteration: Se a assinatura foi encerrada.
+        :raises OperationFailure: Se o token for inválido ou já estiver fora do oplog.
+        """
+        if self.catching_up:
+            change = await self._stream.try_next()
+            if change is not None:
+                self.last_sent = _token_position(change["_id"])
+            if self.handoff is None:
+                # Feed sem eventos desde a assinatura: a troca espera o primeiro deles
+                self.handoff = self.feed.resume_token
+            position = _token_position(self._stream.resume_token)
+            if self.handoff is not None and position >= _token_position(self.handoff):
+                await self._close_stream()
+            if change is not None:
+                return change
+            if self.catching_up:
+                return None
+
+        while True:
+            change = await self.subscription.next(timeout)
+            if change is None or _token_position(change["_id"]) > self.last_sent:
+                return change
+
+    async def close(self) -> None:
+        await self._close_stream()
+        self.feed.unsubscribe(self.subscription)
+        self.feed.resumed -= 1
+
+    async def _close_stream(self) -> None:
+        if self.catching_up:
+            self.catching_up = False
+            self.feed.handed_off += 1
+            await self._stream.close()
+
+
+class OrderChangeFeed:
+    """
+    Consumidor único (por processo) do change stream da coleção de pedidos.
+
+    Cada evento é repassado aos listeners registrados (ex.: invalidação do cache de
+    leitura) e às assinaturas do feed ao vivo (SSE). O resume token do último evento é
+    guardado, e o stream é reaberto a partir dele após falhas de rede ou failover.
+    Assinantes que não acompanham o ritmo são desconectados e podem retomar pelo token
+    (ver `ResumedSubscription`; no máximo `max_resumed` retomadas ao mesmo tempo).
+    """
+
+    def __init__(
+        self,
+        collection_name: str = db_config.COLLECTION_NAME,
+        max_pending: int = 1000,
+        max_resumed: int = MAX_RESUMED_STREAMS,
+    ):
+        self.collection_name = collection_name
+        self.max_pending = max_pending
+        self.max_resumed = max_resumed
+        self.resumed = 0
+        self.handed_off = 0
+        self.resume_token: Optional[Dict[str, Any]] = None
+        self.unsupported = False
+        self._listeners: List[ChangeListener] = []
+        self._subscriptions: Set[FeedSubscription] = set()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.events = 0
+        self.dropped_subscriptions = 0
+        self.restarts = 0
+
+    def is_available(self) -> bool:
+        return db_config.get_database() is not None and not self.unsupported
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Inicia o consumidor em segundo plano, se ainda não estiver rodando."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        for subscription in list(self._subscriptions):
+            subscription.close()
+        self._subscriptions.clear()
+
+    def subscribe(self, customer_id: Optional[int] = None, status: Optional[str] = None) -> FeedSubscription:
+        subscription = FeedSubscription(customer_id, status, self.max_pending)
+        self._subscriptions.add(subscription)
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription: FeedSubscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def resume(
+        self,
+        resume_token: str,
+        customer_id: Optional[int] = None,
+        status: Optional[str] = None,
+    ) -> Optional[ResumedSubscription]:
+        """Assinatura retomada a partir de um token, ou None se o limite de retomadas simultâneas foi atingido."""
+        if self.resumed >= self.max_resumed:
+            return None
+        self.resumed += 1
+        return ResumedSubscription(self, resume_token, customer_id, status)
+
+    def watch(
+        self,
+        resume_after: Optional[Dict[str, Any]] = None,
+        customer_id: Optional[int] = None,
+        status: Optional[str] = None,
+    ):
+        """Abre um change stream dedicado (usado por `ResumedSubscription` até alcançar o feed)."""
+        return db_config.get_database()[self.collection_name].watch(
+            build_change_pipeline(customer_id, status),
+            full_document="updateLookup",
+            resume_after=resume_after,
+            max_await_time_ms=CHANGE_STREAM_MAX_AWAIT_MS,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "subscriptions": len(self._subscriptions),
+            "resumed": self.resumed,
+            "handed_off": self.handed_off,
+            "events": self.events,
+            "dropped_subscriptions": self.dropped_subscriptions,
+            "restarts": self.restarts,
+        }
+
+    async def _run(self) -> None:
+        delay = RETRY_DELAY_SECONDS
+        while True:
+            try:
+                async with self.watch(resume_after=self.resume_token) as stream:
+                    delay = RETRY_DELAY_SECONDS
+                    async for change in stream:
+                        self.resume_token = stream.resume_token
+                        await self._dispatch(change)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_UNSUPPORTED_CODES:
+                    logger.error("Change streams indisponíveis (é necessário replica set): %s", e)
+                    self.unsupported = True
+                    for subscription in list(self._subscriptions):
+                        subscription.close()
+                    return
+                logger.error("Falha no change stream de pedidos: %s", e)
+            except Exception as e:
+                logger.error("Falha no change stream de pedidos: %s", e)
+
+            self.restarts += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+
+    async def _dispatch(self, change: Dict[str, Any]) -> None:
+        self.events += 1
+        for listener in self._listeners:
+            try:
+                await listener(change)
+            except Exception as e:
+                logger.error("Erro em um listener do change stream: %s", e)
+
+        for subscription in list(self._subscriptions):
+            if not subscription.offer(change):
+                # Assinante lento: desconecta em vez de acumular memória ou atrasar os demais
+                self.dropped_subscriptions += 1
+                subscription.close()
+                self._subscriptions.discard(subscription)
+
+
+# Feed compartilhado pelos assinantes SSE e pela invalidação de cache do processo
+order_change_feed = OrderChangeFeed()
+
+# Alterações e exclusões de pedidos arquivados (só a invalidação de cache o consome)
+archive_change_feed = OrderChangeFeed(db_config.ARCHIVE_COLLECTION_NAME)
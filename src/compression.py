@@ -0,0 +1,153 @@
+import zlib
+from typing import Any, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError: # Dependência opcional: sem ela, apenas gzip é oferecido
+    brotli = None
+
+# Respostas que não devem ser comprimidas: streams ao vivo (SSE) precisam de cada evento imediatamente
+EXCLUDED_MEDIA_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """
+    Escolhe a codificação da resposta a partir do header `Accept-Encoding`:
+    "br" (se disponível) antes de "gzip", respeitando `q=0`. None se nenhuma servir.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = ("br", "gzip") if brotli_available else ("gzip",)
+    for coding in candidates:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+class _Compressor:
+    """Compressor incremental (gzip via zlib, ou brotli) com a mesma interface."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._compressor: Any = brotli.Compressor(quality=brotli_quality)
+            self._compress = self._compressor.process
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31) # wbits=31: formato gzip
+            self._compress = self._compressor.compress
+            self._finish = self._compressor.flush
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        compressed = self._compress(data)
+        return compressed + self._finish() if final else compressed
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compressão (brotli ou gzip, conforme o `Accept-Encoding`).
+
+    Respostas completas menores que `minimum_size` bytes seguem sem compressão (o custo
+    não compensa); respostas em streaming (ex.: exportação) são comprimidas em blocos.
+    Não comprime respostas já codificadas, SSE nem respostas sem corpo (ex.: 304).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size, self.gzip_level, self.brotli_quality)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Estado de uma resposta: decide no primeiro bloco do corpo se ela será comprimida."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int, gzip_level: int, brotli_quality: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Adiado até o primeiro bloco do corpo, que define se haverá compressão
+            self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            compress, headers = self._should_compress(start, body, more_body)
+            if not compress:
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self._compressor = _Compressor(self.encoding, self.gzip_level, self.brotli_quality)
+            compressed = self._compressor.compress(body, final=not more_body)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(compressed))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        if self._passthrough or self._compressor is None:
+            await self._send(message)
+            return
+        compressed = self._compressor.compress(body, final=not more_body)
+        if compressed or not more_body:
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _should_compress(self, start: Message, body: bytes, more_body: bool) -> Tuple[bool, MutableHeaders]:
+        start["headers"] = list(start.get("headers", []))
+        headers = MutableHeaders(raw=start["headers"])
+        if start["status"] < 200 or start["status"] in (204, 304):
+            return False, headers
+        if "content-encoding" in headers:
+            return False, headers
+        if headers.get("content-type", "").split(";")[0].strip() in EXCLUDED_MEDIA_TYPES:
+            return False, headers
+        if not more_body and len(body) < self.minimum_size:
+            return False, headers
+        return True, headers
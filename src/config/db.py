@@ -1,56 +1,46 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
 import motor.motor_asyncio
 from pymongo.errors import ConnectionFailure, OperationFailure
-from pymongo import ASCENDING, DESCENDING # Para definir a ordem do índice
+from src.config.indexes import cancel_index_build, start_index_build
+from src.config.settings import get_settings
+from src.metrics import mongo_command_listener, mongo_pool_listener
+
+settings = get_settings()
+
+logger = logging.getLogger(__name__)
 
-# Variáveis Globais de Conexão
-MONGO_DETAILS = "mongodb://localhost:27017"
-DB_NAME = "api_crud_db"
+# Variáveis Globais de Conexão (definidas por variáveis de ambiente ou .env, ver settings.py)
+MONGO_DETAILS = settings.mongo_details
+DB_NAME = settings.db_name
 COLLECTION_NAME = "orders" # Usaremos aqui também
+ARCHIVE_COLLECTION_NAME = "orders_archive" # Pedidos finalizados antigos (ver src/archival.py)
 
 client: motor.motor_asyncio.AsyncIOMotorClient = None
 database: motor.motor_asyncio.AsyncIOMotorDatabase = None
 
 
-# --- NOVA FUNÇÃO: Configuração de Índices ---
-async def configure_indexes():
-    """Garante que os índices necessários para otimizar as consultas existam."""
-    global database
-    
-    # CORREÇÃO: Compara explicitamente com None
-    if database is None: 
-        print("⚠️ Não foi possível configurar índices: DB não está conectado.")
-        return
+def build_client_options() -> Dict[str, Any]:
+    """Monta as opções do AsyncIOMotorClient (pool, compressão, leitura) a partir das configurações."""
+    options: Dict[str, Any] = {
+        "serverSelectionTimeoutMS": settings.server_selection_timeout_ms,
+        "maxPoolSize": settings.max_pool_size,
+        "minPoolSize": settings.min_pool_size,
+        "readPreference": settings.read_preference,
+        # Instrumentação: duração dos comandos e estado do pool de conexões (ver /metrics)
+        "event_listeners": [mongo_command_listener, mongo_pool_listener],
+    }
+    if settings.max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.max_idle_time_ms
+    if settings.wait_queue_timeout_ms is not None:
+        options["waitQueueTimeoutMS"] = settings.wait_queue_timeout_ms
+    if settings.compressors:
+        options["compressors"] = settings.compressors
+    return options
 
-    try:
-        orders_collection = database[COLLECTION_NAME]
-        
-        # 1. Índice para Ordenação/Listagem (created_at)
-        await orders_collection.create_index(
-            [("created_at", DESCENDING)],
-            name="created_at_desc_index"
-        )
-        print("✅ Índice 'created_at' configurado.")
-        
-        # 2. Índice para Chave de Negócio ou Consultas por Cliente (customer_id)
-        # Índice composto ou simples, dependendo das necessidades.
-        # Vamos criar um índice simples no customer_id para eficiência na filtragem.
-        await orders_collection.create_index(
-            "customer_id",
-            name="customer_id_index",
-            # unique=True, # Não é único, um cliente pode ter muitos pedidos
-        )
-        print("✅ Índice 'customer_id' configurado.")
-        
-        # 3. (Opcional) Índice para o status do pedido, se a filtragem for comum
-        await orders_collection.create_index(
-            "status",
-            name="status_index"
-        )
-        print("✅ Índice 'status' configurado.")
-        
-    except Exception as e:
-        print(f"❌ Erro ao configurar índices do MongoDB: {e}")
-        
 # --- Função de Conexão Atualizada para incluir a Configuração ---
 async def connect_to_mongo():
     """Inicializa a conexão assíncrona com o MongoDB E configura os índices."""
@@ -59,37 +49,72 @@ async def connect_to_mongo():
     try:
         client = motor.motor_asyncio.AsyncIOMotorClient(
             MONGO_DETAILS,
-            serverSelectionTimeoutMS=5000
+            **build_client_options(),
         )
         
         await client.admin.command('ping') 
         
         database = client[DB_NAME]
-        print("✅ Conexão com MongoDB estabelecida com sucesso!")
+        logger.info("Conexão com MongoDB estabelecida com sucesso.")
         
-        # --- NOVO: Chamada para configurar os índices APÓS a conexão ---
-        await configure_indexes()
+        # Índices ausentes ou desatualizados são construídos em segundo plano,
+        # sem atrasar o início do atendimento (progresso em /admin/indexes)
+        start_index_build(database)
         
     except ConnectionFailure:
-        print("❌ ERRO: Falha ao conectar ao MongoDB. Verifique se o servidor está ativo.")
+        logger.error("Falha ao conectar ao MongoDB. Verifique se o servidor está ativo.")
         client = None
         database = None
     except OperationFailure as e:
-        print(f"❌ ERRO: Falha de operação no MongoDB. Detalhes: {e}")
+        logger.error("Falha de operação no MongoDB. Detalhes: %s", e)
         client = None
         database = None
     except Exception as e:
-        print(f"❌ ERRO INESPERADO ao conectar ao MongoDB: {e}")
+        logger.exception("Erro inesperado ao conectar ao MongoDB: %s", e)
         client = None
         database = None
 
 async def close_mongo_connection():
     """Fecha a conexão com o MongoDB de forma limpa."""
     global client
+    cancel_index_build()
     if client:
         client.close()
-        print("🔌 Conexão com MongoDB fechada.")
+        logger.info("Conexão com MongoDB fechada.")
         
+async def check_readiness() -> Dict[str, Any]:
+    """
+    Checagem de prontidão: executa um 'ping' com tempo limite e reporta a latência
+    e a saturação do pool de conexões (conexões em uso / maxPoolSize).
+    """
+    pool = mongo_pool_listener.snapshot()
+    report: Dict[str, Any] = {
+        "ready": False,
+        "ping_ms": None,
+        "pool": {
+            **pool,
+            "max_pool_size": settings.max_pool_size,
+            "saturation": round(pool["checked_out"] / settings.max_pool_size, 3) if settings.max_pool_size else None,
+        },
+    }
+    if client is None:
+        report["error"] = "Cliente do MongoDB não inicializado."
+        return report
+
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout=settings.readiness_timeout_ms / 1000)
+    except asyncio.TimeoutError:
+        report["error"] = f"Ping excedeu {settings.readiness_timeout_ms} ms."
+        return report
+    except Exception as e:
+        report["error"] = str(e)
+        return report
+
+    report["ready"] = True
+    report["ping_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return report
+
 def get_database() -> motor.motor_asyncio.AsyncIOMotorDatabase:
     """Retorna a instância do banco de dados (usada na camada CRUD)."""
     return database
\ No newline at end of file
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import motor.motor_asyncio
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """
+    Declaração de um índice desejado.
+
+    Incrementar `version` força a reconstrução do índice no próximo sincronismo, mesmo
+    que as chaves não mudem (ex.: novas opções): a nova versão é construída sob outro
+    nome (`index_name`) e a anterior só é removida depois, sem janela sem índice.
+    """
+    collection: str
+    name: str
+    keys: Tuple[Tuple[str, Any], ...]
+    version: int = 1
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def index_name(self) -> str:
+        """Nome do índice no MongoDB: `name` na versão 1, `name_v<version>` nas seguintes."""
+        return self.name if self.version == 1 else f"{self.name}_v{self.version}"
+
+    def is_previous_version(self, index_name: str) -> bool:
+        """Indica se `index_name` é outra versão (anterior) deste índice."""
+        return index_name != self.index_name and (
+            index_name == self.name or re.fullmatch(rf"{re.escape(self.name)}_v\d+", index_name) is not None
+        )
+
+
+# --- 1. Registro Declarativo de Índices ---
+INDEX_REGISTRY: List[IndexSpec] = [
+    # Paginação por Cursor (Keyset): a ordenação (created_at, _id) é estável e única,
+    # permitindo que cada página seja uma varredura limitada do índice
+    IndexSpec("orders", "created_at_id_desc_index", (("created_at", DESCENDING), ("_id", DESCENDING))),
+    # Consultas por Cliente (não é único: um cliente pode ter muitos pedidos)
+    IndexSpec(
+        "orders", "customer_created_at_id_index",
+        (("customer_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+    ),
+    # Filtragem por status do pedido
+    IndexSpec(
+        "orders", "status_created_at_id_index",
+        (("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+    ),
+    # Pedidos por produto (multikey: uma entrada por item), em ordem de listagem
+    IndexSpec(
+        "orders", "items_product_created_at_id_index",
+        (("items.product_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+    ),
+    # Camada fria (pedidos arquivados): só os índices de listagem usados pelas leituras de fallback
+    IndexSpec("orders_archive", "archive_created_at_id_desc_index", (("created_at", DESCENDING), ("_id", DESCENDING))),
+    IndexSpec(
+        "orders_archive", "archive_customer_created_at_id_index",
+        (("customer_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+    ),
+    IndexSpec(
+        "orders_archive", "archive_status_created_at_id_index",
+        (("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+    ),
+    IndexSpec(
+        "orders_archive", "archive_items_product_created_at_id_index",
+        (("items.product_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)),
+    ),
+    # Ranking de clientes por receita (rollups de vendas, ver src/storage/rollups.py)
+    IndexSpec("orders_rollup_customer", "revenue_desc_index", (("revenue", DESCENDING),)),
+]
+
+# Índices antigos cobertos, como prefixo, pelos compostos do registro: removidos depois
+# que o sincronismo conclui sem falhas (cada índice extra custa em toda escrita e em memória)
+RETIRED_INDEXES: List[Tuple[str, str]] = [
+    ("orders", "created_at_desc_index"),  # -> created_at_id_desc_index
+    ("orders", "customer_id_index"),      # -> customer_created_at_id_index
+    ("orders", "status_index"),           # -> status_created_at_id_index
+]
+
+# Erros do createIndexes quando já existe um índice com as mesmas chaves sob outro nome
+INDEX_CONFLICT_ERROR_CODES = (85, 86) # IndexOptionsConflict, IndexKeySpecsConflict
+
+
+# --- 2. Estado do Build em Segundo Plano ---
+# nome do índice -> {"collection", "index_name", "state" (pending/building/ready/failed), "error", "updated_at"}
+index_build_state: Dict[str, Dict[str, Any]] = {}
+index_build_task: Optional["asyncio.Task[None]"] = None
+
+
+def _set_state(spec: IndexSpec, state: str, error: Optional[str] = None) -> None:
+    index_build_state[spec.name] = {
+        "collection": spec.collection,
+        "version": spec.version,
+        "index_name": spec.index_name,
+        "state": state,
+        "error": error,
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _normalize_keys(keys: Any) -> Tuple[Tuple[str, Any], ...]:
+    return tuple((name, int(direction) if isinstance(direction, (int, float)) else direction) for name, direction in keys.items())
+
+
+async def plan_index_changes(database: motor.motor_asyncio.AsyncIOMotorDatabase) -> Dict[str, List[Any]]:
+    """
+    Compara o registro com `list_indexes()`.
+
+    :return: {"create": [...], "conflict": [...], "ok": [...], "superseded": [(spec, nome)],
+              "retired": [(coleção, nome)]}. `conflict` são índices cujas chaves mudaram
+              sem incremento de `version` (exigem uma nova versão para serem trocados).
+    """
+    existing: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for collection_name in {spec.collection for spec in INDEX_REGISTRY} | {name for name, _ in RETIRED_INDEXES}:
+        existing[collection_name] = {index["name"]: index async for index in database[collection_name].list_indexes()}
+
+    plan: Dict[str, List[Any]] = {"create": [], "conflict": [], "ok": [], "superseded": [], "retired": []}
+    for spec in INDEX_REGISTRY:
+        indexes = existing[spec.collection]
+        current = indexes.get(spec.index_name)
+        if current is None:
+            plan["create"].append(spec)
+        elif _normalize_keys(current["key"]) != spec.keys:
+            plan["conflict"].append(spec)
+        else:
+            plan["ok"].append(spec)
+        plan["superseded"].extend((spec, name) for name in indexes if spec.is_previous_version(name))
+    plan["retired"] = [(collection, name) for collection, name in RETIRED_INDEXES if name in existing[collection]]
+    return plan
+
+
+async def _build_index(collection: Any, spec: IndexSpec, superseded: List[str]) -> None:
+    """
+    Constrói o índice sob o nome da versão atual e só então remove as versões anteriores:
+    as consultas continuam usando o índice antigo durante o build.
+    """
+    try:
+        await collection.create_index(list(spec.keys), name=spec.index_name, **spec.options)
+    except OperationFailure as e:
+        if e.code not in INDEX_CONFLICT_ERROR_CODES or not superseded:
+            raise
+        # Mesmas chaves sob outro nome não são aceitas pelo servidor: a troca exige remover antes
+        logger.warning(
+            "Índice '%s' tem as mesmas chaves da versão anterior: reconstruído sem build paralelo.", spec.index_name,
+        )
+        for name in superseded:
+            await collection.drop_index(name)
+        superseded = []
+        await collection.create_index(list(spec.keys), name=spec.index_name, **spec.options)
+    for name in superseded:
+        await collection.drop_index(name)
+
+
+async def sync_indexes(database: motor.motor_asyncio.AsyncIOMotorDatabase) -> None:
+    """
+    Constrói somente os índices ausentes ou com versão nova, um por vez, registrando o
+    progresso em `index_build_state`. Versões anteriores são removidas após o build da
+    nova, e os índices aposentados (`RETIRED_INDEXES`), ao final, se nada falhou.
+    """
+    plan = await plan_index_changes(database)
+    for spec in plan["ok"]:
+        _set_state(spec, "ready")
+    for spec in plan["conflict"]:
+        _set_state(spec, "failed", "As chaves do índice mudaram: incremente a versão no registro para reconstruí-lo.")
+        logger.error("Índice '%s' com chaves diferentes do registro e sem nova versão.", spec.index_name)
+    for spec in plan["create"]:
+        _set_state(spec, "pending")
+
+    failed = bool(plan["conflict"])
+    for spec in plan["create"]:
+        _set_state(spec, "building")
+        superseded = [name for previous_spec, name in plan["superseded"] if previous_spec is spec]
+        try:
+            await _build_index(database[spec.collection], spec, superseded)
+            _set_state(spec, "ready")
+            logger.info("Índice '%s' configurado.", spec.index_name)
+        except Exception as e:
+            failed = True
+            _set_state(spec, "failed", str(e))
+            logger.error("Erro ao configurar o índice '%s' do MongoDB: %s", spec.index_name, e)
+
+    if failed:
+        return # Os índices aposentados continuam até os compostos que os cobrem estarem prontos
+    for collection_name, name in plan["retired"]:
+        try:
+            await database[collection_name].drop_index(name)
+            logger.info("Índice aposentado '%s' removido.", name)
+        except Exception as e:
+            logger.error("Erro ao remover o índice aposentado '%s': %s", name, e)
+
+
+def start_index_build(database: motor.motor_asyncio.AsyncIOMotorDatabase) -> "asyncio.Task[None]":
+    """
+    Dispara `sync_indexes` em segundo plano, sem bloquear o startup do worker.
+    Se um build já estiver em andamento, retorna a mesma Task.
+    """
+    global index_build_task
+    if index_build_task is None or index_build_task.done():
+        index_build_task = asyncio.ensure_future(sync_indexes(database))
+    return index_build_task
+
+
+def cancel_index_build() -> None:
+    """Interrompe o acompanhamento do build no encerramento (o servidor conclui o índice em andamento)."""
+    if index_build_task is not None and not index_build_task.done():
+        index_build_task.cancel()
+
+
+async def get_index_build_status(database: Optional[motor.motor_asyncio.AsyncIOMotorDatabase]) -> Dict[str, Any]:
+    """
+    Estado de cada índice gerenciado, com o progresso reportado pelo servidor
+    (`$currentOp`) para os builds em andamento.
+    """
+    status: Dict[str, Any] = {
+        "running": index_build_task is not None and not index_build_task.done(),
+        "indexes": {name: dict(state) for name, state in index_build_state.items()},
+    }
+    if database is None or not status["running"]:
+        return status
+
+    try:
+        operations = database.client.admin.aggregate([
+            {"$currentOp": {"allUsers": True, "idleConnections": False}},
+            {"$match": {"command.createIndexes": {"$exists": True}}},
+        ])
+        async for operation in operations:
+            for index in operation.get("command", {}).get("indexes", []):
+                if index.get("name") in status["indexes"]:
+                    status["indexes"][index["name"]]["progress"] = {
+                        "message": operation.get("msg"),
+                        "done": operation.get("progress", {}).get("done"),
+                        "total": operation.get("progress", {}).get("total"),
+                    }
+    except Exception as e:
+        # $currentOp exige privilégios de administrador; o estado local continua disponível
+        status["progress_error"] = str(e)
+    return status
+
+
+# --- 3. Verificação dos Planos das Consultas Quentes (explain) ---
+def _plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Achata a árvore de um plano de execução (inputStage/inputStages/queryPlan)."""
+    stages = [plan]
+    for child_key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(child_key), dict):
+            stages.extend(_plan_stages(plan[child_key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def check_hot_query_plans(database: motor.motor_asyncio.AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """
+    Executa `explain()` nas consultas quentes de `src/crud/orders.py` (listagem por
+    created_at, filtro por cliente, por status, por produto e página por cursor) e
+    verifica se cada uma usa um índice, sem cair em COLLSCAN.
+
+    :return: {"ok": bool, "queries": {nome: {"ok", "indexes", "stages"}}}
+    """
+    # Importação tardia: src.storage.mongo depende de src.config.db, que importa este módulo
+    from bson import ObjectId
+    from src.storage.base import OrderQuery
+    from src.storage.mongo import LIST_SORT, build_order_filter
+
+    after = (datetime.utcnow(), ObjectId())
+    hot_queries = {
+        "list_by_created_at": build_order_filter(OrderQuery()),
+        "list_by_customer": build_order_filter(OrderQuery(customer_id=0)),
+        "list_by_status": build_order_filter(OrderQuery(status="pending")),
+        "list_by_product": build_order_filter(OrderQuery(product_id=0)),
+        "list_after_cursor": build_order_filter(OrderQuery(), after),
+    }
+
+    report: Dict[str, Any] = {"ok": True, "queries": {}}
+    collection = database["orders"]
+    for name, query_filter in hot_queries.items():
+        explanation = await collection.find(query_filter).sort(LIST_SORT).limit(50).explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(winning_plan)
+        stage_names = [stage.get("stage") for stage in stages if stage.get("stage")]
+        uses_collscan = "COLLSCAN" in stage_names
+        report["queries"][name] = {
+            "ok": not uses_collscan,
+            "indexes": sorted({stage["indexName"] for stage in stages if stage.get("indexName")}),
+            "stages": stage_names,
+        }
+        report["ok"] = report["ok"] and not uses_collscan
+    return report
@@ -0,0 +1,153 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Arquivo de configuração opcional (formato .env); variáveis de ambiente já definidas têm prioridade
+ENV_FILE = os.getenv("API_CRUD_ENV_FILE", ".env")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Configurações da aplicação, lidas de variáveis de ambiente ou do arquivo `ENV_FILE`.
+    """
+    # Conexão
+    mongo_details: str = "mongodb://localhost:27017"
+    db_name: str = "api_crud_db"
+    storage_backend: str = "mongo"
+    server_selection_timeout_ms: int = 5000
+
+    # Pool de conexões do Motor/pymongo
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+
+    # Compressão de rede (ex.: "zstd,snappy,zlib") e preferência de leitura
+    compressors: Optional[str] = None
+    read_preference: str = "primary"
+
+    # Tempo máximo do 'ping' da checagem de prontidão (health check)
+    readiness_timeout_ms: int = 1000
+
+    # Logs estruturados (JSON): nível e limite de registros repetidos por janela
+    log_level: str = "INFO"
+    log_rate_limit: int = 10
+    log_rate_window_seconds: int = 60
+
+    # Agrupamento de POSTs individuais concorrentes em um único insert_many ("group commit")
+    order_write_batching: bool = False
+    order_write_batch_size: int = 100
+    order_write_max_wait_ms: float = 2.0
+
+    # Invalida o cache de leitura deste worker a partir do change stream (requer replica set)
+    change_stream_invalidation: bool = False
+
+    # Arquivamento: pedidos finalizados (status separados por vírgula) mais antigos que
+    # `archive_after_days` são movidos para a camada fria a cada `archive_interval_seconds`
+    archive_enabled: bool = False
+    archive_after_days: int = 90
+    archive_statuses: str = "DELIVERED,CANCELLED"
+    archive_batch_size: int = 1000
+    archive_interval_seconds: int = 3600
+
+    # Compressão das respostas (brotli, se instalado, ou gzip) a partir de um tamanho mínimo
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+
+    # Controle de admissão: concorrência por classe de rota, fila de espera e prazo padrão
+    admission_control: bool = True
+    admission_read_limit: int = 64
+    admission_write_limit: int = 32
+    admission_export_limit: int = 4
+    admission_queue_limit: int = 128
+    admission_max_wait_ms: int = 500
+    admission_retry_after_seconds: int = 1
+    request_timeout_ms: Optional[int] = None
+
+    # Perfil sob demanda (header `X-Profile` com o segredo `profiling_token`, exigido também
+    # nas rotas /admin/profiles) e porcentagem de requisições perfiladas por amostragem;
+    # os artefatos ficam em `profiling_dir`
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None
+    profiling_sample_rate: float = 0.0
+    profiling_dir: str = os.path.join(tempfile.gettempdir(), "api_crud_profiles")
+    profiling_max_artifacts: int = 100
+    profiling_backend: str = "auto"
+
+
+@lru_cache()
+def get_settings() -> Settings:
+    """Carrega as configurações uma única vez por processo."""
+    load_dotenv(ENV_FILE, override=False)
+    defaults = Settings()
+    return Settings(
+        mongo_details=os.getenv("MONGO_DETAILS", defaults.mongo_details),
+        db_name=os.getenv("DB_NAME", defaults.db_name),
+        storage_backend=os.getenv("STORAGE_BACKEND", defaults.storage_backend),
+        server_selection_timeout_ms=_env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", defaults.server_selection_timeout_ms),
+        max_pool_size=_env_int("MONGO_MAX_POOL_SIZE", defaults.max_pool_size),
+        min_pool_size=_env_int("MONGO_MIN_POOL_SIZE", defaults.min_pool_size),
+        max_idle_time_ms=_env_int("MONGO_MAX_IDLE_TIME_MS", defaults.max_idle_time_ms),
+        wait_queue_timeout_ms=_env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", defaults.wait_queue_timeout_ms),
+        compressors=os.getenv("MONGO_COMPRESSORS", defaults.compressors) or None,
+        read_preference=os.getenv("MONGO_READ_PREFERENCE", defaults.read_preference),
+        readiness_timeout_ms=_env_int("READINESS_TIMEOUT_MS", defaults.readiness_timeout_ms),
+        log_level=os.getenv("LOG_LEVEL", defaults.log_level),
+        log_rate_limit=_env_int("LOG_RATE_LIMIT", defaults.log_rate_limit),
+        log_rate_window_seconds=_env_int("LOG_RATE_WINDOW_SECONDS", defaults.log_rate_window_seconds),
+        order_write_batching=_env_bool("ORDER_WRITE_BATCHING", defaults.order_write_batching),
+        order_write_batch_size=_env_int("ORDER_WRITE_BATCH_SIZE", defaults.order_write_batch_size),
+        order_write_max_wait_ms=_env_float("ORDER_WRITE_MAX_WAIT_MS", defaults.order_write_max_wait_ms),
+        change_stream_invalidation=_env_bool("CHANGE_STREAM_INVALIDATION", defaults.change_stream_invalidation),
+        archive_enabled=_env_bool("ARCHIVE_ENABLED", defaults.archive_enabled),
+        archive_after_days=_env_int("ARCHIVE_AFTER_DAYS", defaults.archive_after_days),
+        archive_statuses=os.getenv("ARCHIVE_STATUSES", defaults.archive_statuses),
+        archive_batch_size=_env_int("ARCHIVE_BATCH_SIZE", defaults.archive_batch_size),
+        archive_interval_seconds=_env_int("ARCHIVE_INTERVAL_SECONDS", defaults.archive_interval_seconds),
+        compression_enabled=_env_bool("COMPRESSION_ENABLED", defaults.compression_enabled),
+        compression_minimum_size=_env_int("COMPRESSION_MINIMUM_SIZE", defaults.compression_minimum_size),
+        compression_gzip_level=_env_int("COMPRESSION_GZIP_LEVEL", defaults.compression_gzip_level),
+        compression_brotli_quality=_env_int("COMPRESSION_BROTLI_QUALITY", defaults.compression_brotli_quality),
+        admission_control=_env_bool("ADMISSION_CONTROL", defaults.admission_control),
+        admission_read_limit=_env_int("ADMISSION_READ_LIMIT", defaults.admission_read_limit),
+        admission_write_limit=_env_int("ADMISSION_WRITE_LIMIT", defaults.admission_write_limit),
+        admission_export_limit=_env_int("ADMISSION_EXPORT_LIMIT", defaults.admission_export_limit),
+        admission_queue_limit=_env_int("ADMISSION_QUEUE_LIMIT", defaults.admission_queue_limit),
+        admission_max_wait_ms=_env_int("ADMISSION_MAX_WAIT_MS", defaults.admission_max_wait_ms),
+        admission_retry_after_seconds=_env_int("ADMISSION_RETRY_AFTER_SECONDS", defaults.admission_retry_after_seconds),
+        request_timeout_ms=_env_int("REQUEST_TIMEOUT_MS", defaults.request_timeout_ms),
+        profiling_enabled=_env_bool("PROFILING_ENABLED", defaults.profiling_enabled),
+        profiling_token=os.getenv("PROFILING_TOKEN") or defaults.profiling_token,
+        profiling_sample_rate=_env_float("PROFILING_SAMPLE_RATE", defaults.profiling_sample_rate),
+        profiling_dir=os.getenv("PROFILING_DIR", defaults.profiling_dir),
+        profiling_max_artifacts=_env_int("PROFILING_MAX_ARTIFACTS", defaults.profiling_max_artifacts),
+        profiling_backend=os.getenv("PROFILING_BACKEND", defaults.profiling_backend),
+    )
@@ -0,0 +1,57 @@
+from src.config.db import ARCHIVE_COLLECTION_NAME
+from src.storage.base import OrderStorage
+from src.storage.memory import InMemoryOrderStorage
+from src.storage.mongo import MongoOrderStorage
+from src.storage.rollups import InMemoryRollupStore, MongoRollupStore, RollupStore
+
+# Backends disponíveis: "mongo" (padrão, via Motor) e "memory" (índices em memória)
+STORAGE_BACKENDS = {
+    "mongo": MongoOrderStorage,
+    "memory": InMemoryOrderStorage,
+}
+
+# Cada backend de pedidos tem o seu armazenamento de rollups (agregados de vendas)
+ROLLUP_BACKENDS = {
+    "mongo": MongoRollupStore,
+    "memory": InMemoryRollupStore,
+}
+
+# Camada fria: pedidos finalizados antigos, movidos pelo arquivamento (ver src/archival.py)
+ARCHIVE_BACKENDS = {
+    "mongo": lambda: MongoOrderStorage(ARCHIVE_COLLECTION_NAME),
+    "memory": InMemoryOrderStorage,
+}
+
+storage: OrderStorage = MongoOrderStorage()
+archive_storage: OrderStorage = MongoOrderStorage(ARCHIVE_COLLECTION_NAME)
+rollup_store: RollupStore = MongoRollupStore()
+
+
+def configure_storage(backend: str) -> OrderStorage:
+    """
+    Seleciona o backend de armazenamento de pedidos usado pela camada CRUD.
+
+    :raises ValueError: Se o backend não existir.
+    """
+    global storage, archive_storage, rollup_store
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}. Opções: {', '.join(STORAGE_BACKENDS)}")
+    storage = STORAGE_BACKENDS[backend]()
+    archive_storage = ARCHIVE_BACKENDS[backend]()
+    rollup_store = ROLLUP_BACKENDS[backend]()
+    return storage
+
+
+def get_storage() -> OrderStorage:
+    """Retorna o backend de armazenamento de pedidos ativo (usado na camada CRUD)."""
+    return storage
+
+
+def get_archive_storage() -> OrderStorage:
+    """Retorna o armazenamento de pedidos arquivados do backend ativo (mesma interface)."""
+    return archive_storage
+
+
+def get_rollup_store() -> RollupStore:
+    """Retorna o armazenamento de rollups do backend ativo."""
+    return rollup_store
@@ -0,0 +1,110 @@
+import logging
+from datetime import date
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from src.archival import order_archiver
+from src.config.storage import get_rollup_store, get_storage
+from src.storage.base import OrderQuery, OrderStorage
+from src.storage.rollups import RollupDeltas, compute_rollup_deltas, status_move_deltas
+
+logger = logging.getLogger(__name__)
+
+# Tamanho do lote de leitura dos pedidos na reconstrução dos rollups (backend em memória)
+ROLLUP_REBUILD_BATCH_SIZE = 1000
+
+
+# --- 1. Manutenção Incremental (chamada por create/update/delete_order) ---
+async def record_order_changes(
+    before: Iterable[Dict[str, Any]] = (),
+    after: Iterable[Dict[str, Any]] = (),
+) -> None:
+    """
+    Aplica aos rollups a diferença entre os pedidos antes e depois de uma escrita.
+
+    Falhas são registradas e não propagadas: o pedido já foi persistido, e os agregados
+    podem ser corrigidos por `rebuild_rollups`.
+    """
+    await _apply_rollup_deltas(lambda: compute_rollup_deltas(before=before, after=after))
+
+
+async def record_status_move(old_status: str, new_status: str, count: int, revenue: float) -> None:
+    """Aplica aos rollups uma transição de status por filtro (quantidade e receita movidas)."""
+    await _apply_rollup_deltas(lambda: status_move_deltas(old_status, new_status, count, revenue))
+
+
+async def _apply_rollup_deltas(compute_deltas: Callable[[], RollupDeltas]) -> None:
+    rollups = get_rollup_store()
+    if not rollups.is_available():
+        return
+
+    try:
+        deltas = compute_deltas()
+        if deltas:
+            await rollups.apply(deltas)
+    except Exception as e:
+        logger.error("Erro ao atualizar os rollups de vendas: %s", e)
+
+
+# --- 2. Leitura dos Agregados ---
+async def get_daily_revenue(date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Receita e quantidade de pedidos por dia (UTC), no intervalo fechado [date_from, date_to]."""
+    rollups = get_rollup_store()
+    if not rollups.is_available():
+        return []
+    return await rollups.find(
+        "daily",
+        key_from=date_from.isoformat() if date_from else None,
+        key_to=date_to.isoformat() if date_to else None,
+    )
+
+
+async def get_customer_revenue(customer_id: int) -> Optional[Dict[str, Any]]:
+    """Receita e quantidade de pedidos de um cliente, ou None se ele não tiver pedidos."""
+    rollups = get_rollup_store()
+    if not rollups.is_available():
+        return None
+    found = await rollups.find("customer", keys=[customer_id])
+    return found[0] if found else None
+
+
+async def list_top_customers(limit: int = 10) -> List[Dict[str, Any]]:
+    """Clientes de maior receita, em ordem decrescente."""
+    rollups = get_rollup_store()
+    if not rollups.is_available():
+        return []
+    return await rollups.top("customer", limit)
+
+
+async def get_status_revenue() -> List[Dict[str, Any]]:
+    """Receita e quantidade de pedidos por status."""
+    rollups = get_rollup_store()
+    if not rollups.is_available():
+        return []
+    return await rollups.find("status")
+
+
+# --- 3. Reconstrução Completa ---
+async def rebuild_rollups() -> Optional[Dict[str, int]]:
+    """
+    Recalcula todos os rollups a partir dos pedidos das duas camadas, quente e arquivo
+    (no MongoDB, com `$unionWith`/`$group`/`$merge`). O arquivo só entra se as leituras
+    o consultam (ver `OrderArchiver.archive_for_reads`).
+
+    Escritas concorrentes durante a reconstrução podem ser contadas em dobro ou
+    perdidas: execute em janelas de baixo tráfego.
+
+    :return: Quantidade de chaves por dimensão, ou None se o backend estiver indisponível.
+    """
+    storage = get_storage()
+    rollups = get_rollup_store()
+    if not storage.is_available() or not rollups.is_available():
+        return None
+    archive = order_archiver.archive_for_reads()
+    return await rollups.rebuild(_iter_all_orders(archive), include_archive=archive is not None)
+
+
+async def _iter_all_orders(archive: Optional[OrderStorage]) -> AsyncIterator[Dict[str, Any]]:
+    for storage in (get_storage(), archive):
+        if storage is not None and storage.is_available():
+            async for order_doc in storage.iter_orders(OrderQuery(), ROLLUP_REBUILD_BATCH_SIZE):
+                yield order_doc
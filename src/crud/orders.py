@@ -1,48 +1,426 @@
-from typing import Optional, List, Dict, Any
-from src.schemas.order import OrderDB, OrderInput, OrderUpdate
-from src.config.db import get_database
-from pymongo.results import InsertOneResult, UpdateResult, DeleteResult # Importa DeleteResult
+import base64
+import hashlib
+import heapq
+import json
+import logging
+import orjson
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Sequence, Tuple, Union, AsyncIterator
+from src.schemas.order import (
+    OrderDB,
+    OrderInput,
+    OrderPartial,
+    OrderUpdate,
+    BulkItemResult,
+    StatusTransitionResponse,
+    compute_items_total,
+)
+from src.config.storage import get_archive_storage, get_storage
+from src.archival import order_archiver
+from src.crud.analytics import record_order_changes, record_status_move
+from src.storage.base import TRANSITION_FIELDS, OrderQuery, OrderStorage, SortKey, StatusTransition
+from src.cache import CacheBackend, CacheFillGuard, CacheStats, MemoryCacheBackend
+from src.singleflight import SingleFlight
+from src.batching import InsertBatcher
 from bson import ObjectId
-from pymongo import DESCENDING
-from pymongo.errors import DuplicateKeyError
+from pymongo.errors import DuplicateKeyError, ExecutionTimeout
 
-# Nome da coleção no MongoDB
-COLLECTION_NAME = "orders"
+logger = logging.getLogger(__name__)
+
+# Tamanho de cada chunk do insert_many na ingestão em lote
+BULK_CHUNK_SIZE = 1000
+
+# Quantidade máxima de IDs por consulta $in na leitura em lote (batch-get)
+BATCH_GET_CHUNK_SIZE = 500
+
+# Limites do cache de leitura por ID (ver `order_cache`)
+ORDER_CACHE_MAX_ENTRIES = 10_000
+ORDER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+ORDER_CACHE_TTL_SECONDS = 30.0
+
+# Cache read-through de `get_order_json`/`get_order_by_id`, invalidado por `update_order` e `delete_order`.
+# Armazena a versão e o JSON de saída do pedido (ver `_pack_cached_order`); pode ser trocado por um
+# backend compartilhado via `set_order_cache_backend`.
+order_cache: CacheBackend = MemoryCacheBackend(
+    max_entries=ORDER_CACHE_MAX_ENTRIES,
+    max_bytes=ORDER_CACHE_MAX_BYTES,
+    ttl_seconds=ORDER_CACHE_TTL_SECONDS,
+)
+
+# Leituras que começaram antes de uma invalidação não gravam o pedido antigo no cache
+order_cache_fills = CacheFillGuard()
+
+# Bytes da versão no início de cada entrada do cache de pedidos
+CACHED_VERSION_BYTES = 8
+
+
+def _pack_cached_order(order_json: bytes, version: int) -> bytes:
+    # A versão vem antes do JSON: o ETag sai do cache sem decodificar o corpo
+    return version.to_bytes(CACHED_VERSION_BYTES, "big") + order_json
+
+
+def _unpack_cached_order(cached: bytes) -> Tuple[bytes, int]:
+    return cached[CACHED_VERSION_BYTES:], int.from_bytes(cached[:CACHED_VERSION_BYTES], "big")
+
+
+def set_order_cache_backend(backend: CacheBackend) -> None:
+    """Substitui o backend do cache de pedidos (ex.: um cache compartilhado entre workers)."""
+    global order_cache
+    order_cache = backend
+
+
+def get_order_cache_stats() -> CacheStats:
+    """Retorna os contadores de hit/miss/eviction do cache de pedidos."""
+    return order_cache.stats()
+
+
+async def invalidate_cached_order(object_id: ObjectId) -> None:
+    """
+    Remove um pedido do cache de leitura após escrita ou exclusão. Leituras do pedido e
+    listagens em andamento deixam de ser compartilhadas: quem chega depois da escrita
+    dispara uma nova consulta.
+    """
+    order_key = str(object_id)
+    order_cache_fills.invalidate(order_key)
+    order_flights.forget(lambda flight_key: flight_key[0] == "list" or flight_key[1] == order_key)
+    await order_cache.delete(order_key)
+
+
+def forget_list_flights() -> None:
+    """Após a criação de pedidos: listagens em andamento não são compartilhadas com quem chega depois."""
+    order_flights.forget(lambda flight_key: flight_key[0] == "list")
+
+
+async def clear_order_cache() -> None:
+    """Descarta o cache de leitura inteiro (inclusive o que leituras em andamento gravariam)."""
+    order_cache_fills.invalidate_all()
+    order_flights.forget()
+    await order_cache.clear()
+
+# Eventos de change stream que invalidam um pedido ou a coleção inteira
+ORDER_CHANGE_OPERATIONS = {"update", "replace", "delete"}
+COLLECTION_CHANGE_OPERATIONS = {"drop", "dropDatabase", "rename", "invalidate"}
+
+
+async def invalidate_from_change(change: Dict[str, Any]) -> None:
+    """
+    Listener do change stream: invalida o cache de leitura deste processo quando o
+    pedido é alterado por qualquer worker (ou fora da API).
+    """
+    operation = change.get("operationType")
+    if operation in ORDER_CHANGE_OPERATIONS:
+        await invalidate_cached_order(change["documentKey"]["_id"])
+    elif operation in COLLECTION_CHANGE_OPERATIONS:
+        await clear_order_cache()
+
+# Modo opcional de escrita em lote ("group commit") para POSTs individuais.
+# Desligado por padrão; configurado no startup a partir de ORDER_WRITE_BATCHING (ver src/main.py).
+ORDER_WRITE_BATCH_SIZE = 100
+ORDER_WRITE_MAX_WAIT_MS = 2.0
+
+order_batcher: Optional[InsertBatcher] = None
+
+
+def configure_order_write_batching(
+    enabled: bool,
+    max_batch_size: int = ORDER_WRITE_BATCH_SIZE,
+    max_wait_ms: float = ORDER_WRITE_MAX_WAIT_MS,
+) -> None:
+    """
+    Liga ou desliga o agrupamento de `create_order` concorrentes em um único insert_many.
+
+    A latência de cada POST cresce no máximo `max_wait_ms`; a vazão sob concorrência
+    cresce com o tamanho do lote.
+    """
+    global order_batcher
+    if not enabled:
+        order_batcher = None
+        return
+    order_batcher = InsertBatcher(
+        lambda docs: get_storage().insert_many(docs),
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+    )
+
+
+async def flush_order_writes() -> None:
+    """Descarrega as escritas em lote pendentes (usado no shutdown)."""
+    if order_batcher is not None:
+        await order_batcher.close()
+
+
+def get_order_write_batching_stats() -> Optional[Dict[str, Any]]:
+    """Contadores do agrupamento de escritas (lotes, documentos, tamanho médio), ou None se desligado."""
+    return order_batcher.stats() if order_batcher is not None else None
+
+# Coalescência de leituras concorrentes idênticas (por ID e por parâmetros de listagem).
+# A consulta compartilhada roda com o prazo (maxTimeMS) de quem a iniciou: quem entra
+# depois, com prazo mais longo, recebe o mesmo 503 se ela esgotar, e quem tem prazo mais
+# curto espera até o fim dela.
+order_flights = SingleFlight()
+
+# --- Paginação por Cursor (Keyset) ---
+def encode_cursor(created_at: datetime, object_id: ObjectId) -> str:
+    """
+    Gera um cursor opaco (base64 url-safe) a partir da chave de ordenação (created_at, _id).
+    """
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(object_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Decodifica um cursor gerado por `encode_cursor`.
+
+    :raises ValueError: Se o cursor estiver malformado.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["c"]), ObjectId(data["i"])
+    except Exception as e:
+        raise ValueError(f"Cursor de paginação inválido: {cursor}") from e
+
+
+# --- Camadas Quente e Fria (Arquivamento, ver src/archival.py) ---
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _archive_needed(query: OrderQuery, page: Optional[List[Dict[str, Any]]] = None, limit: int = 0) -> bool:
+    """
+    Indica se a camada fria pode ter pedidos para a consulta: só pedidos criados antes
+    do horizonte de arquivamento são arquivados. Uma página cheia da camada quente que
+    termina depois do horizonte dispensa a consulta ao arquivo.
+    """
+    horizon = order_archiver.horizon()
+    if query.created_from is not None and _naive_utc(query.created_from) >= horizon:
+        return False
+    if page is not None and len(page) >= limit and _naive_utc(page[-1]["created_at"]) >= horizon:
+        return False
+    return True
+
+
+def _sort_key(order_doc: Dict[str, Any]) -> SortKey:
+    return _naive_utc(order_doc["created_at"]), order_doc["_id"]
+
+
+async def _find_page_tiered(
+    storage: OrderStorage,
+    query: OrderQuery,
+    limit: int,
+    skip: int = 0,
+    after: Optional[SortKey] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    `find_page` sobre as duas camadas: a quente é consultada primeiro (com `skip` no
+    servidor) e o arquivo só quando essa página é incompleta ou alcança o horizonte de
+    arquivamento. Nesse caso, as duas camadas são intercaladas na ordem da listagem
+    lendo apenas as chaves (_id, created_at), e os pedidos da página são buscados por ID.
+    Um pedido presente nas duas (arquivamento interrompido) aparece uma vez.
+    """
+    page = await storage.find_page(query, limit, skip=skip, after=after, fields=fields)
+    archive = order_archiver.archive_for_reads()
+    if archive is None or not _archive_needed(query, page, limit):
+        return page
+
+    hot_keys = page if not skip else await storage.find_page(query, skip + limit, after=after, fields=())
+    archived_keys = await archive.find_page(query, skip + limit, after=after, fields=())
+    hot_ids = {order_doc["_id"] for order_doc in hot_keys}
+    selected = list(heapq.merge(
+        hot_keys,
+        [order_doc for order_doc in archived_keys if order_doc["_id"] not in hot_ids],
+        key=_sort_key,
+        reverse=True,
+    ))[skip:skip + limit]
+
+    # Documentos da página: os já lidos da camada quente e os demais buscados por ID
+    found = {order_doc["_id"]: order_doc for order_doc in page}
+    read_fields = fields if fields is None or "created_at" in fields else (*fields, "created_at")
+    for tier, tier_ids in ((storage, hot_ids), (archive, None)):
+        pending = [
+            order_doc["_id"] for order_doc in selected
+            if order_doc["_id"] not in found and (tier_ids is None or order_doc["_id"] in tier_ids)
+        ]
+        if pending:
+            found.update((order_doc["_id"], order_doc) for order_doc in await tier.find_many(pending, fields=read_fields))
+    # Pedidos excluídos entre a leitura das chaves e a dos documentos ficam de fora
+    return [found[order_doc["_id"]] for order_doc in selected if order_doc["_id"] in found]
+
+
+async def _iter_orders_tiered(storage: OrderStorage, query: OrderQuery, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+    """`iter_orders` sobre as duas camadas, intercaladas na ordem da listagem (um cursor por camada)."""
+    archive = order_archiver.archive_for_reads()
+    if archive is None or not _archive_needed(query):
+        async for order_doc in storage.iter_orders(query, batch_size):
+            yield order_doc
+        return
+
+    hot_orders = storage.iter_orders(query, batch_size)
+    archived_orders = archive.iter_orders(query, batch_size)
+    try:
+        hot_doc = await anext(hot_orders, None)
+        archived_doc = await anext(archived_orders, None)
+        while hot_doc is not None or archived_doc is not None:
+            if archived_doc is None or (hot_doc is not None and _sort_key(hot_doc) >= _sort_key(archived_doc)):
+                if archived_doc is not None and hot_doc["_id"] == archived_doc["_id"]:
+                    archived_doc = await anext(archived_orders, None) # Cópia duplicada: vale a quente
+                yield hot_doc
+                hot_doc = await anext(hot_orders, None)
+            else:
+                yield archived_doc
+                archived_doc = await anext(archived_orders, None)
+    finally:
+        await hot_orders.aclose()
+        await archived_orders.aclose()
+
+
+# --- Projeção (Sparse Fieldsets) ---
+# Campos de saída de OrderDB, na ordem de serialização
+ORDER_FIELDS = ("id", "customer_id", "items", "shipping_address", "total_value", "created_at", "status", "version")
+
+
+def parse_order_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Converte o parâmetro `fields=` (nomes separados por vírgula) na tupla canônica de campos.
+
+    :return: None se nenhum campo foi pedido (documento inteiro).
+    :raises ValueError: Se algum campo não existir em OrderDB.
+    """
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    if not requested:
+        return None
+    unknown = requested.difference(ORDER_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos inválidos em 'fields': {', '.join(sorted(unknown))}. Opções: {', '.join(ORDER_FIELDS)}")
+    return tuple(field for field in ORDER_FIELDS if field in requested)
+
+
+def _storage_fields(fields: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+    # 'id' é o '_id' persistido, que o backend sempre retorna
+    if fields is None:
+        return None
+    storage_fields = tuple(field for field in fields if field != "id")
+    if "total_value" in storage_fields and "items" not in storage_fields:
+        # Pedidos antigos não têm total_value gravado: o total é calculado a partir dos itens
+        storage_fields += ("items",)
+    return storage_fields
+
+
+def serialize_order_doc(order_doc: Dict[str, Any], fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Mapeia um documento armazenado para o formato de saída de OrderDB (JSON-compatível),
+    sem revalidação Pydantic: os dados já foram validados na escrita.
+
+    Com `fields`, retorna apenas esses campos (o documento já vem projetado do backend).
+    """
+    total_value = order_doc.get("total_value")
+    if not total_value:
+        total_value = compute_items_total(order_doc.get("items", []))
+
+    created_at = order_doc.get("created_at")
+    serialized = {
+        "id": str(order_doc["_id"]),
+        "customer_id": order_doc.get("customer_id"),
+        "items": order_doc.get("items", []),
+        "shipping_address": order_doc.get("shipping_address"),
+        "total_value": total_value,
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        "status": order_doc.get("status", "PENDING"),
+        "version": order_doc.get("version", 1),
+    }
+    if fields is None:
+        return serialized
+    return {field: serialized[field] for field in fields}
+
+# --- ETags (Versão do Pedido) ---
+def order_etag(version: int, fields: Optional[Sequence[str]] = None) -> str:
+    """
+    ETag de um pedido, derivado da sua `version` (e dos campos, em leituras parciais).
+    Fraco (W/): o mesmo pedido pode ser enviado com codificações (compressões) diferentes.
+    """
+    tag = f"v{version}" if fields is None else f"v{version}.{'+'.join(fields)}"
+    return f'W/"{tag}"'
+
+
+def page_etag(order_docs: Sequence[Dict[str, Any]], fields: Optional[Sequence[str]] = None) -> str:
+    """ETag de uma página da listagem: resumo dos pares (_id, version), na ordem, e dos campos."""
+    digest = hashlib.blake2b(b"*" if fields is None else ",".join(fields).encode("ascii"), digest_size=16)
+    for order_doc in order_docs:
+        digest.update(order_doc["_id"].binary)
+        digest.update(order_doc.get("version", 1).to_bytes(8, "big"))
+    return f'W/"p{digest.hexdigest()}"'
+
+
+def serialize_change_event(change: Dict[str, Any]) -> Tuple[str, str, bytes]:
+    """
+    Converte um evento de change stream em (id, tipo, JSON) para o feed ao vivo.
+
+    O id é o resume token do evento: enviado de volta (Last-Event-ID), retoma o feed
+    a partir do evento seguinte.
+    """
+    document = change.get("fullDocument")
+    description = change.get("updateDescription") or {}
+    payload = {
+        "operation": change.get("operationType"),
+        "id": str(change.get("documentKey", {}).get("_id", "")) or None,
+        "order": serialize_order_doc(document) if document else None,
+        "updated_fields": sorted(description.get("updatedFields", {})) or None,
+    }
+    return change["_id"]["_data"], payload["operation"], orjson.dumps(payload)
+
+def build_order_document(order_data: OrderInput) -> Dict[str, Any]:
+    """
+    Converte um OrderInput no documento a ser persistido, com os campos gerados
+    (created_at, status) e o total_value já calculado.
+    """
+    # Converte o objeto Pydantic para um dicionário para inserção
+    order_dict = order_data.model_dump(mode="json", by_alias=True)
+
+    # Define campos gerados (se não vierem já calculados pelo Pydantic)
+    if 'created_at' not in order_dict:
+        # Trunca para milissegundos, a precisão de datas do BSON, para que o retorno
+        # do POST seja idêntico ao documento lido depois
+        now = datetime.utcnow()
+        order_dict['created_at'] = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        order_dict['status'] = "PENDING"
+
+    order_dict['total_value'] = compute_items_total(order_dict['items'])
+    order_dict['version'] = 1
+    return order_dict
 
 # --- 1. FUNÇÃO: CREATE ---
 async def create_order(order_data: OrderInput) -> Optional[OrderDB]:
     """
-    Insere um novo pedido no MongoDB e retorna o objeto OrderDB completo.
+    Insere um novo pedido e retorna o objeto OrderDB completo.
     """
-    db = get_database()
-    if not db:
+    storage = get_storage()
+    if not storage.is_available():
         return None
 
     try:
-        # Converte o objeto Pydantic para um dicionário para inserção
-        order_dict = order_data.model_dump(mode="json", by_alias=True)
-        
-        # Define campos gerados (se não vierem já calculados pelo Pydantic)
-        if 'created_at' not in order_dict:
-            from datetime import datetime
-            order_dict['created_at'] = datetime.utcnow()
-            order_dict['status'] = "PENDING"
-        
-        collection = db[COLLECTION_NAME]
-        
-        result: InsertOneResult = await collection.insert_one(order_dict)
-        
-        if result.inserted_id:
-            # Consulta o documento recém-inserido
-            new_order_doc = await collection.find_one({"_id": result.inserted_id})
-            
-            if new_order_doc:
-                # Mapeamento: MongoDB '_id' (ObjectId) para Pydantic 'id' (str)
-                new_order_doc["id"] = str(new_order_doc.pop("_id")) 
-                return OrderDB(**new_order_doc)
+        order_dict = build_order_document(order_data)
+
+        if order_batcher is not None:
+            # Agrupado com outros POSTs concorrentes em um único insert_many
+            await order_batcher.submit(order_dict)
+        else:
+            await storage.insert_one(order_dict)
+        forget_list_flights()
+
+        await record_order_changes(after=[order_dict])
+
+        # insert_one/insert_many preenchem o '_id' no próprio dicionário: não é preciso reler o documento
+        order_dict["id"] = str(order_dict.pop("_id"))
+        return OrderDB(**order_dict)
             
     except DuplicateKeyError as e: # NOVO: Captura o erro específico
-        print(f"❌ ERRO: Chave duplicada no pedido. Detalhes: {e}")
+        logger.warning("Chave duplicada no pedido. Detalhes: %s", e)
         # Neste ponto, você pode levantar uma exceção customizada ou
         # simplesmente retornar None, mas o tratamento global é mais limpo.
         # Para o tratamento global funcionar, o erro precisa subir.
@@ -51,80 +429,439 @@ async def create_order(order_data: OrderInput) -> Optional[OrderDB]:
         raise e 
 
     except Exception as e:
-        print(f"❌ ERRO ao inserir pedido no MongoDB: {e}")
+        logger.error("Erro ao inserir pedido no MongoDB: %s", e)
         return None
     
     return None
 
+# --- 1.1 FUNÇÃO: CREATE em Lote (Bulk) ---
+async def create_orders_bulk(
+    orders: List[OrderInput],
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> List[BulkItemResult]:
+    """
+    Insere vários pedidos com `insert_many` não ordenado, em chunks.
+
+    Um erro em um item (ex.: chave duplicada) não interrompe os demais.
+
+    :param orders: Pedidos já validados.
+    :param chunk_size: Quantidade máxima de documentos por insert_many.
+    :return: Um BulkItemResult por pedido, com `index` relativo à lista recebida.
+    """
+    storage = get_storage()
+    if not storage.is_available():
+        return [
+            BulkItemResult(index=i, status="error", error="Banco de dados indisponível.")
+            for i in range(len(orders))
+        ]
+
+    results: List[BulkItemResult] = []
+
+    for start in range(0, len(orders), chunk_size):
+        chunk = orders[start:start + chunk_size]
+        docs = [build_order_document(order) for order in chunk]
+
+        try:
+            failures = await storage.insert_many(docs)
+        except Exception as e:
+            logger.error("Erro ao inserir lote de pedidos no MongoDB: %s", e)
+            failures = {i: e for i in range(len(docs))}
+        forget_list_flights()
+
+        # Um único $inc por chave de rollup para todo o chunk
+        await record_order_changes(after=[doc for i, doc in enumerate(docs) if i not in failures])
+
+        for i, doc in enumerate(docs):
+            error = failures.get(i)
+            if error is None:
+                # insert_many preenche o '_id' de cada documento antes do envio
+                results.append(BulkItemResult(index=start + i, status="created", id=str(doc["_id"])))
+            elif isinstance(error, DuplicateKeyError):
+                key_value = (error.details or {}).get("keyValue", error)
+                results.append(BulkItemResult(
+                    index=start + i, status="error", error=f"Chave duplicada: {key_value}", error_code=error.code,
+                ))
+            elif getattr(error, "code", None) is not None:
+                results.append(BulkItemResult(index=start + i, status="error", error=str(error), error_code=error.code))
+            else:
+                results.append(BulkItemResult(
+                    index=start + i, status="error", error="Falha ao inserir o lote no banco de dados.",
+                ))
+
+    return results
+
 # --- 2. FUNÇÃO: READ by ID ---
-async def get_order_by_id(order_id: str) -> Optional[OrderDB]:
+async def get_order_json(
+    order_id: str,
+    fields: Optional[Sequence[str]] = None,
+) -> Optional[Tuple[bytes, Optional[int]]]:
     """
-    Busca um pedido no MongoDB pelo seu ID (chave primária).
+    Busca um pedido pelo seu ID e retorna o JSON de saída (formato OrderDB) já codificado,
+    junto da versão do pedido (para o ETag).
+
+    Caminho confiável: o documento armazenado é serializado sem revalidação Pydantic,
+    e o resultado é o mesmo valor guardado no cache de leitura.
+
+    Com `fields` (ver `parse_order_fields`), apenas esses campos são lidos do backend e
+    retornados, e a versão só é retornada se estiver entre eles; respostas parciais não
+    são guardadas no cache.
     """
-    db = get_database()
-    if not db:
+    storage = get_storage()
+    if not storage.is_available():
         return None
 
     try:
         # Converte a string de ID para o formato ObjectId do MongoDB
         object_id = ObjectId(order_id) 
-        collection = db[COLLECTION_NAME]
-        
-        order_doc = await collection.find_one({"_id": object_id})
+        cache_key = str(object_id)
+
+        cached_order = await order_cache.get(cache_key)
+        if cached_order is not None:
+            order_json, version = _unpack_cached_order(cached_order)
+            if fields is None:
+                return order_json, version
+            cached_dict = orjson.loads(order_json)
+            partial_json = orjson.dumps({field: cached_dict[field] for field in fields})
+            return partial_json, version if "version" in fields else None
 
-        if order_doc:
-            # Mapeamento de Retorno
-            order_doc["id"] = str(order_doc.pop("_id")) 
-            return OrderDB(**order_doc)
+        async def load_order_json() -> Optional[Tuple[bytes, Optional[int]]]:
+            fill_token = order_cache_fills.begin(cache_key)
+            try:
+                order_doc = await storage.find_by_id(object_id, fields=_storage_fields(fields))
+                if not order_doc:
+                    # Fallback para a camada fria (pedidos finalizados arquivados)
+                    archive = order_archiver.archive_for_reads()
+                    if archive is not None:
+                        order_doc = await archive.find_by_id(object_id, fields=_storage_fields(fields))
+                if not order_doc:
+                    return None
+
+                order_dict = serialize_order_doc(order_doc, fields)
+                order_json, version = orjson.dumps(order_dict), order_dict.get("version")
+                # Um PATCH/DELETE concluído durante a leitura invalidou o pedido: não grava o valor lido
+                if fields is None and order_cache_fills.is_current(cache_key, fill_token):
+                    await order_cache.set(cache_key, _pack_cached_order(order_json, version))
+                return order_json, version
+            finally:
+                order_cache_fills.end(cache_key)
+
+        # Requisições concorrentes pelo mesmo ID (e mesmos campos) compartilham um único find_one
+        flight_key = ("order", cache_key) if fields is None else ("order", cache_key, tuple(fields))
+        return await order_flights.do(flight_key, load_order_json)
             
+    except ExecutionTimeout:
+        raise # Prazo da requisição esgotado (maxTimeMS): vira 503, não "não encontrado"
     except Exception as e:
-        print(f"❌ ERRO ao buscar pedido por ID {order_id}: {e}")
+        logger.error("Erro ao buscar pedido por ID: %s", e, extra={"order_id": order_id})
         return None
-    
-    return None
+
+
+async def get_order_version(order_id: str) -> Optional[int]:
+    """
+    Versão atual de um pedido, lida com projeção (apenas '_id' e 'version'): valida o
+    If-None-Match sem decodificar o documento inteiro. Recorre ao arquivo como a leitura.
+
+    :return: None se o pedido não existir (ou o ID for inválido).
+    """
+    storage = get_storage()
+    if not storage.is_available() or not ObjectId.is_valid(order_id):
+        return None
+
+    object_id = ObjectId(order_id)
+
+    async def load_version() -> Optional[int]:
+        for tier in (storage, order_archiver.archive_for_reads()):
+            if tier is not None:
+                order_doc = await tier.find_by_id(object_id, fields=("version",))
+                if order_doc is not None:
+                    return order_doc.get("version", 1)
+        return None
+
+    try:
+        return await order_flights.do(("version", str(object_id)), load_version)
+    except ExecutionTimeout:
+        raise
+    except Exception as e:
+        logger.error("Erro ao buscar a versão do pedido: %s", e, extra={"order_id": order_id})
+        return None
+
+
+async def get_order_by_id(
+    order_id: str,
+    fields: Optional[Sequence[str]] = None,
+) -> Optional[Union[OrderDB, OrderPartial]]:
+    """
+    Busca um pedido pelo seu ID (chave primária).
+
+    Com `fields`, retorna um OrderPartial contendo apenas esses campos.
+    """
+    found = await get_order_json(order_id, fields)
+    if found is None:
+        return None
+    order_json, _ = found
+    if fields is not None:
+        return OrderPartial.model_validate_json(order_json)
+    return OrderDB.model_validate_json(order_json)
+
+# --- 2.1 FUNÇÃO: READ em Lote (batch-get) ---
+async def get_orders_batch(
+    order_ids: Sequence[str],
+    fields: Optional[Sequence[str]] = None,
+    chunk_size: int = BATCH_GET_CHUNK_SIZE,
+) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+    """
+    Busca vários pedidos por ID com consultas `$in` de até `chunk_size` IDs.
+
+    Pedidos completos já presentes no cache de leitura não são consultados; os lidos
+    do backend entram no cache (exceto leituras parciais, com `fields`).
+
+    :return: (pedidos serializados na ordem pedida, IDs não encontrados, IDs inválidos).
+             IDs repetidos são considerados uma única vez.
+    """
+    found: Dict[str, Dict[str, Any]] = {}
+    invalid: List[str] = []
+    pending: List[ObjectId] = []
+
+    # Chave normalizada (hex minúsculo, como o '_id' serializado) -> ID como foi pedido
+    requested: Dict[str, str] = {}
+    for order_id in order_ids:
+        if not ObjectId.is_valid(order_id):
+            if order_id not in invalid:
+                invalid.append(order_id)
+            continue
+        object_id = ObjectId(order_id)
+        key = str(object_id)
+        if key in requested:
+            continue
+        requested[key] = order_id
+
+        cached_order = await order_cache.get(key)
+        if cached_order is None:
+            pending.append(object_id)
+            continue
+        cached_dict = orjson.loads(_unpack_cached_order(cached_order)[0])
+        found[key] = cached_dict if fields is None else {field: cached_dict[field] for field in fields}
+
+    # Tokens emitidos antes das consultas: invalidações durante a leitura impedem o `set`
+    fill_tokens = {str(object_id): order_cache_fills.begin(str(object_id)) for object_id in pending}
+    try:
+        # Camada quente primeiro; os IDs não encontrados são buscados no arquivo
+        for storage in (get_storage(), order_archiver.archive_for_reads()):
+            pending = [object_id for object_id in pending if str(object_id) not in found]
+            if not pending or storage is None or not storage.is_available():
+                continue
+            for start in range(0, len(pending), chunk_size):
+                chunk = pending[start:start + chunk_size]
+                for order_doc in await storage.find_many(chunk, fields=_storage_fields(fields)):
+                    key = str(order_doc["_id"])
+                    found[key] = serialize_order_doc(order_doc, fields)
+                    if fields is None and order_cache_fills.is_current(key, fill_tokens[key]):
+                        await order_cache.set(key, _pack_cached_order(orjson.dumps(found[key]), found[key]["version"]))
+    except ExecutionTimeout:
+        raise
+    except Exception as e:
+        logger.error("Erro ao buscar pedidos em lote: %s", e)
+    finally:
+        for key in fill_tokens:
+            order_cache_fills.end(key)
+
+    orders = [found[key] for key in requested if key in found]
+    missing = [order_id for key, order_id in requested.items() if key not in found]
+    return orders, missing, invalid
 
 # --- 3. FUNÇÃO: READ all (Listagem com Paginação) ---
-async def list_orders(skip: int = 0, limit: int = 10) -> List[OrderDB]:
+async def list_orders_json(
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[Sequence[str]] = None,
+    product_id: Optional[int] = None,
+) -> Tuple[bytes, Optional[str], str]:
     """
-    Busca uma lista de pedidos no MongoDB com suporte a paginação (skip, limit).
+    Busca uma página de pedidos e retorna o array JSON de saída já codificado,
+    junto com o cursor da próxima página (None se esta for a última) e o ETag da
+    página (ver `page_etag`).
+
+    Quando `cursor` é informado, a paginação é feita por keyset sobre (created_at, _id)
+    e `skip` é ignorado: cada página é uma varredura limitada do índice.
+
+    Com `fields` (ver `parse_order_fields`), o backend lê apenas esses campos.
+
+    :raises ValueError: Se o cursor estiver malformado.
     """
-    db = get_database()
-    if not db:
-        return []
+    after = decode_cursor(cursor) if cursor else None
+
+    storage = get_storage()
+    if not storage.is_available():
+        return b"[]", None, page_etag([], fields)
 
     try:
-        collection = db[COLLECTION_NAME]
-        
-        cursor = collection.find({})
-        cursor.sort("created_at", DESCENDING) # Ordena pelo mais recente
-        cursor = cursor.skip(skip).limit(limit) # Aplica Paginação
-        
-        orders_list = await cursor.to_list(length=limit)
-        
-        mapped_orders: List[OrderDB] = []
-        for order_doc in orders_list:
-            # Mapeamento: MongoDB '_id' (ObjectId) para Pydantic 'id' (str)
-            order_doc["id"] = str(order_doc.pop("_id"))
-            mapped_orders.append(OrderDB(**order_doc))
-            
-        return mapped_orders
+        query = OrderQuery(
+            customer_id=customer_id,
+            status=status,
+            created_from=created_from,
+            created_to=created_to,
+            product_id=product_id,
+        )
+        # A versão é lida mesmo quando não pedida em `fields`: compõe o ETag da página
+        storage_fields = _storage_fields(fields)
+        if storage_fields is not None and "version" not in storage_fields:
+            storage_fields += ("version",)
+
+        async def load_page() -> Tuple[bytes, Optional[str], str]:
+            orders_list = await _find_page_tiered(
+                storage, query, limit, skip=0 if after else skip, after=after, fields=storage_fields,
+            )
+
+            next_cursor = None
+            if len(orders_list) == limit:
+                last = orders_list[-1]
+                next_cursor = encode_cursor(last["created_at"], last["_id"])
+
+            orders_json = orjson.dumps([serialize_order_doc(order_doc, fields) for order_doc in orders_list])
+            return orders_json, next_cursor, page_etag(orders_list, fields)
+
+        # Listagens concorrentes com parâmetros idênticos compartilham a mesma consulta
+        flight_key = ("list", skip, limit, after, query, tuple(fields) if fields is not None else None)
+        return await order_flights.do(flight_key, load_page)
             
+    except ExecutionTimeout:
+        raise
+    except Exception as e:
+        logger.error("Erro ao listar pedidos: %s", e)
+        return b"[]", None, page_etag([], fields)
+
+
+async def get_orders_page_etag(
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[Sequence[str]] = None,
+    product_id: Optional[int] = None,
+) -> Optional[str]:
+    """
+    ETag da página que `list_orders_json` retornaria com os mesmos parâmetros, lendo
+    apenas (_id, created_at, version) de cada pedido: valida o If-None-Match sem
+    decodificar os documentos inteiros.
+
+    :return: None se a página não puder ser lida (a requisição segue o caminho normal).
+    :raises ValueError: Se o cursor estiver malformado.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    storage = get_storage()
+    if not storage.is_available():
+        return None
+
+    query = OrderQuery(
+        customer_id=customer_id,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+        product_id=product_id,
+    )
+    try:
+        versions = await _find_page_tiered(
+            storage, query, limit, skip=0 if after else skip, after=after, fields=("version",),
+        )
+        return page_etag(versions, fields)
+    except ExecutionTimeout:
+        raise
     except Exception as e:
-        print(f"❌ ERRO ao listar pedidos: {e}")
+        logger.error("Erro ao calcular o ETag da listagem: %s", e)
+        return None
+
+
+# --- 3.1 FUNÇÃO: Resumo por Produto ---
+async def summarize_products(
+    product_ids: Optional[Sequence[int]] = None,
+    customer_id: Optional[int] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """
+    Quantidade vendida, receita e número de pedidos por produto, calculados no backend
+    (no MongoDB, `$unwind`/`$group` sobre os pedidos filtrados), em ordem decrescente de receita.
+    """
+    storage = get_storage()
+    if not storage.is_available():
         return []
 
+    query = OrderQuery(
+        customer_id=customer_id,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    try:
+        return await storage.summarize_products(query, product_ids, limit)
+    except ExecutionTimeout:
+        raise
+    except Exception as e:
+        logger.error("Erro ao resumir pedidos por produto: %s", e)
+        return []
+
+# --- 3.1 FUNÇÃO: EXPORT (Streaming via Cursor Assíncrono) ---
+async def iter_order_batches(
+    batch_size: int = 1000,
+    customer_id: Optional[int] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    product_id: Optional[int] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Percorre os pedidos filtrados com um único cursor do backend (mais um no arquivo, se
+    o filtro alcançar pedidos arquivados), entregando lotes de até `batch_size`
+    documentos já serializados (ver `serialize_order_doc`).
+
+    A memória usada é proporcional a `batch_size`, independente do total exportado.
+    """
+    storage = get_storage()
+    if not storage.is_available():
+        return
+
+    query = OrderQuery(
+        customer_id=customer_id,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+        product_id=product_id,
+    )
+
+    batch: List[Dict[str, Any]] = []
+    async for order_doc in _iter_orders_tiered(storage, query, batch_size):
+        batch.append(serialize_order_doc(order_doc))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 # --- 4. FUNÇÃO: UPDATE (Parcial) ---
 async def update_order(order_id: str, order_data: OrderUpdate) -> Optional[OrderDB]:
     """
-    Atualiza parcialmente um pedido no MongoDB, recalculando o total_value se 'items' mudar.
+    Atualiza parcialmente um pedido, recalculando o total_value se 'items' mudar.
+
+    A leitura, o recálculo e a escrita acontecem em uma única operação atômica do backend
+    (no MongoDB, um `find_one_and_update`), evitando condições de corrida entre PATCHes concorrentes.
     """
-    db = get_database()
-    if not db:
+    storage = get_storage()
+    if not storage.is_available():
         return None
 
     try:
         object_id = ObjectId(order_id)
-        collection = db[COLLECTION_NAME]
         
         # Obtém apenas os campos que não são None para atualização parcial (PATCH)
         update_dict: Dict[str, Any] = order_data.model_dump(exclude_none=True, by_alias=True)
@@ -132,67 +869,183 @@ async def update_order(order_id: str, order_data: OrderUpdate) -> Optional[Order
         if not update_dict:
             return await get_order_by_id(order_id)
 
-        # Lógica de Recálculo Condicional
-        if "items" in update_dict:
-            current_order_doc = await collection.find_one({"_id": object_id})
-            if not current_order_doc:
-                return None
-            
-            # Revalida os dados, permitindo que o Pydantic recalcule 'total_value'
-            data_to_revalidate = {
-                **current_order_doc, 
-                **update_dict,
-                "id": str(current_order_doc["_id"])
-            }
-            validated_order = OrderDB(**data_to_revalidate)
-            
-            # Adiciona o novo valor total calculado ao dicionário de atualização
-            update_dict["total_value"] = validated_order.total_value
-
-        # Executa a Atualização Parcial com $set
-        result: UpdateResult = await collection.update_one(
-            {"_id": object_id},
-            {"$set": update_dict}
-        )
+        updated = await storage.update(object_id, update_dict)
+        if not updated:
+            # Pedido arquivado: atualizado na própria camada fria
+            archive = order_archiver.archive_for_reads()
+            if archive is not None:
+                updated = await archive.update(object_id, update_dict)
+        await invalidate_cached_order(object_id)
 
-        if result.matched_count == 0:
+        if not updated:
             return None # Pedido não encontrado
-        
-        # Retorna o documento atualizado
-        return await get_order_by_id(order_id)
+
+        previous_doc, updated_doc = updated
+        # Rollups recebem apenas o delta (ex.: receita nova - antiga, ou troca de status)
+        await record_order_changes(before=[previous_doc], after=[updated_doc])
+
+        updated_doc["id"] = str(updated_doc.pop("_id"))
+        return OrderDB(**updated_doc)
 
     except Exception as e:
-        print(f"❌ ERRO ao atualizar pedido {order_id}: {e}")
+        logger.error("Erro ao atualizar pedido: %s", e, extra={"order_id": order_id})
         return None
     
+# --- 4.1 FUNÇÃO: Transição de Status em Lote ---
+async def _apply_status_transitions(storage: OrderStorage, transitions: Sequence[StatusTransition]) -> int:
+    """
+    Aplica as transições (um único bulk_write) e mantém os rollups e o cache apenas para
+    os pedidos de fato alterados (documentos lidos antes, na versão atualizada).
+
+    :return: Quantidade de pedidos alterados.
+    """
+    updated = await storage.set_status_many(transitions)
+    await record_order_changes(
+        before=[previous_doc for previous_doc, _ in updated],
+        after=[updated_doc for _, updated_doc in updated],
+    )
+    for previous_doc, _ in updated:
+        await invalidate_cached_order(previous_doc["_id"])
+    return len(updated)
+
+
+async def transition_orders_status(
+    transitions: Sequence[Tuple[str, str]],
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> StatusTransitionResponse:
+    """
+    Aplica pares (id, novo status) por chunk, cada um como uma atualização condicional.
+
+    Cada chunk é lido antes (uma consulta `$in` projetada em `TRANSITION_FIELDS`) e
+    aplicado em um único bulk_write não ordenado; cada transição só é aplicada se o
+    pedido ainda estiver na versão lida. Para o mesmo ID repetido, vale o último par.
+    Pedidos arquivados são alterados na própria camada fria.
+    """
+    response = StatusTransitionResponse(matched_count=0, modified_count=0)
+    storage = get_storage()
+    if not storage.is_available():
+        return response
+
+    targets: Dict[ObjectId, str] = {}
+    requested: Dict[ObjectId, str] = {}
+    for order_id, new_status in transitions:
+        if not ObjectId.is_valid(order_id):
+            if order_id not in response.invalid:
+                response.invalid.append(order_id)
+            continue
+        object_id = ObjectId(order_id)
+        targets[object_id] = new_status
+        requested.setdefault(object_id, order_id)
+
+    object_ids = list(targets)
+    for start in range(0, len(object_ids), chunk_size):
+        chunk = object_ids[start:start + chunk_size]
+        try:
+            # Camada quente primeiro; os IDs não encontrados são buscados no arquivo, como no GET
+            pending = chunk
+            for tier in (storage, order_archiver.archive_for_reads()):
+                if tier is None or not pending:
+                    continue
+                current_docs = await tier.find_many(pending, fields=TRANSITION_FIELDS)
+                found = {order_doc["_id"] for order_doc in current_docs}
+                pending = [object_id for object_id in pending if object_id not in found]
+                response.matched_count += len(found)
+
+                response.modified_count += await _apply_status_transitions(tier, [
+                    (order_doc, targets[order_doc["_id"]])
+                    for order_doc in current_docs
+                    if order_doc.get("status") != targets[order_doc["_id"]]
+                ])
+            response.missing.extend(requested[object_id] for object_id in pending)
+        except Exception as e:
+            logger.error("Erro ao aplicar transições de status em lote: %s", e)
+
+    return response
+
+
+async def transition_orders_status_where(
+    query: OrderQuery,
+    new_status: str,
+    chunk_size: int = BULK_CHUNK_SIZE,
+) -> StatusTransitionResponse:
+    """
+    Move todos os pedidos filtrados por `query` (que deve ter `status`) para `new_status`.
+
+    Os pedidos são percorridos por keyset em páginas de `chunk_size` (índice de status,
+    apenas os IDs); cada página é movida com um único `update_many` (mesmo filtro,
+    restrito aos IDs da página), precedido de um `$group` que soma a receita movida
+    para os rollups de status (dia e cliente não mudam).
+
+    :raises ValueError: Se o filtro não tiver o status atual.
+    """
+    if query.status is None:
+        raise ValueError("O filtro da transição de status deve informar o status atual.")
+
+    response = StatusTransitionResponse(matched_count=0, modified_count=0)
+    storage = get_storage()
+    if not storage.is_available():
+        return response
+
+    after: Optional[SortKey] = None
+    try:
+        while True:
+            page = await storage.find_page(query, chunk_size, after=after, fields=())
+            response.matched_count += len(page)
+            if query.status != new_status and page:
+                object_ids = [order_doc["_id"] for order_doc in page]
+                modified_count, revenue = await storage.set_status_where(query, new_status, object_ids)
+                response.modified_count += modified_count
+                await record_status_move(query.status, new_status, modified_count, revenue)
+                for object_id in object_ids:
+                    await invalidate_cached_order(object_id)
+            if len(page) < chunk_size:
+                break
+            # A chave (created_at, _id) não muda com o status: os pedidos alterados saem do
+            # filtro sem deslocar a varredura
+            after = (page[-1]["created_at"], page[-1]["_id"])
+    except Exception as e:
+        logger.error("Erro ao aplicar transição de status por filtro: %s", e)
+    return response
+
 # --- 5. FUNÇÃO: DELETE ---
 
 async def delete_order(order_id: str) -> bool:
     """
-    Exclui um pedido do MongoDB pelo seu ID.
+    Exclui um pedido pelo seu ID.
 
     :param order_id: O ID do pedido a ser excluído.
-    :return: True se o pedido foi excluído com sucesso (matched_count > 0), False caso contrário.
+    :return: True se o pedido foi excluído com sucesso, False caso contrário.
     """
-    db = get_database()
-    if not db:
+    storage = get_storage()
+    if not storage.is_available():
         return False
 
     try:
         # 1. Converte a string de ID para o formato ObjectId
         object_id = ObjectId(order_id)
-        collection = db[COLLECTION_NAME]
         
         # 2. Executa a exclusão assíncrona
-        result: DeleteResult = await collection.delete_one(
-            {"_id": object_id}
-        )
+        deleted_doc = await storage.delete(object_id)
+        if deleted_doc is not None and _naive_utc(deleted_doc["created_at"]) < order_archiver.horizon():
+            # Pedido elegível ao arquivamento: um lote em andamento (deste ou de outro
+            # worker) pode já tê-lo copiado, e a cópia não pode sobreviver à exclusão
+            archive = get_archive_storage()
+            if archive.is_available():
+                await archive.delete(object_id)
+        elif deleted_doc is None:
+            # Pedido já arquivado: excluído da própria camada fria
+            archive = order_archiver.archive_for_reads()
+            if archive is not None:
+                deleted_doc = await archive.delete(object_id)
+        await invalidate_cached_order(object_id)
 
         # 3. Verifica o resultado
-        # Se acknowledged for True e deleted_count for 1, a exclusão ocorreu.
-        return result.acknowledged and result.deleted_count > 0
+        if deleted_doc is None:
+            return False
+        await record_order_changes(before=[deleted_doc])
+        return True
 
     except Exception as e:
         # Captura erros de conversão (ObjectId inválido) ou de DB
-        print(f"❌ ERRO ao excluir pedido {order_id}: {e}")
+        logger.error("Erro ao excluir pedido: %s", e, extra={"order_id": order_id})
         return False
\ No newline at end of file
@@ -0,0 +1,211 @@
+import copy
+import logging
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Logger raiz da aplicação: os módulos usam logging.getLogger(__name__) ("src.*")
+APP_LOGGER_NAME = "src"
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Capacidade da fila entre o event loop e a thread de escrita; registros além dela são descartados
+LOG_QUEUE_SIZE = 10_000
+
+# ID da requisição em andamento (definido por RequestIdMiddleware, incluído em cada registro)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Atributos padrão de LogRecord: os demais (passados via `extra=`) viram campos do JSON
+_RESERVED_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "suppressed"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON (executado na thread de escrita)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+
+JsonFormatter.converter = time.gmtime
+
+
+class RequestIdFilter(logging.Filter):
+    """Copia o ID da requisição atual para o registro, ainda na task que o emitiu."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita registros repetidos: no máximo `max_per_window` por (logger, nível, mensagem-modelo)
+    a cada `window_seconds`. O primeiro registro aceito após uma janela com descartes
+    informa quantos foram suprimidos (campo `suppressed`).
+
+    A chave usa o modelo da mensagem (`record.msg`, antes da interpolação): logue com
+    argumentos (`logger.error("... %s", e)`) para que erros iguais sejam agrupados.
+    """
+
+    def __init__(self, max_per_window: int = 10, window_seconds: float = 60.0):
+        super().__init__()
+        self.max_per_window = max_per_window
+        self.window_seconds = window_seconds
+        self._windows: Dict[Tuple[str, int, Any], list] = {}
+        self._lock = threading.Lock()
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.max_per_window <= 0:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            # [início da janela, aceitos na janela, suprimidos desde o último aceito]
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_seconds:
+                suppressed = window[2] if window is not None else 0
+                window = self._windows[key] = [now, 0, suppressed]
+            if window[1] >= self.max_per_window:
+                window[2] += 1
+                self.suppressed_total += 1
+                return False
+            window[1] += 1
+            record.suppressed, window[2] = window[2], 0
+            if len(self._windows) > 10_000: # Evita crescimento sem limite com mensagens não parametrizadas
+                self._windows = {k: w for k, w in self._windows.items() if now - w[0] < self.window_seconds}
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que nunca bloqueia o chamador: com a fila cheia, descarta e conta o registro."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só interpola a mensagem (os argumentos podem mudar depois); o traceback e o
+        # JSON são formatados na thread de escrita, fora do event loop
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[DroppingQueueHandler] = None
+_rate_limit: Optional[RateLimitFilter] = None
+
+
+def configure_logging(
+    level: str = "INFO",
+    max_per_window: int = 10,
+    window_seconds: float = 60.0,
+) -> None:
+    """
+    Envia os logs da aplicação para uma fila, escrita em JSON no stdout por uma thread
+    separada: o event loop só paga pelo enfileiramento. Idempotente.
+    """
+    global _listener, _queue_handler, _rate_limit
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _rate_limit = RateLimitFilter(max_per_window, window_seconds)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    # Filtros no handler da fila rodam na task que emite o registro (contexto da requisição)
+    _queue_handler.addFilter(_rate_limit)
+    _queue_handler.addFilter(RequestIdFilter())
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    app_logger.setLevel(level.upper())
+    app_logger.addHandler(_queue_handler)
+    app_logger.propagate = False
+
+
+def shutdown_logging() -> None:
+    """Escreve os registros pendentes e encerra a thread de escrita."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger(APP_LOGGER_NAME).removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+
+
+def get_logging_stats() -> Dict[str, int]:
+    """Registros descartados por fila cheia e suprimidos pelo limite de repetição."""
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        "dropped": _queue_handler.dropped if _queue_handler is not None else 0,
+        "suppressed": _rate_limit.suppressed_total if _rate_limit is not None else 0,
+    }
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI que define o ID da requisição (header `X-Request-ID` recebido ou um
+    novo UUID), disponível nos logs via `request_id_var` e devolvido na resposta.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
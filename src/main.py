@@ -1,9 +1,29 @@
 from fastapi import FastAPI, Request, status, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
-from .config.db import connect_to_mongo, close_mongo_connection, get_database
+from .config.db import connect_to_mongo, close_mongo_connection, check_readiness
+from .config.settings import get_settings
+from .config.storage import configure_storage
 from .routers.orders import router as orders_router
-from pymongo.errors import DuplicateKeyError # Importado para o Exception Handler
+from .routers.admin import router as admin_router
+from .routers.analytics import router as analytics_router
+from .crud.orders import (
+    get_order_cache_stats,
+    order_flights,
+    configure_order_write_batching,
+    flush_order_writes,
+    get_order_write_batching_stats,
+    invalidate_from_change,
+)
+from .changefeed import archive_change_feed, order_change_feed
+from .archival import order_archiver
+from .security import get_token_cache_stats
+from .metrics import MetricsMiddleware, Gauge, registry
+from .log import RequestIdMiddleware, configure_logging, get_logging_stats, shutdown_logging
+from .admission import AdmissionMiddleware, configure_admission, get_admission_stats
+from .compression import CompressionMiddleware
+from .profiling import ProfilingMiddleware, configure_profiling, get_request_profiler
+from pymongo.errors import DuplicateKeyError, ExecutionTimeout # Importados para os Exception Handlers
 
 # 1. Instância do FastAPI
 app = FastAPI(
@@ -12,26 +32,112 @@ app = FastAPI(
     version="1.0.0",
 )
 
-# 2. Configuração do Middleware CORS
+# 2. Middlewares
+settings = get_settings()
+
+# Perfil sob demanda: o middleware mais interno, para que o perfil cubra o roteamento, a
+# validação, o handler e a serialização, sem a espera na fila de admissão
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profiler=configure_profiling(
+            settings.profiling_dir,
+            settings.profiling_max_artifacts,
+            settings.profiling_sample_rate,
+            settings.profiling_backend,
+            settings.profiling_token,
+        ),
+    )
+
+# Controle de admissão (limites separados de leitura, escrita e exportação): o excesso
+# recebe 503 com Retry-After em vez de esperar na fila do pool do MongoDB.
+# Adicionado antes do CORS para que as respostas 503 também levem os headers de CORS.
+if settings.admission_control:
+    app.add_middleware(
+        AdmissionMiddleware,
+        limiters=configure_admission(
+            {
+                "read": settings.admission_read_limit,
+                "write": settings.admission_write_limit,
+                "export": settings.admission_export_limit,
+            },
+            max_queue=settings.admission_queue_limit,
+        ),
+        max_wait_ms=settings.admission_max_wait_ms,
+        retry_after_seconds=settings.admission_retry_after_seconds,
+        default_timeout_ms=settings.request_timeout_ms,
+    )
+
+# Compressão (brotli/gzip) das respostas maiores que o tamanho mínimo, inclusive exportações
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
+# Configuração do Middleware CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Request-ID", "Retry-After", "ETag", "X-Profile-Id"],
 )
 
+# Métricas por rota (latência, requisições em andamento, tamanho da resposta), expostas em /metrics
+app.add_middleware(MetricsMiddleware)
+
+# ID de cada requisição (header X-Request-ID), incluído nos logs estruturados
+app.add_middleware(RequestIdMiddleware)
+
 # 3. Event Handlers para a Conexão com o MongoDB
 
 @app.on_event("startup")
 async def startup_db_client():
-    """Conecta ao MongoDB quando a API inicia."""
-    await connect_to_mongo()
+    """Conecta ao MongoDB quando a API inicia (exceto com o backend de armazenamento em memória)."""
+    settings = get_settings()
+    configure_logging(settings.log_level, settings.log_rate_limit, settings.log_rate_window_seconds)
+    backend = settings.storage_backend
+    configure_storage(backend)
+    configure_order_write_batching(
+        settings.order_write_batching,
+        max_batch_size=settings.order_write_batch_size,
+        max_wait_ms=settings.order_write_max_wait_ms,
+    )
+    # O horizonte do arquivamento também orienta as leituras de fallback para a camada fria
+    order_archiver.configure(
+        after_days=settings.archive_after_days,
+        statuses=[value.strip() for value in settings.archive_statuses.split(",") if value.strip()],
+        batch_size=settings.archive_batch_size,
+        interval_seconds=settings.archive_interval_seconds,
+    )
+    if backend == "mongo":
+        await connect_to_mongo()
+        if settings.change_stream_invalidation:
+            # Alterações feitas por outros workers também invalidam o cache deste processo
+            order_change_feed.add_listener(invalidate_from_change)
+            order_change_feed.start()
+    # Sem arquivamento ativo e com o arquivo vazio, as leituras não consultam a camada fria
+    await order_archiver.configure_reads(settings.archive_enabled)
+    if backend == "mongo" and settings.change_stream_invalidation and order_archiver.reads_archive:
+        # PATCH/DELETE de pedidos arquivados, feitos por outros workers, alteram só o arquivo
+        archive_change_feed.add_listener(invalidate_from_change)
+        archive_change_feed.start()
+    if settings.archive_enabled:
+        order_archiver.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Fecha a conexão do MongoDB quando a API é encerrada."""
+    await flush_order_writes()
+    await order_change_feed.stop()
+    await archive_change_feed.stop()
+    await order_archiver.stop()
     await close_mongo_connection()
+    shutdown_logging()
 
 # --- Handler de Exceção Global para MongoDB ---
 @app.exception_handler(DuplicateKeyError)
@@ -48,21 +154,91 @@ async def duplicate_key_exception_handler(request: Request, exc: DuplicateKeyErr
         content={"detail": detail_message},
     )
 
+@app.exception_handler(ExecutionTimeout)
+async def execution_timeout_exception_handler(request: Request, exc: ExecutionTimeout):
+    """
+    Consulta interrompida pelo MongoDB ao esgotar o prazo da requisição (maxTimeMS):
+    503 com Retry-After, como as requisições recusadas pelo controle de admissão.
+    """
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Prazo da requisição esgotado antes da resposta do banco de dados."},
+        headers={"Retry-After": str(get_settings().admission_retry_after_seconds)},
+    )
+
 # 4. Inclusão dos Roteadores
-# Inclui as rotas definidas em src/routers/orders.py
+# Inclui as rotas definidas em src/routers/ (pedidos, administração e analytics)
 app.include_router(orders_router)
+app.include_router(admin_router)
+app.include_router(analytics_router)
 
 # 5. Rota de Teste (Health Check)
 @app.get("/", tags=["Health Check"])
-def health_check():
-    """Endpoint simples para verificar se a API está online e o status do DB."""
-    db = get_database()
-    # Checagem correta para o driver Motor
-    db_status = "Conectado" if db is not None else "Desconectado" 
+async def health_check():
+    """
+    Checagem de prontidão: 'ping' no MongoDB com tempo limite e saturação do pool de conexões.
+
+    Retorna 503 quando o banco não responde, para que o balanceador retire a instância.
+    """
+    storage_backend = get_settings().storage_backend
+    if storage_backend == "mongo":
+        readiness = await check_readiness()
+    else:
+        readiness = {"ready": True, "storage_backend": storage_backend}
+    db_status = "Conectado" if readiness["ready"] else "Desconectado"
+    profiler = get_request_profiler()
     
-    return {
-        "message": "API CRUD está online!",
-        "database_status": db_status
-    }
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if readiness["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "message": "API CRUD está online!",
+            "database_status": db_status,
+            "readiness": readiness,
+            "order_cache": get_order_cache_stats().as_dict(),
+            "single_flight": order_flights.stats(),
+            "write_batching": get_order_write_batching_stats(),
+            "token_cache": get_token_cache_stats().as_dict(),
+            "change_feed": order_change_feed.stats(),
+            "archive_change_feed": archive_change_feed.stats(),
+            "admission": get_admission_stats(),
+            "archive": order_archiver.stats(),
+            "profiling": profiler.stats() if profiler is not None else None,
+        },
+    )
+
+# 6. Métricas (formato de texto do Prometheus)
+cache_stats_gauge = registry.register(Gauge(
+    "app_cache_stat", "Contadores dos caches em processo.", ("cache", "stat"),
+))
+single_flight_gauge = registry.register(Gauge(
+    "app_single_flight_stat", "Contadores da coalescência de leituras de pedidos.", ("stat",),
+))
+write_batching_gauge = registry.register(Gauge(
+    "app_write_batching_stat", "Contadores do agrupamento de POSTs em insert_many (group commit).", ("stat",),
+))
+logging_gauge = registry.register(Gauge(
+    "app_log_records", "Registros de log na fila, descartados (fila cheia) e suprimidos (repetidos).", ("stat",),
+))
+
+
+def collect_app_stats():
+    """Copia os contadores de cache, single-flight, escritas em lote e logs para o registro de métricas."""
+    for cache_name, stats in (("orders", get_order_cache_stats()), ("tokens", get_token_cache_stats())):
+        for stat, value in stats.as_dict().items():
+            cache_stats_gauge.set(cache_name, stat, value=value)
+    for stat, value in order_flights.stats().items():
+        single_flight_gauge.set(stat, value=value)
+    for stat, value in (get_order_write_batching_stats() or {}).items():
+        write_batching_gauge.set(stat, value=value)
+    for stat, value in get_logging_stats().items():
+        logging_gauge.set(stat, value=value)
+
+registry.add_collector(collect_app_stats)
+
+
+@app.get("/metrics", tags=["Health Check"], response_class=PlainTextResponse)
+def metrics():
+    """Métricas de latência HTTP, comandos do MongoDB, pool de conexões e caches."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # Para rodar a aplicação: uvicorn src.main:app --reload
\ No newline at end of file
@@ -0,0 +1,324 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Buckets (em segundos) para latências de requisições HTTP e de comandos do MongoDB
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Buckets (em bytes) para tamanho das respostas
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+# --- 1. Tipos de Métrica (formato de texto do Prometheus) ---
+class Counter:
+    """Contador monotônico com rótulos."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {value}")
+        return lines
+
+
+class Gauge:
+    """Valor instantâneo com rótulos (pode subir e descer)."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values: str, value: float) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Histograma cumulativo com rótulos (buckets fixos)."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> (contagem por bucket, com o último sendo +Inf; [soma das observações])
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values: str, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[label_values] = entry
+            counts, total = entry
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, values, ("le", repr(float(bound))))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += counts[-1]
+            labels = _format_labels(self.label_names, values, ("le", "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, values)} {total[0]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Conjunto de métricas expostas em `/metrics`.
+
+    `collectors` são chamados a cada coleta para atualizar métricas derivadas
+    (ex.: contadores de cache mantidos por outros módulos).
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# --- 2. Métricas HTTP ---
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota.", ("method", "route", "status"),
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento por rota.", ("method", "route"),
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Tamanho do corpo das respostas HTTP por rota.", ("method", "route"), SIZE_BUCKETS,
+))
+
+# --- 3. Métricas do MongoDB ---
+mongo_command_duration = registry.register(Histogram(
+    "mongo_command_duration_seconds", "Duração dos comandos do MongoDB.", ("collection", "command", "outcome"),
+))
+mongo_pool_checkout_wait = registry.register(Histogram(
+    "mongo_pool_checkout_wait_seconds", "Espera para obter uma conexão do pool do MongoDB.", ("outcome",),
+))
+mongo_pool_connections = registry.register(Gauge(
+    "mongo_pool_connections", "Conexões do pool do MongoDB por estado (total, checked_out, waiting).", ("state",),
+))
+
+
+# --- 4. Middleware ASGI de Métricas HTTP ---
+class MetricsMiddleware:
+    """
+    Mede latência, requisições em andamento e tamanho da resposta por rota.
+
+    A rota é identificada pelo template (ex.: `/orders/{orderId}`), evitando
+    cardinalidade ilimitada de rótulos.
+    """
+
+    def __init__(self, app: ASGIApp, excluded_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._resolve_route(scope)
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec(method, route)
+            http_request_duration.observe(method, route, str(status_code), value=elapsed)
+            http_response_size.observe(method, route, value=response_size)
+
+    def _resolve_route(self, scope: Scope) -> str:
+        app = scope.get("app")
+        routes = getattr(getattr(app, "router", None), "routes", ())
+        partial = None
+        for route in routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", scope["path"])
+            if match == Match.PARTIAL and partial is None:
+                partial = getattr(route, "path", None)
+        return partial or "unmatched"
+
+
+# --- 5. Listeners do Driver (pymongo) ---
+class MongoCommandListener(monitoring.CommandListener):
+    """Cronometra cada comando do MongoDB por coleção e operação."""
+
+    def __init__(self):
+        self._commands: Dict[Tuple[int, object], Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else ""
+        with self._lock:
+            self._commands[(event.request_id, event.connection_id)] = (collection, event.command_name)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "failure")
+
+    def _finish(self, event, outcome: str) -> None:
+        with self._lock:
+            collection, command = self._commands.pop((event.request_id, event.connection_id), ("", event.command_name))
+        mongo_command_duration.observe(collection, command, outcome, value=event.duration_micros / 1_000_000)
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    Monitora o pool de conexões do MongoDB: espera no checkout, conexões em uso
+    (checked out), requisições aguardando conexão e total de conexões abertas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.checked_out = 0
+        self.waiting = 0
+
+    def connection_check_out_started(self, event) -> None:
+        self._change(waiting=1)
+
+    def connection_checked_out(self, event) -> None:
+        self._change(waiting=-1, checked_out=1)
+        self._observe_wait(event, "success")
+
+    def connection_check_out_failed(self, event) -> None:
+        self._change(waiting=-1)
+        self._observe_wait(event, "failure")
+
+    def connection_checked_in(self, event) -> None:
+        self._change(checked_out=-1)
+
+    def connection_created(self, event) -> None:
+        self._change(total=1)
+
+    def connection_closed(self, event) -> None:
+        self._change(total=-1)
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, int]:
+        """Retorna o estado atual do pool (somado entre todos os servidores)."""
+        with self._lock:
+            return {"total": self.total, "checked_out": self.checked_out, "waiting": self.waiting}
+
+    def _change(self, total: int = 0, checked_out: int = 0, waiting: int = 0) -> None:
+        with self._lock:
+            self.total += total
+            self.checked_out += checked_out
+            self.waiting += waiting
+            current = {"total": self.total, "checked_out": self.checked_out, "waiting": self.waiting}
+        for state, value in current.items():
+            mongo_pool_connections.set(state, value=value)
+
+    def _observe_wait(self, event, outcome: str) -> None:
+        # 'duration' (segundos) existe nos eventos de checkout a partir do pymongo 4.7
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            mongo_pool_checkout_wait.observe(outcome, value=duration)
+
+
+mongo_command_listener = MongoCommandListener()
+mongo_pool_listener = MongoPoolListener()
@@ -0,0 +1,316 @@
+import asyncio
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+    from pyinstrument.renderers.speedscope import SpeedscopeRenderer
+except ImportError: # Dependência opcional: sem ela, o perfil é determinístico (cProfile)
+    SamplingProfiler = None
+
+logger = logging.getLogger(__name__)
+
+# Pedido explícito de perfil: header `X-Profile: <PROFILING_TOKEN>` (segredo dos operadores,
+# não um JWT de usuário; nunca na query string, que vai para os logs de acesso)
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Rotas nunca perfiladas: métricas, os próprios artefatos e o feed SSE (conexão longa)
+EXCLUDED_PATH_PREFIXES = ("/metrics", "/admin/profiles", "/orders/changes")
+
+# Intervalo de amostragem do perfilador estatístico (pyinstrument)
+SAMPLING_INTERVAL_SECONDS = 0.001
+
+_PROFILE_ID_PATTERN = re.compile(r"^[0-9]{13}-[0-9a-f]{8}$")
+
+
+class CProfileSession:
+    """Perfil determinístico (cProfile), salvo no formato pstats."""
+
+    profiler_name = "cprofile"
+    artifact_format = "pstats"
+    extension = ".pstats"
+    media_type = "application/octet-stream"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def write(self, path: str) -> None:
+        self._profile.dump_stats(path)
+
+
+class SamplingSession:
+    """Perfil por amostragem (pyinstrument, ciente de async), salvo no formato speedscope."""
+
+    profiler_name = "pyinstrument"
+    artifact_format = "speedscope"
+    extension = ".speedscope.json"
+    media_type = "application/json"
+
+    def __init__(self):
+        # async_mode: o tempo em `await` (ex.: Motor) é atribuído à corrotina que aguarda
+        self._profiler = SamplingProfiler(interval=SAMPLING_INTERVAL_SECONDS, async_mode="enabled")
+
+    def start(self) -> None:
+        self._profiler.start()
+
+    def stop(self) -> None:
+        self._profiler.stop()
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as artifact:
+            artifact.write(self._profiler.output(SpeedscopeRenderer()))
+
+
+class ProfileStore:
+    """
+    Artefatos de perfil em disco: um arquivo por requisição perfilada, mais um JSON de
+    metadados. Mantém apenas os `max_artifacts` mais recentes. Por estar em disco, os
+    perfis de todos os workers da máquina ficam disponíveis para download.
+    """
+
+    def __init__(self, directory: str, max_artifacts: int = 100):
+        self.directory = directory
+        self.max_artifacts = max_artifacts
+
+    @staticmethod
+    def new_id() -> str:
+        # Milissegundos à frente: a ordem lexicográfica dos IDs é a ordem de criação
+        return f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+
+    def save(self, profile_id: str, session: Any, metadata: Dict[str, Any]) -> None:
+        """Grava o perfil e seus metadados (bloqueante: chame fora do event loop)."""
+        os.makedirs(self.directory, exist_ok=True)
+        artifact_name = profile_id + session.extension
+        session.write(os.path.join(self.directory, artifact_name))
+        metadata = {**metadata, "id": profile_id, "format": session.artifact_format,
+                    "media_type": session.media_type, "artifact": artifact_name}
+        with open(self._metadata_path(profile_id), "wb") as metadata_file:
+            metadata_file.write(orjson.dumps(metadata))
+        self._prune()
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadados dos perfis guardados, do mais recente ao mais antigo."""
+        profiles = []
+        for profile_id in sorted(self._profile_ids(), reverse=True):
+            metadata = self.get(profile_id)
+            if metadata is not None:
+                profiles.append(metadata)
+        return profiles
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        if not _PROFILE_ID_PATTERN.match(profile_id): # Impede caminhos fora do diretório
+            return None
+        try:
+            with open(self._metadata_path(profile_id), "rb") as metadata_file:
+                return orjson.loads(metadata_file.read())
+        except (OSError, ValueError):
+            return None
+
+    def artifact_path(self, profile_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Caminho do arquivo do perfil e seus metadados, ou None se não existir."""
+        metadata = self.get(profile_id)
+        if metadata is None:
+            return None
+        path = os.path.join(self.directory, metadata["artifact"])
+        return (path, metadata) if os.path.exists(path) else None
+
+    def summary(self, profile_id: str, limit: int = 40) -> Optional[str]:
+        """Funções com maior tempo acumulado (apenas perfis pstats), em texto."""
+        found = self.artifact_path(profile_id)
+        if found is None or found[1]["format"] != CProfileSession.artifact_format:
+            return None
+        output = io.StringIO()
+        pstats.Stats(found[0], stream=output).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return output.getvalue()
+
+    def _metadata_path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, profile_id + ".meta.json")
+
+    def _profile_ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [name[:-len(".meta.json")] for name in names if name.endswith(".meta.json")]
+
+    def _prune(self) -> None:
+        for profile_id in sorted(self._profile_ids())[:-self.max_artifacts or None]:
+            metadata = self.get(profile_id) or {}
+            for name in (metadata.get("artifact"), profile_id + ".meta.json"):
+                if name:
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+
+
+class RequestProfiler:
+    """
+    Configuração e estado do perfil sob demanda do processo: onde guardar os perfis,
+    qual perfilador usar e a porcentagem de requisições sorteadas (`sample_rate`,
+    ajustável em tempo de execução por `/admin/profiles/sampling`). Sem `token`, nenhuma
+    requisição pode pedir perfil e as rotas `/admin/profiles` ficam fechadas.
+    """
+
+    def __init__(self, store: ProfileStore, sample_rate: float = 0.0, backend: str = "auto", token: Optional[str] = None):
+        self.store = store
+        self.sample_rate = sample_rate
+        self.token = token
+        self.session_class = self._select_session(backend)
+        self.active = False
+        self.profiled = 0
+        self.skipped_busy = 0
+        self.unauthorized = 0
+
+    async def trigger(self, scope: Scope) -> Optional[str]:
+        """Motivo do perfil ("request" ou "sample"), ou None se a requisição não deve ser perfilada."""
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER:
+                if self.is_authorized(value.decode("latin-1")):
+                    return "request"
+                self.unauthorized += 1
+                break
+        if self.sample_rate > 0 and random.random() * 100 < self.sample_rate:
+            return "sample"
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "profiler": self.session_class.profiler_name,
+            "sample_rate": self.sample_rate,
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+            "unauthorized": self.unauthorized,
+        }
+
+    def is_authorized(self, token: Optional[str]) -> bool:
+        """Confere o segredo de perfil (comparação em tempo constante)."""
+        if not self.token or not token:
+            return False
+        return hmac.compare_digest(token.strip().encode("utf-8"), self.token.encode("utf-8"))
+
+    @staticmethod
+    def _select_session(backend: str):
+        if backend == "auto":
+            return SamplingSession if SamplingProfiler is not None else CProfileSession
+        if backend == SamplingSession.profiler_name and SamplingProfiler is None:
+            logger.warning("pyinstrument não está instalado: usando cProfile nos perfis de requisição.")
+            return CProfileSession
+        if backend == SamplingSession.profiler_name:
+            return SamplingSession
+        return CProfileSession
+
+
+request_profiler: Optional[RequestProfiler] = None
+
+
+def configure_profiling(
+    directory: str,
+    max_artifacts: int,
+    sample_rate: float,
+    backend: str,
+    token: Optional[str] = None,
+) -> RequestProfiler:
+    global request_profiler
+    request_profiler = RequestProfiler(ProfileStore(directory, max_artifacts), sample_rate, backend, token)
+    return request_profiler
+
+
+def get_request_profiler() -> Optional[RequestProfiler]:
+    """Perfilador de requisições do processo, ou None se o modo de perfil estiver desligado."""
+    return request_profiler
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI de perfil sob demanda: a requisição é executada sob um perfilador
+    quando pedida explicitamente (header `X-Profile` com o segredo `PROFILING_TOKEN`)
+    ou sorteada entre `sample_rate`% das requisições.
+
+    O ID do perfil volta no header `X-Profile-Id`; o artefato fica disponível em
+    `/admin/profiles/{id}` logo após o fim da resposta. Um perfil por vez por processo:
+    requisições que chegam com outro perfil em andamento seguem sem perfil.
+
+    Com cProfile, o perfil cobre todo o trabalho do event loop no período, inclusive o
+    de requisições concorrentes; com pyinstrument, apenas a requisição perfilada.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = self.profiler
+        trigger = await profiler.trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        if profiler.active:
+            profiler.skipped_busy += 1
+            await self.app(scope, receive, send)
+            return
+
+        session = profiler.session_class()
+        try:
+            session.start()
+        except Exception as e: # Ex.: outro perfilador (depurador, cobertura) já ativo
+            logger.error("Não foi possível iniciar o perfil da requisição: %s", e)
+            await self.app(scope, receive, send)
+            return
+
+        profiler.active = True
+        profile_id = profiler.store.new_id()
+        status_code = None
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode("ascii"))]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session.stop()
+            profiler.active = False
+            profiler.profiled += 1
+            metadata = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "trigger": trigger,
+                "profiler": session.profiler_name,
+                "created_at": datetime.utcnow().isoformat(),
+                "pid": os.getpid(),
+            }
+            try:
+                await asyncio.to_thread(profiler.store.save, profile_id, session, metadata)
+            except Exception as e:
+                logger.error("Erro ao gravar o perfil da requisição: %s", e, extra={"profile_id": profile_id})
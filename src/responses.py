@@ -0,0 +1,35 @@
+from typing import Any
+
+import orjson
+from fastapi import status
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Resposta JSON codificada com orjson.
+
+    Aceita bytes já codificados (caminho confiável da camada CRUD), modelos Pydantic
+    (serializados pelo pydantic-core, sem revalidação) ou objetos JSON-compatíveis.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        return orjson.dumps(content)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca (If-None-Match) entre a lista de ETags do cliente e o ETag atual."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque_tag for candidate in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Resposta 304 (sem corpo) para um If-None-Match que corresponde ao ETag atual."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,171 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import Any, Dict, Optional
+
+from src.archival import order_archiver
+from src.config.db import get_database
+from src.config.indexes import check_hot_query_plans, get_index_build_status
+from src.profiling import RequestProfiler, get_request_profiler
+from src.security import verify_token # Importa a dependência de segurança
+
+# 1. Criação do Roteador de Administração
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+)
+
+
+def _require_database():
+    database = get_database()
+    if database is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Banco de dados indisponível.",
+        )
+    return database
+
+
+def _require_profiler(x_profile: Optional[str] = Header(None)) -> RequestProfiler:
+    """Perfilador do processo; as rotas de perfil exigem, além do JWT, o header `X-Profile` com o segredo."""
+    profiler = get_request_profiler()
+    if profiler is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil de requisições desativado (PROFILING_ENABLED=false).",
+        )
+    if not profiler.is_authorized(x_profile):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Header X-Profile ausente ou diferente de PROFILING_TOKEN.",
+        )
+    return profiler
+
+
+def _profile_not_found(profile_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Perfil com ID {profile_id} não encontrado.",
+    )
+
+
+# -------------------------------------------------------------
+# 2. Rota GET: Estado do Build de Índices (Protegida por JWT)
+# -------------------------------------------------------------
+@router.get("/indexes", response_model=Dict[str, Any])
+async def read_index_status(current_user_id: str = Depends(verify_token)):
+    """
+    Retorna o estado de cada índice do registro (`pending`, `building`, `ready`, `failed`)
+    e o progresso reportado pelo servidor para os builds em andamento.
+    """
+    return await get_index_build_status(get_database())
+
+
+# -------------------------------------------------------------
+# 3. Rota GET: Verificação dos Planos de Consulta (Protegida por JWT)
+# -------------------------------------------------------------
+@router.get("/indexes/plans", response_model=Dict[str, Any])
+async def read_query_plans(current_user_id: str = Depends(verify_token)):
+    """
+    Executa `explain()` nas consultas quentes de listagem e indica, para cada uma,
+    os índices usados e se houve COLLSCAN (`ok: false`).
+    """
+    return await check_hot_query_plans(_require_database())
+
+
+# -------------------------------------------------------------
+# 4. Rotas de Arquivamento (Protegidas por JWT)
+# -------------------------------------------------------------
+@router.get("/archive", response_model=Dict[str, Any])
+async def read_archive_status(current_user_id: str = Depends(verify_token)):
+    """
+    Retorna a configuração e os contadores do arquivamento de pedidos para a camada fria
+    (execuções, pedidos movidos, última execução e último erro).
+    """
+    return order_archiver.stats()
+
+
+@router.post("/archive/run", response_model=Dict[str, Any])
+async def run_archive(current_user_id: str = Depends(verify_token)):
+    """
+    Executa imediatamente uma passagem do arquivamento (aguarda a passagem em andamento,
+    se houver) e retorna a quantidade de pedidos movidos.
+    """
+    try:
+        archived = await order_archiver.run_once()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Falha no arquivamento: {e}",
+        )
+    return {"archived": archived}
+
+
+# -------------------------------------------------------------
+# 5. Rotas de Perfil de Requisições (Protegidas por JWT e pelo segredo de perfil)
+# -------------------------------------------------------------
+@router.get("/profiles", response_model=Dict[str, Any])
+async def list_profiles(
+    current_user_id: str = Depends(verify_token),
+    profiler: RequestProfiler = Depends(_require_profiler),
+):
+    """
+    Lista os perfis de requisição guardados (do mais recente ao mais antigo), com rota,
+    status, duração, motivo (`request` ou `sample`) e formato do artefato.
+    """
+    return {**profiler.stats(), "profiles": profiler.store.list()}
+
+
+@router.put("/profiles/sampling", response_model=Dict[str, Any])
+async def update_profile_sampling(
+    sample_rate: float = Query(..., ge=0, le=100, description="Porcentagem de requisições perfiladas."),
+    current_user_id: str = Depends(verify_token),
+    profiler: RequestProfiler = Depends(_require_profiler),
+):
+    """
+    Altera, sem reiniciar a aplicação, a porcentagem de requisições perfiladas por amostragem.
+    Vale apenas para o worker que atende a chamada.
+    """
+    profiler.sample_rate = sample_rate
+    return profiler.stats()
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    current_user_id: str = Depends(verify_token),
+    profiler: RequestProfiler = Depends(_require_profiler),
+):
+    """
+    Baixa o artefato do perfil: `.pstats` (cProfile; abra com `pstats`/snakeviz) ou
+    `.speedscope.json` (pyinstrument; abra em https://www.speedscope.app).
+    """
+    found = profiler.store.artifact_path(profile_id)
+    if found is None:
+        raise _profile_not_found(profile_id)
+    path, metadata = found
+    return FileResponse(path, media_type=metadata["media_type"], filename=metadata["artifact"])
+
+
+@router.get("/profiles/{profile_id}/summary", response_class=PlainTextResponse)
+async def read_profile_summary(
+    profile_id: str,
+    limit: int = Query(40, ge=1, le=500, description="Quantidade de funções listadas."),
+    current_user_id: str = Depends(verify_token),
+    profiler: RequestProfiler = Depends(_require_profiler),
+):
+    """
+    Resumo em texto de um perfil pstats: as funções com maior tempo acumulado.
+    Perfis speedscope devem ser baixados e abertos no speedscope.
+    """
+    store = profiler.store
+    if store.artifact_path(profile_id) is None:
+        raise _profile_not_found(profile_id)
+    summary = await asyncio.to_thread(store.summary, profile_id, limit) # Leitura do arquivo fora do event loop
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Resumo disponível apenas para perfis no formato pstats.",
+        )
+    return PlainTextResponse(summary)
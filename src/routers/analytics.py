@@ -0,0 +1,99 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
+
+from src.crud.analytics import (
+    get_customer_revenue,
+    get_daily_revenue,
+    get_status_revenue,
+    list_top_customers,
+    rebuild_rollups,
+)
+from src.schemas.analytics import RevenueRollup, RollupRebuildResponse
+from src.security import verify_token # Importa a dependência de segurança
+
+# 1. Criação do Roteador de Analytics (leituras O(1) dos rollups pré-computados)
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+)
+
+# -------------------------------------------------------------
+# 2. Rota GET: Receita por Dia
+# -------------------------------------------------------------
+@router.get("/revenue/daily", response_model=List[RevenueRollup])
+async def read_daily_revenue(
+    date_from: Optional[date] = Query(None, description="Primeiro dia (inclusivo, UTC)."),
+    date_to: Optional[date] = Query(None, description="Último dia (inclusivo, UTC)."),
+):
+    """
+    Retorna a receita e a quantidade de pedidos por dia, em ordem cronológica.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'date_from' deve ser anterior ou igual a 'date_to'.",
+        )
+    return await get_daily_revenue(date_from, date_to)
+
+# -------------------------------------------------------------
+# 3. Rotas GET: Receita por Cliente
+# -------------------------------------------------------------
+@router.get("/revenue/customers", response_model=List[RevenueRollup])
+async def read_top_customers(
+    limit: int = Query(10, ge=1, le=100, description="Quantidade de clientes retornados."),
+):
+    """
+    Retorna os clientes de maior receita, em ordem decrescente.
+    """
+    return await list_top_customers(limit)
+
+
+@router.get(
+    "/revenue/customers/{customer_id}",
+    response_model=RevenueRollup,
+    responses={status.HTTP_404_NOT_FOUND: {"description": "Cliente sem pedidos"}},
+)
+async def read_customer_revenue(customer_id: int):
+    """
+    Retorna a receita e a quantidade de pedidos de um cliente.
+    """
+    rollup = await get_customer_revenue(customer_id)
+    if rollup is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Nenhum pedido encontrado para o cliente {customer_id}.",
+        )
+    return rollup
+
+# -------------------------------------------------------------
+# 4. Rota GET: Receita por Status
+# -------------------------------------------------------------
+@router.get("/revenue/status", response_model=List[RevenueRollup])
+async def read_status_revenue():
+    """
+    Retorna a receita e a quantidade de pedidos por status.
+    """
+    return await get_status_revenue()
+
+# -------------------------------------------------------------
+# 5. Rota POST: Reconstruir os Rollups (Protegida por JWT)
+# -------------------------------------------------------------
+@router.post(
+    "/rollups/rebuild",
+    response_model=RollupRebuildResponse,
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Banco de dados indisponível"}},
+)
+async def rebuild_all_rollups(current_user_id: str = Depends(verify_token)):
+    """
+    Recalcula todos os rollups a partir dos pedidos (`$group`/`$merge` no MongoDB).
+
+    ### Requer Autenticação JWT.
+    """
+    keys = await rebuild_rollups()
+    if keys is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Banco de dados indisponível.",
+        )
+    return RollupRebuildResponse(keys=keys)
@@ -1,14 +1,52 @@
-from fastapi import APIRouter, HTTPException, status, Query, Depends
-from typing import List
+import asyncio
+import csv
+import io
+import json
+import orjson
+from datetime import datetime
+from enum import Enum
+from fastapi import APIRouter, HTTPException, status, Query, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from pymongo.errors import OperationFailure
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from src.crud.orders import (
-    get_order_by_id, 
     create_order, 
-    list_orders, 
     update_order, 
-    delete_order
+    delete_order,
+    create_orders_bulk,
+    get_order_json,
+    get_order_version,
+    get_orders_batch,
+    get_orders_page_etag,
+    list_orders_json,
+    iter_order_batches,
+    order_etag,
+    parse_order_fields,
+    serialize_change_event,
+    summarize_products,
+    transition_orders_status,
+    transition_orders_status_where,
+)
+from src.changefeed import FeedSubscription, ResumedSubscription, order_change_feed
+from src.config.storage import get_storage
+from src.storage.base import OrderQuery
+from src.schemas.order import (
+    OrderDB,
+    OrderInput,
+    OrderPartial,
+    OrderUpdate,
+    ProductSummary,
+    BatchGetRequest,
+    BatchGetResponse,
+    BulkItemResult,
+    BulkOrderResponse,
+    StatusTransitionBatch,
+    StatusTransitionByFilter,
+    StatusTransitionResponse,
 )
-from src.schemas.order import OrderDB, OrderInput, OrderUpdate
 from src.security import verify_token # Importa a dependência de segurança
+from src.responses import FastJSONResponse, etag_matches, not_modified
 
 # 1. Criação do Roteador
 router = APIRouter(
@@ -16,6 +54,23 @@ router = APIRouter(
     tags=["Orders"],
 )
 
+# Limite de pedidos aceitos em uma única requisição de ingestão em lote
+MAX_BULK_ORDERS = 50_000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+FIELDS_QUERY_DESCRIPTION = (
+    "Campos retornados, separados por vírgula (ex.: 'id,customer_id,status,total_value,created_at'). "
+    "Ausente: pedido completo."
+)
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    try:
+        return parse_order_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 # -------------------------------------------------------------
 # 2. Rota POST: Criar Pedido (Protegida por JWT)
 # -------------------------------------------------------------
@@ -46,7 +101,7 @@ async def create_new_order(
     new_order = await create_order(order)
     
     if new_order:
-        return new_order
+        return FastJSONResponse(content=new_order, status_code=status.HTTP_201_CREATED)
 
     # No caso de erro de DB não capturado pelo handler 400
     raise HTTPException(
@@ -54,49 +109,454 @@ async def create_new_order(
         detail="Falha inesperada ao criar o pedido."
     )
 
+# -------------------------------------------------------------
+# 2.1 Rota POST: Ingestão de Pedidos em Lote (Protegida por JWT)
+# -------------------------------------------------------------
+def _parse_bulk_body(body: bytes, content_type: str) -> List[Any]:
+    """
+    Converte o corpo da requisição (array JSON ou NDJSON) em uma lista de objetos brutos.
+    """
+    try:
+        if content_type.startswith(NDJSON_MEDIA_TYPE):
+            return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+        payload = json.loads(body)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Corpo da requisição não é um JSON/NDJSON válido: {e}"
+        )
+
+    if not isinstance(payload, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O corpo da requisição deve ser um array JSON de pedidos."
+        )
+    return payload
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkOrderResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"description": "Não Autorizado (Token Inválido/Ausente)"},
+        status.HTTP_400_BAD_REQUEST: {"description": "Corpo da requisição inválido"},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"description": "Lote excede o limite de pedidos"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/OrderInput"}}
+                },
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"type": "string", "description": "Um OrderInput JSON por linha."}
+                },
+            },
+        }
+    },
+)
+async def create_orders_in_bulk(
+    request: Request,
+    current_user_id: str = Depends(verify_token)
+):
+    """
+    Cria **vários pedidos** em uma única requisição.
+
+    Aceita um array JSON (`application/json`) ou NDJSON (`application/x-ndjson`) de `OrderInput`.
+    Todo o lote é validado antes da escrita; os pedidos válidos são inseridos com `insert_many`
+    não ordenado e o resultado (sucesso ou erro) é retornado por item, na ordem de envio.
+
+    ### Requer Autenticação JWT.
+    """
+    raw_orders = _parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+
+    if len(raw_orders) > MAX_BULK_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"O lote excede o limite de {MAX_BULK_ORDERS} pedidos."
+        )
+
+    results: List[Optional[BulkItemResult]] = [None] * len(raw_orders)
+    valid_orders: List[OrderInput] = []
+    valid_positions: List[int] = []
+
+    # 1. Valida todo o lote antes de qualquer escrita
+    for position, raw_order in enumerate(raw_orders):
+        try:
+            valid_orders.append(OrderInput.model_validate(raw_order))
+            valid_positions.append(position)
+        except ValidationError as e:
+            results[position] = BulkItemResult(
+                index=position,
+                status="error",
+                error="; ".join(
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+                ),
+            )
+
+    # 2. Insere os válidos e remapeia o índice para a posição original no lote
+    for result in await create_orders_bulk(valid_orders):
+        position = valid_positions[result.index]
+        result.index = position
+        results[position] = result
+
+    inserted_count = sum(1 for r in results if r.status == "created")
+    return BulkOrderResponse(
+        inserted_count=inserted_count,
+        failed_count=len(results) - inserted_count,
+        results=results,
+    )
+
 # -------------------------------------------------------------
 # 3. Rota GET: Listar Todos os Pedidos com Paginação
 # -------------------------------------------------------------
 @router.get(
     "/", 
-    response_model=List[OrderDB],
-    description="Lista pedidos com suporte a paginação. Ordenado por 'created_at' decrescente."
+    response_model=Union[List[OrderDB], List[OrderPartial]],
+    description=(
+        "Lista pedidos com suporte a paginação. Ordenado por 'created_at' decrescente. "
+        "O cursor da próxima página é retornado no header 'X-Next-Cursor'."
+    ),
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Cursor de paginação ou campos inválidos"}
+    }
 )
-@router.get("/list", response_model=List[OrderDB], include_in_schema=False)
+@router.get("/list", response_model=Union[List[OrderDB], List[OrderPartial]], include_in_schema=False)
 async def get_all_orders(
-    skip: int = Query(0, ge=0, description="Número de registros a serem ignorados (offset)."),
-    limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a serem retornados.")
+    skip: int = Query(0, ge=0, description="Número de registros a serem ignorados (offset). Ignorado quando 'cursor' é informado."),
+    limit: int = Query(10, ge=1, le=100, description="Número máximo de registros a serem retornados."),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em 'X-Next-Cursor' pela página anterior."),
+    customer_id: Optional[int] = Query(None, description="Filtra pedidos por cliente."),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filtra pedidos por status."),
+    created_from: Optional[datetime] = Query(None, description="Inclui pedidos criados a partir desta data (inclusive)."),
+    created_to: Optional[datetime] = Query(None, description="Inclui pedidos criados antes desta data (exclusive)."),
+    product_id: Optional[int] = Query(None, description="Filtra pedidos que contêm este produto."),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None, description="ETag de uma resposta anterior desta página."),
 ):
     """
     Retorna uma lista paginada de todos os pedidos.
+
+    Prefira a paginação por `cursor` (keyset) ao `skip`: o custo de cada página é
+    constante, independente da profundidade. Use `fields` para ler e retornar apenas
+    os campos necessários (ex.: telas de listagem sem `items`).
+
+    Com `If-None-Match`, uma página sem alterações (mesmos pedidos, nas mesmas versões)
+    é respondida com 304, lendo apenas o ID e a versão de cada pedido.
     """
-    orders = await list_orders(skip=skip, limit=limit)
-    return orders
+    selected_fields = _parse_fields(fields)
+    page_params = dict(
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        customer_id=customer_id,
+        status=status_filter,
+        created_from=created_from,
+        created_to=created_to,
+        fields=selected_fields,
+        product_id=product_id,
+    )
+    try:
+        if if_none_match:
+            current_etag = await get_orders_page_etag(**page_params)
+            if current_etag is not None and etag_matches(if_none_match, current_etag):
+                return not_modified(current_etag)
+        orders_json, next_cursor, etag = await list_orders_json(**page_params)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Os documentos já chegam serializados da camada CRUD: sem revalidação pelo response_model
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return FastJSONResponse(content=orders_json, headers=headers)
+
+# -------------------------------------------------------------
+# 3.1 Rota GET: Exportação em Streaming (NDJSON/CSV)
+# -------------------------------------------------------------
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+CSV_COLUMNS = ["id", "customer_id", "status", "total_value", "created_at", "shipping_address", "items"]
+
+
+async def _ndjson_stream(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield b"".join(orjson.dumps(order) + b"\n" for order in batch)
+
+
+async def _csv_stream(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    async for batch in batches:
+        for order in batch:
+            order["items"] = orjson.dumps(order["items"]).decode("utf-8")
+            writer.writerow([order[column] for column in CSV_COLUMNS])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+            "description": "Pedidos em NDJSON (um por linha) ou CSV.",
+        },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Banco de dados indisponível"},
+    },
+)
+async def export_orders(
+    format: ExportFormat = Query(ExportFormat.ndjson, description="Formato de saída: 'ndjson' ou 'csv'."),
+    batch_size: int = Query(1000, ge=1, le=10_000, description="Documentos lidos do MongoDB por lote."),
+    customer_id: Optional[int] = Query(None, description="Filtra pedidos por cliente."),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filtra pedidos por status."),
+    created_from: Optional[datetime] = Query(None, description="Inclui pedidos criados a partir desta data (inclusive)."),
+    created_to: Optional[datetime] = Query(None, description="Inclui pedidos criados antes desta data (exclusive)."),
+    product_id: Optional[int] = Query(None, description="Filtra pedidos que contêm este produto."),
+):
+    """
+    Exporta **todos** os pedidos filtrados em streaming, sem paginação.
+
+    Os documentos são lidos de um único cursor do MongoDB e escritos na resposta
+    lote a lote, mantendo a memória constante independente do volume exportado.
+    """
+    if not get_storage().is_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Banco de dados indisponível."
+        )
+
+    batches = iter_order_batches(
+        batch_size=batch_size,
+        customer_id=customer_id,
+        status=status_filter,
+        created_from=created_from,
+        created_to=created_to,
+        product_id=product_id,
+    )
+
+    if format == ExportFormat.csv:
+        return StreamingResponse(
+            _csv_stream(batches),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="orders.csv"'},
+        )
+    return StreamingResponse(_ndjson_stream(batches), media_type=NDJSON_MEDIA_TYPE)
+
+# -------------------------------------------------------------
+# 3.2 Rota GET: Resumo de Vendas por Produto
+# -------------------------------------------------------------
+@router.get("/products/summary", response_model=List[ProductSummary])
+async def get_products_summary(
+    product_id: Optional[List[int]] = Query(None, description="Produtos a resumir (repita o parâmetro). Ausente: todos."),
+    customer_id: Optional[int] = Query(None, description="Considera apenas pedidos deste cliente."),
+    status_filter: Optional[str] = Query(None, alias="status", description="Considera apenas pedidos neste status."),
+    created_from: Optional[datetime] = Query(None, description="Inclui pedidos criados a partir desta data (inclusive)."),
+    created_to: Optional[datetime] = Query(None, description="Inclui pedidos criados antes desta data (exclusive)."),
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de produtos retornados."),
+):
+    """
+    Retorna, por produto, a quantidade vendida, a receita (quantity * price) e o número de
+    pedidos, agregados no próprio MongoDB e ordenados pela receita.
+
+    Para listar os pedidos de um produto (ex.: recall), use `GET /orders/?product_id=`.
+    """
+    summary = await summarize_products(
+        product_ids=product_id,
+        customer_id=customer_id,
+        status=status_filter,
+        created_from=created_from,
+        created_to=created_to,
+        limit=limit,
+    )
+    return FastJSONResponse(content=orjson.dumps(summary))
+
+# -------------------------------------------------------------
+# 3.3 Rota GET: Feed ao Vivo de Alterações (Server-Sent Events)
+# -------------------------------------------------------------
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Intervalo do comentário de keep-alive enviado quando não há eventos
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# Espera sugerida aos clientes recusados com o limite de retomadas simultâneas atingido
+SSE_RESUME_RETRY_AFTER_SECONDS = 5
+
+
+def _sse_event(change: Dict[str, Any]) -> bytes:
+    event_id, event_type, data = serialize_change_event(change)
+    return b"id: " + event_id.encode("ascii") + b"\nevent: " + event_type.encode("ascii") + b"\ndata: " + data + b"\n\n"
+
+
+async def _shared_feed_stream(subscription: FeedSubscription) -> AsyncIterator[bytes]:
+    try:
+        yield b"retry: 1000\n\n"
+        while True:
+            try:
+                change = await subscription.next(SSE_KEEPALIVE_SECONDS)
+            except StopAsyncIteration:
+                return # Assinante desconectado pelo feed: o cliente reconecta com Last-Event-ID
+            yield _sse_event(change) if change is not None else b": keep-alive\n\n"
+    finally:
+        order_change_feed.unsubscribe(subscription)
+
+
+async def _resumed_feed_stream(resumed: ResumedSubscription) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    last_sent = loop.time()
+    try:
+        yield b"retry: 1000\n\n"
+        while True:
+            try:
+                change = await resumed.next(SSE_KEEPALIVE_SECONDS)
+            except StopAsyncIteration:
+                return
+            if change is not None:
+                yield _sse_event(change)
+                last_sent = loop.time()
+            elif loop.time() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                yield b": keep-alive\n\n"
+                last_sent = loop.time()
+    except OperationFailure as e:
+        # Ex.: token inválido ou já fora do oplog; o cliente deve recomeçar sem token
+        yield b"event: error\ndata: " + orjson.dumps({"detail": str(e), "code": e.code}) + b"\n\n"
+    finally:
+        await resumed.close()
+
+
+@router.get(
+    "/changes",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {SSE_MEDIA_TYPE: {}},
+            "description": "Eventos insert/update/replace/delete dos pedidos, em Server-Sent Events.",
+        },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Change streams indisponíveis ou limite de retomadas atingido"},
+    },
+)
+async def stream_order_changes(
+    customer_id: Optional[int] = Query(None, description="Entrega apenas eventos de pedidos deste cliente."),
+    status_filter: Optional[str] = Query(None, alias="status", description="Entrega apenas eventos de pedidos neste status."),
+    resume_after: Optional[str] = Query(None, description="Retoma após este evento (o mesmo que o header Last-Event-ID)."),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Feed ao vivo das alterações de pedidos (change stream do MongoDB) em Server-Sent Events.
+
+    O `id` de cada evento é um resume token: ao reconectar, o cliente o envia em
+    `Last-Event-ID` (automático no EventSource) e recebe os eventos perdidos, lidos de um
+    change stream próprio só até alcançar o feed compartilhado. Com filtros, exclusões não são entregues (o documento excluído não está disponível).
+    """
+    if not order_change_feed.is_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Feed de alterações indisponível (requer MongoDB em replica set)."
+        )
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    resume_token = resume_after or last_event_id
+    if resume_token:
+        resumed = order_change_feed.resume(resume_token, customer_id, status_filter)
+        if resumed is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Muitos clientes retomando o feed de alterações; tente novamente.",
+                headers={"Retry-After": str(SSE_RESUME_RETRY_AFTER_SECONDS)},
+            )
+        return StreamingResponse(
+            _resumed_feed_stream(resumed),
+            media_type=SSE_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    subscription = order_change_feed.subscribe(customer_id, status_filter)
+    return StreamingResponse(_shared_feed_stream(subscription), media_type=SSE_MEDIA_TYPE, headers=headers)
 
 # -------------------------------------------------------------
 # 4. Rota GET: Obter Pedido por ID
 # -------------------------------------------------------------
 @router.get(
     "/{orderId}", 
-    response_model=OrderDB,
+    response_model=Union[OrderDB, OrderPartial],
     responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Campos inválidos"},
         status.HTTP_404_NOT_FOUND: {"description": "Pedido não encontrado"}
     }
 )
-async def get_order(orderId: str):
+async def get_order(
+    orderId: str,
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None, description="ETag de uma resposta anterior deste pedido."),
+):
     """
     Busca um pedido específico utilizando seu ID (gerado pelo MongoDB, tipo string).
+
+    A resposta traz um `ETag` derivado da versão do pedido (em leituras parciais, quando
+    `fields` inclui `version`). Com `If-None-Match`, um pedido sem alterações é respondido
+    com 304, lendo do banco apenas a versão.
     """
-    order = await get_order_by_id(orderId)
+    selected_fields = _parse_fields(fields)
+    version = None
+    if if_none_match:
+        version = await get_order_version(orderId)
+        if version is not None and etag_matches(if_none_match, order_etag(version, selected_fields)):
+            return not_modified(order_etag(version, selected_fields))
+
+    found = await get_order_json(orderId, selected_fields)
     
-    if order:
-        return order
+    if found is not None:
+        order_json, found_version = found
+        # Sem 'version' entre os campos, vale a lida para o If-None-Match (se houver)
+        version = found_version if found_version is not None else version
+        headers = {"ETag": order_etag(version, selected_fields)} if version is not None else None
+        return FastJSONResponse(content=order_json, headers=headers)
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail=f"Pedido com ID '{orderId}' não encontrado."
     )
 
+# -------------------------------------------------------------
+# 4.1 Rota POST: Obter Pedidos em Lote por ID
+# -------------------------------------------------------------
+@router.post(
+    "/batch-get",
+    response_model=BatchGetResponse,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Campos inválidos"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Banco de dados indisponível"},
+    },
+)
+async def get_orders_in_batch(
+    request_body: BatchGetRequest,
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+):
+    """
+    Busca **vários pedidos** por ID em uma única requisição (consultas `$in` em chunks).
+
+    Os pedidos encontrados são retornados na ordem dos IDs enviados; IDs sem pedido
+    aparecem em `missing` e IDs malformados em `invalid`.
+    """
+    selected_fields = _parse_fields(fields)
+    if not get_storage().is_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Banco de dados indisponível."
+        )
+
+    orders, missing, invalid = await get_orders_batch(request_body.ids, selected_fields)
+    return FastJSONResponse(content=orjson.dumps({"orders": orders, "missing": missing, "invalid": invalid}))
+
 # -------------------------------------------------------------
 # 5. Rota DELETE: Excluir Pedido por ID
 # -------------------------------------------------------------
@@ -154,9 +614,75 @@ async def update_existing_order(
     updated_order = await update_order(orderId, order_data)
     
     if updated_order:
-        return updated_order
+        return FastJSONResponse(content=updated_order, headers={"ETag": order_etag(updated_order.version)})
     
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail=f"Pedido com ID '{orderId}' não encontrado para atualização."
-    )
\ No newline at end of file
+    )
+# -------------------------------------------------------------
+# 7. Rotas POST: Transição de Status em Lote (Protegidas por JWT)
+# -------------------------------------------------------------
+@router.post(
+    "/status/batch",
+    response_model=StatusTransitionResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"description": "Não Autorizado (Token Inválido/Ausente)"},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"description": "Lote acima do limite"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Banco de dados indisponível"},
+    }
+)
+async def transition_status_in_batch(
+    batch: StatusTransitionBatch,
+    current_user_id: str = Depends(verify_token) # Exige JWT
+):
+    """
+    Altera o status de **vários pedidos** a partir de pares (id, novo status), cada um
+    aplicado como uma atualização condicional (só se o pedido não mudou de status desde a leitura).
+
+    ### Requer Autenticação JWT.
+    """
+    if len(batch.transitions) > MAX_BULK_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"O lote excede o limite de {MAX_BULK_ORDERS} transições."
+        )
+    if not get_storage().is_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Banco de dados indisponível."
+        )
+
+    return await transition_orders_status([(item.id, item.status) for item in batch.transitions])
+
+
+@router.post(
+    "/status/by-filter",
+    response_model=StatusTransitionResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"description": "Não Autorizado (Token Inválido/Ausente)"},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Banco de dados indisponível"},
+    }
+)
+async def transition_status_by_filter(
+    transition: StatusTransitionByFilter,
+    current_user_id: str = Depends(verify_token) # Exige JWT
+):
+    """
+    Altera o status de **todos os pedidos** em `status` (opcionalmente de um cliente e
+    criados antes de `created_before`), percorridos em páginas pelo índice de status.
+
+    ### Requer Autenticação JWT.
+    """
+    if not get_storage().is_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Banco de dados indisponível."
+        )
+
+    query = OrderQuery(
+        customer_id=transition.customer_id,
+        status=transition.status,
+        created_to=transition.created_before,
+    )
+    return await transition_orders_status_where(query, transition.new_status)
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Union
+
+# --- 1. Schema de um Agregado (Rollup) de Vendas ---
+class RevenueRollup(BaseModel):
+    """
+    Receita e quantidade de pedidos de uma chave (dia, cliente ou status), pré-computadas.
+    """
+    key: Union[int, str] = Field(..., description="Dia (AAAA-MM-DD, UTC), ID do cliente ou status.")
+    order_count: int = Field(..., description="Quantidade de pedidos da chave.")
+    revenue: float = Field(..., description="Soma do total_value dos pedidos da chave.")
+
+# --- 2. Schema do Resultado da Reconstrução dos Rollups ---
+class RollupRebuildResponse(BaseModel):
+    """
+    Resumo da reconstrução completa dos rollups.
+    """
+    keys: Dict[str, int] = Field(..., description="Quantidade de chaves por dimensão (daily, customer, status).")
@@ -33,6 +33,24 @@ class OrderInput(BaseModel):
 
     model_config = ConfigDict(populate_by_name=True) 
 
+def compute_items_total(raw_items: List[Any]) -> float:
+    """
+    Soma quantidade * preço de cada item (dicionário ou ItemInput), arredondando para 2 casas.
+    """
+    total = 0.0
+    for item_data in raw_items:
+        try:
+            quantity = item_data.get('quantity', 0)
+            price = item_data.get('price', 0.0)
+            total += quantity * price
+        except AttributeError:
+            if isinstance(item_data, ItemInput):
+                 total += item_data.subtotal
+            else:
+                pass
+
+    return round(total, 2)
+
 # --- 3. Schema de Persistência e Saída (Data Mapping e Cálculo) ---
 class OrderDB(OrderInput):
     """
@@ -41,6 +59,7 @@ class OrderDB(OrderInput):
     total_value: float = Field(0.0, description="Valor total calculado do pedido, incluindo todos os itens.")
     created_at: datetime = Field(default_factory=datetime.utcnow, description="Timestamp de criação do pedido.")
     status: str = Field("PENDING", description="Status atual do pedido.")
+    version: int = Field(1, description="Versão do pedido, incrementada a cada alteração (base do ETag).")
 
     @field_validator('total_value', mode='before')
     @classmethod
@@ -51,20 +70,7 @@ class OrderDB(OrderInput):
         if value is not None and value != 0.0:
             return value
         
-        raw_items = info.data.get('items', [])
-        total = 0.0
-        for item_data in raw_items:
-            try:
-                quantity = item_data.get('quantity', 0)
-                price = item_data.get('price', 0.0)
-                total += quantity * price
-            except AttributeError:
-                if isinstance(item_data, ItemInput):
-                     total += item_data.subtotal
-                else:
-                    pass
-
-        return round(total, 2)
+        return compute_items_total(info.data.get('items', []))
 
 
     model_config = ConfigDict(
@@ -72,6 +78,20 @@ class OrderDB(OrderInput):
         from_attributes=True,
     )
 
+# --- 3.1 Schema de Saída Parcial (fields=) ---
+class OrderPartial(BaseModel):
+    """
+    Pedido com apenas os campos pedidos em `fields=` (os demais ficam ausentes da resposta).
+    """
+    id: Optional[str] = None
+    customer_id: Optional[int] = None
+    items: Optional[List[ItemInput]] = None
+    shipping_address: Optional[str] = None
+    total_value: Optional[float] = None
+    created_at: Optional[datetime] = None
+    status: Optional[str] = None
+    version: Optional[int] = None
+
 # --- 4. Schema de Atualização Parcial (PATCH) ---
 class OrderUpdate(BaseModel):
     """
@@ -81,4 +101,80 @@ class OrderUpdate(BaseModel):
     customer_id: Optional[int] = Field(None, description="ID do cliente que realizou o pedido.")
     items: Optional[List[ItemInput]] = Field(None, min_length=1, description="Lista de itens do pedido.")
     shipping_address: Optional[str] = Field(None, description="Endereço de entrega (opcional).")
-    status: Optional[str] = Field(None, description="Status atual do pedido.")
\ No newline at end of file
+    status: Optional[str] = Field(None, description="Status atual do pedido.")
+
+# --- 5. Schemas de Leitura em Lote (batch-get) ---
+class BatchGetRequest(BaseModel):
+    """
+    IDs dos pedidos a buscar em uma única requisição.
+    """
+    ids: List[str] = Field(..., min_length=1, max_length=1000, description="IDs dos pedidos (até 1000).")
+
+class BatchGetResponse(BaseModel):
+    """
+    Pedidos encontrados, na ordem dos IDs enviados, e os IDs não resolvidos.
+    """
+    orders: List[OrderPartial] = Field(..., description="Pedidos encontrados (completos, ou apenas os campos de 'fields').")
+    missing: List[str] = Field(..., description="IDs válidos sem pedido correspondente.")
+    invalid: List[str] = Field(..., description="IDs que não são ObjectId válidos.")
+
+# --- 5.1 Schema do Resumo por Produto ---
+class ProductSummary(BaseModel):
+    """
+    Totais de um produto nos pedidos filtrados.
+    """
+    product_id: int = Field(..., description="ID do produto no catálogo.")
+    order_count: int = Field(..., description="Quantidade de pedidos que contêm o produto.")
+    quantity: int = Field(..., description="Quantidade total vendida.")
+    revenue: float = Field(..., description="Receita total do produto (soma de quantity * price).")
+
+# --- 6. Schemas de Transição de Status em Lote ---
+class StatusTransitionItem(BaseModel):
+    """
+    Novo status de um pedido.
+    """
+    id: str = Field(..., description="ID do pedido.")
+    status: str = Field(..., description="Novo status do pedido.")
+
+class StatusTransitionBatch(BaseModel):
+    """
+    Lista de pares (id, novo status), aplicados em uma única operação em lote.
+    """
+    transitions: List[StatusTransitionItem] = Field(..., min_length=1, description="Transições a aplicar.")
+
+class StatusTransitionByFilter(BaseModel):
+    """
+    Transição de todos os pedidos em um status (opcionalmente de um cliente e criados antes de uma data).
+    """
+    status: str = Field(..., description="Status atual dos pedidos a transicionar.")
+    new_status: str = Field(..., description="Novo status.")
+    customer_id: Optional[int] = Field(None, description="Restringe aos pedidos deste cliente.")
+    created_before: Optional[datetime] = Field(None, description="Restringe aos pedidos criados antes desta data (exclusive).")
+
+class StatusTransitionResponse(BaseModel):
+    """
+    Resultado de uma transição de status em lote.
+    """
+    matched_count: int = Field(..., description="Pedidos encontrados.")
+    modified_count: int = Field(..., description="Pedidos efetivamente alterados (os que já estavam no novo status não contam).")
+    missing: List[str] = Field(default_factory=list, description="IDs válidos sem pedido correspondente.")
+    invalid: List[str] = Field(default_factory=list, description="IDs que não são ObjectId válidos.")
+
+# --- 7. Schemas de Ingestão em Lote (Bulk) ---
+class BulkItemResult(BaseModel):
+    """
+    Resultado individual de um pedido enviado em lote.
+    """
+    index: int = Field(..., description="Posição do pedido no lote enviado (base 0).")
+    status: str = Field(..., description="'created' se o pedido foi inserido, 'error' caso contrário.")
+    id: Optional[str] = Field(None, description="ID do pedido inserido.")
+    error: Optional[str] = Field(None, description="Descrição do erro de validação ou de escrita.")
+    error_code: Optional[int] = Field(None, description="Código de erro do MongoDB (ex.: 11000 para chave duplicada).")
+
+class BulkOrderResponse(BaseModel):
+    """
+    Resumo da ingestão em lote, com o resultado de cada item na ordem de envio.
+    """
+    inserted_count: int = Field(..., description="Quantidade de pedidos inseridos.")
+    failed_count: int = Field(..., description="Quantidade de pedidos rejeitados.")
+    results: List[BulkItemResult] = Field(..., description="Resultado por item, na ordem de envio.")
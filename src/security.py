@@ -1,3 +1,5 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -5,12 +7,25 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 
+from src.cache import CacheStats, MemoryCacheBackend
+
 # --- Configurações de Segurança ---
 # NOTA: Em produção, estas chaves devem ser lidas de variáveis de ambiente (.env)
 SECRET_KEY = "sua_chave_secreta_muito_segura_e_longa"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 
 
+# Limites do cache de tokens já validados (ver `verify_token`)
+TOKEN_CACHE_MAX_ENTRIES = 50_000
+TOKEN_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# Cache: digest SHA-256 do token -> 'sub' validado, válido até o 'exp' do próprio token
+token_cache = MemoryCacheBackend(
+    max_entries=TOKEN_CACHE_MAX_ENTRIES,
+    max_bytes=TOKEN_CACHE_MAX_BYTES,
+    ttl_seconds=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
 # Esquema de Autenticação OAuth2 (indica onde buscar o token: Header Authorization)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token") # tokenUrl é um placeholder aqui
 
@@ -32,9 +47,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str = Depends(oauth2_scheme)):
+def get_token_cache_stats() -> CacheStats:
+    """Retorna os contadores de hit/miss/eviction do cache de tokens."""
+    return token_cache.stats()
+
+
+def decode_token(token: str) -> dict:
+    """
+    Decodifica e valida o JWT (assinatura, formato e expiração), sem cache.
+
+    :raises JWTError: Se o token for inválido ou estiver expirado.
+    """
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+async def verify_token(token: str = Depends(oauth2_scheme)):
     """
     Middleware de dependência que decodifica e valida o JWT.
+
+    Tokens já validados ficam em cache (chave: digest do token) até o seu 'exp',
+    então requisições repetidas com o mesmo token custam apenas uma consulta ao dicionário.
     
     :param token: O token JWT extraído do header 'Authorization: Bearer <token>'
     :raises HTTPException: 401 Unauthorized se o token for inválido ou expirar
@@ -45,16 +77,27 @@ def verify_token(token: str = Depends(oauth2_scheme)):
         detail="Credenciais inválidas ou token expirado",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached_user_id = await token_cache.get(cache_key)
+    if cached_user_id is not None:
+        return cached_user_id.decode("utf-8")
     
     try:
         # 1. Decodifica o token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         
         # 2. Extrai o ID do usuário ou qualquer dado que você está usando como 'subject'
         # Assumimos que o payload contém o 'sub' (subject/user_id)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
+
+        # 3. Guarda em cache somente até a expiração do próprio token
+        expires_at = payload.get("exp")
+        ttl_seconds = None if expires_at is None else expires_at - time.time()
+        if ttl_seconds is None or ttl_seconds > 0:
+            await token_cache.set(cache_key, str(user_id).encode("utf-8"), ttl_seconds=ttl_seconds)
             
         # Retorna o user_id ou payload completo para uso no endpoint
         return user_id 
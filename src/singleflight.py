@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalescência de requisições concorrentes ("single-flight").
+
+    Enquanto uma chamada para uma chave está em andamento, as demais chamadas para a
+    mesma chave aguardam o mesmo resultado (ou a mesma exceção) em vez de disparar
+    uma nova consulta. Nada é guardado após a conclusão; uma escrita deve chamar
+    `forget` para que quem lê depois dela não receba uma leitura iniciada antes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.executions = 0 # Chamadas que de fato foram executadas
+        self.coalesced = 0  # Chamadas atendidas por uma execução já em andamento
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Executa `fn()` uma única vez por chave entre chamadores concorrentes.
+
+        A execução roda em uma Task própria: o cancelamento de um chamador não
+        cancela a consulta compartilhada com os demais.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def forget(self, match: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Desassocia das suas chaves as execuções em andamento (todas, ou as escolhidas por
+        `match`): os próximos chamadores iniciam uma nova execução. Quem já aguarda uma
+        delas continua recebendo o seu resultado.
+
+        :return: Quantidade de execuções desassociadas.
+        """
+        keys = [key for key in self._inflight if match is None or match(key)]
+        for key in keys:
+            del self._inflight[key]
+        return len(keys)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Marca a exceção como lida caso todos os chamadores tenham sido cancelados
+        if not task.cancelled():
+            task.exception()
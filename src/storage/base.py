@@ -0,0 +1,194 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+
+from src.schemas.order import compute_items_total
+
+# Código de erro do MongoDB para violação de índice único (usado por todos os backends)
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+# Chave de ordenação da listagem: (created_at, _id), sempre em ordem decrescente
+SortKey = Tuple[datetime, ObjectId]
+
+# Resultado de `OrderStorage.update`: (documento antes, documento depois)
+UpdatedPair = Tuple[Dict[str, Any], Dict[str, Any]]
+
+# Transição de status em lote: (documento lido com `TRANSITION_FIELDS`, novo status)
+StatusTransition = Tuple[Dict[str, Any], str]
+
+# Campos lidos antes de uma transição de status: chaves dos rollups, total (com os
+# itens, para pedidos antigos sem total_value) e versão (condição da atualização)
+TRANSITION_FIELDS = ("created_at", "customer_id", "status", "total_value", "items", "version")
+
+
+def apply_order_update(document: Dict[str, Any], update_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aplica uma atualização parcial a um documento (sem alterá-lo), recalculando o
+    `total_value` se `items` mudou e incrementando a `version`, como os backends fazem ao persistir.
+    """
+    updated = {**document, **update_dict}
+    if "items" in update_dict:
+        updated["total_value"] = compute_items_total(updated["items"])
+    updated["version"] = document.get("version", 1) + 1
+    return updated
+
+
+def order_total(document: Dict[str, Any]) -> float:
+    """
+    Total de um pedido armazenado: o `total_value` gravado ou, em documentos anteriores
+    ao campo (calculado só na leitura), a soma dos itens.
+    """
+    total_value = document.get("total_value")
+    if total_value is None:
+        return compute_items_total(document.get("items") or [])
+    return float(total_value)
+
+
+@dataclass(frozen=True)
+class OrderQuery:
+    """
+    Filtros da listagem e da exportação de pedidos.
+
+    O intervalo de datas é semiaberto: created_from <= created_at < created_to.
+    """
+    customer_id: Optional[int] = None
+    status: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    product_id: Optional[int] = None # Pedidos com ao menos um item deste produto
+
+
+class OrderStorage(ABC):
+    """
+    Contrato do armazenamento de pedidos usado pela camada CRUD.
+
+    Os métodos recebem e retornam documentos no formato persistido ('_id' como ObjectId).
+    Erros de chave duplicada são sinalizados com `pymongo.errors.DuplicateKeyError`
+    em todas as implementações.
+
+    Nas leituras, `fields` (nomes dos campos persistidos) limita os campos retornados;
+    '_id' e, na listagem, 'created_at' (chave do cursor) sempre são incluídos.
+    """
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Indica se o backend está pronto para receber operações."""
+
+    @abstractmethod
+    async def has_documents(self) -> bool:
+        """Indica se a coleção tem ao menos um pedido (uma leitura, sem contagem)."""
+
+    @abstractmethod
+    async def insert_one(self, document: Dict[str, Any]) -> None:
+        """Insere o documento, preenchendo o '_id' no próprio dicionário."""
+
+    @abstractmethod
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, Exception]:
+        """
+        Insere os documentos sem ordem garantida: uma falha não interrompe os demais.
+
+        :return: Erros por índice na lista recebida (vazio se todos foram inseridos).
+        """
+
+    @abstractmethod
+    async def replace_one(self, document: Dict[str, Any]) -> None:
+        """Grava o documento inteiro pelo seu '_id', substituindo o existente ou inserindo-o."""
+
+    @abstractmethod
+    async def find_by_id(self, object_id: ObjectId, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """Retorna o documento com o '_id' informado, ou None."""
+
+    @abstractmethod
+    async def find_many(self, object_ids: Sequence[ObjectId], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Retorna os documentos existentes entre os '_id' informados, em qualquer ordem."""
+
+    @abstractmethod
+    async def find_page(
+        self,
+        query: OrderQuery,
+        limit: int,
+        skip: int = 0,
+        after: Optional[SortKey] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retorna até `limit` documentos ordenados por (created_at, _id) decrescente.
+
+        Com `after`, retorna apenas os documentos estritamente depois dessa chave (keyset).
+        """
+
+    @abstractmethod
+    def iter_orders(self, query: OrderQuery, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        """Percorre todos os documentos filtrados, na ordem da listagem."""
+
+    @abstractmethod
+    async def update(self, object_id: ObjectId, update_dict: Dict[str, Any]) -> Optional[UpdatedPair]:
+        """
+        Aplica os campos de `update_dict` e, se `items` mudou, recalcula o `total_value`,
+        de forma atômica. Toda alteração de um pedido (inclusive de status, nos métodos
+        abaixo) incrementa sua `version` (documentos sem o campo estão na versão 1).
+
+        :return: O documento antes e depois da atualização, ou None se não existir.
+        """
+
+    @abstractmethod
+    async def set_status_many(self, transitions: Sequence[StatusTransition]) -> List[UpdatedPair]:
+        """
+        Aplica as transições de status em uma única operação, sem ordem garantida. Cada
+        uma só é aplicada se o pedido ainda está na `version` (e no status) do documento
+        lido: o documento recebido é então exatamente o anterior à alteração.
+
+        :return: (antes, depois) de cada documento de fato alterado, com os campos de
+                 `TRANSITION_FIELDS` (base exata dos deltas dos rollups).
+        """
+
+    @abstractmethod
+    async def set_status_where(
+        self,
+        query: OrderQuery,
+        new_status: str,
+        object_ids: Sequence[ObjectId],
+    ) -> Tuple[int, float]:
+        """
+        Move para `new_status`, em uma única atualização, os pedidos entre os '_id'
+        informados que ainda atendem a `query` (que tem `status`).
+
+        :return: Quantidade de pedidos alterados e a soma de seus totais (ver `order_total`),
+                 lida imediatamente antes da atualização.
+        """
+
+    @abstractmethod
+    async def summarize_products(
+        self,
+        query: OrderQuery,
+        product_ids: Optional[Sequence[int]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Agrega os itens dos pedidos filtrados por produto, em ordem decrescente de receita.
+
+        :param product_ids: Restringe aos itens destes produtos (None = todos).
+        :return: Dicionários com product_id, order_count, quantity e revenue.
+        """
+
+    @abstractmethod
+    async def delete(self, object_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """Exclui o documento; retorna o documento excluído, ou None se ele não existia."""
+
+    @abstractmethod
+    async def delete_many(
+        self,
+        object_ids: Sequence[ObjectId],
+        query: OrderQuery = OrderQuery(),
+        versions: Optional[Sequence[int]] = None,
+    ) -> int:
+        """
+        Exclui, em uma única operação, os documentos entre os '_id' informados que ainda
+        atendem a `query` e, com `versions` (paralela a `object_ids`), que ainda estão
+        nessa `version` (usado no arquivamento, para não excluir pedidos alterados).
+
+        :return: Quantidade de documentos excluídos.
+        """
@@ -0,0 +1,340 @@
+import bisect
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from src.storage.base import (
+    DUPLICATE_KEY_ERROR_CODE,
+    OrderQuery,
+    OrderStorage,
+    SortKey,
+    TRANSITION_FIELDS,
+    StatusTransition,
+    UpdatedPair,
+    apply_order_update,
+    order_total,
+)
+
+# Menor ObjectId possível: usado para montar limites de intervalo só por data
+MIN_OBJECT_ID = ObjectId("0" * 24)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Normaliza para UTC sem fuso, como o MongoDB devolve as datas (comparáveis entre si)."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _copy_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia rasa do documento e de seus itens, isolando o estado interno do chamador."""
+    copied = dict(document)
+    if isinstance(copied.get("items"), list):
+        copied["items"] = [dict(item) if isinstance(item, dict) else item for item in copied["items"]]
+    return copied
+
+
+def _project_document(document: Dict[str, Any], fields: Optional[Sequence[str]], *required: str) -> Dict[str, Any]:
+    """Cópia do documento restrita a '_id', `fields` e `required` (todos os campos se `fields` for None)."""
+    if fields is None:
+        return _copy_document(document)
+    return _copy_document({
+        field: document[field]
+        for field in ("_id", *fields, *required)
+        if field in document
+    })
+
+
+def _product_ids(document: Dict[str, Any]) -> Set[Any]:
+    """Produtos distintos dos itens do pedido (chaves do índice "multikey")."""
+    return {item.get("product_id") for item in document.get("items") or [] if isinstance(item, dict)}
+
+
+class SortedIndex:
+    """Índice secundário: lista ordenada de chaves (created_at, _id), com varredura por intervalo."""
+
+    def __init__(self):
+        self._keys: List[SortKey] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: SortKey) -> None:
+        bisect.insort(self._keys, key)
+
+    def remove(self, key: SortKey) -> None:
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+
+    def scan_desc(self, lower: Optional[SortKey] = None, upper: Optional[SortKey] = None) -> Iterator[SortKey]:
+        """Percorre as chaves em ordem decrescente, com lower <= chave < upper."""
+        high = bisect.bisect_left(self._keys, upper) if upper is not None else len(self._keys)
+        low = bisect.bisect_left(self._keys, lower) if lower is not None else 0
+        for index in range(high - 1, low - 1, -1):
+            yield self._keys[index]
+
+
+class InMemoryOrderStorage(OrderStorage):
+    """
+    Armazenamento de pedidos em memória, com índices secundários ordenados em
+    `created_at`, `customer_id`, `status` e `items.product_id`.
+
+    Cada operação é síncrona dentro do event loop, logo atômica entre requisições.
+    Destinado a testes de desempenho herméticos e a uma camada local rápida.
+    """
+
+    def __init__(self):
+        self._documents: Dict[ObjectId, Dict[str, Any]] = {}
+        self._by_created_at = SortedIndex()
+        self._by_customer: Dict[Any, SortedIndex] = {}
+        self._by_status: Dict[Any, SortedIndex] = {}
+        self._by_product: Dict[Any, SortedIndex] = {}
+
+    def is_available(self) -> bool:
+        return True
+
+    async def has_documents(self) -> bool:
+        return bool(self._documents)
+
+    # --- Escrita ---
+    async def insert_one(self, document: Dict[str, Any]) -> None:
+        self._insert(document)
+
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, Exception]:
+        errors: Dict[int, Exception] = {}
+        for index, document in enumerate(documents):
+            try:
+                self._insert(document)
+            except DuplicateKeyError as e:
+                errors[index] = e
+        return errors
+
+    async def replace_one(self, document: Dict[str, Any]) -> None:
+        current = self._documents.pop(document["_id"], None)
+        if current is not None:
+            self._unindex(current)
+        self._insert(document)
+
+    async def update(self, object_id: ObjectId, update_dict: Dict[str, Any]) -> Optional[UpdatedPair]:
+        current = self._documents.get(object_id)
+        if current is None:
+            return None
+
+        updated = _copy_document(apply_order_update(current, update_dict))
+
+        self._unindex(current)
+        self._documents[object_id] = updated
+        self._index(updated)
+        return current, _copy_document(updated)
+
+    async def set_status_many(self, transitions: Sequence[StatusTransition]) -> List[UpdatedPair]:
+        updated: List[UpdatedPair] = []
+        for read_doc, new_status in transitions:
+            document = self._documents.get(read_doc["_id"])
+            if document is None or document.get("version", 1) != read_doc.get("version", 1):
+                continue
+            if document.get("status") != read_doc.get("status"):
+                continue
+            previous = _project_document(document, TRANSITION_FIELDS)
+            if self._set_status(document, new_status):
+                updated.append((previous, _project_document(document, TRANSITION_FIELDS)))
+        return updated
+
+    async def set_status_where(
+        self,
+        query: OrderQuery,
+        new_status: str,
+        object_ids: Sequence[ObjectId],
+    ) -> Tuple[int, float]:
+        count, revenue = 0, 0.0
+        for object_id in object_ids:
+            document = self._documents.get(object_id)
+            if document is None or not self._matches(document, query):
+                continue
+            total = order_total(document)
+            if self._set_status(document, new_status):
+                count += 1
+                revenue += total
+        return count, revenue
+
+    async def summarize_products(
+        self,
+        query: OrderQuery,
+        product_ids: Optional[Sequence[int]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        wanted = set(product_ids) if product_ids is not None else None
+        summary: Dict[Any, Dict[str, Any]] = {}
+        for document in self._scan(query, None):
+            seen: Set[Any] = set()
+            for item in document.get("items") or []:
+                product_id = item.get("product_id")
+                if wanted is not None and product_id not in wanted:
+                    continue
+                totals = summary.setdefault(product_id, {"product_id": product_id, "order_count": 0, "quantity": 0, "revenue": 0.0})
+                if product_id not in seen:
+                    totals["order_count"] += 1
+                    seen.add(product_id)
+                totals["quantity"] += item.get("quantity", 0)
+                totals["revenue"] += item.get("quantity", 0) * item.get("price", 0.0)
+
+        ranked = sorted(summary.values(), key=lambda totals: (-totals["revenue"], totals["product_id"]))[:limit]
+        for totals in ranked:
+            totals["revenue"] = round(totals["revenue"], 2)
+        return ranked
+
+    async def delete(self, object_id: ObjectId) -> Optional[Dict[str, Any]]:
+        document = self._documents.pop(object_id, None)
+        if document is None:
+            return None
+        self._unindex(document)
+        return document
+
+    async def delete_many(
+        self,
+        object_ids: Sequence[ObjectId],
+        query: OrderQuery = OrderQuery(),
+        versions: Optional[Sequence[int]] = None,
+    ) -> int:
+        deleted = 0
+        for index, object_id in enumerate(object_ids):
+            document = self._documents.get(object_id)
+            if document is None or not self._matches(document, query):
+                continue
+            if versions is not None and document.get("version", 1) != versions[index]:
+                continue
+            del self._documents[object_id]
+            self._unindex(document)
+            deleted += 1
+        return deleted
+
+    # --- Leitura ---
+    async def find_by_id(self, object_id: ObjectId, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        document = self._documents.get(object_id)
+        return _project_document(document, fields) if document is not None else None
+
+    async def find_many(self, object_ids: Sequence[ObjectId], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        return [
+            _project_document(self._documents[object_id], fields)
+            for object_id in object_ids
+            if object_id in self._documents
+        ]
+
+    async def find_page(
+        self,
+        query: OrderQuery,
+        limit: int,
+        skip: int = 0,
+        after: Optional[SortKey] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        page: List[Dict[str, Any]] = []
+        for document in self._scan(query, after):
+            if skip:
+                skip -= 1
+                continue
+            page.append(_project_document(document, fields, "created_at"))
+            if len(page) >= limit:
+                break
+        return page
+
+    async def iter_orders(self, query: OrderQuery, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        # Pagina por keyset entre os lotes: escritas concorrentes não invalidam a varredura
+        after: Optional[SortKey] = None
+        while True:
+            batch = await self.find_page(query, batch_size, after=after)
+            for document in batch:
+                yield document
+            if len(batch) < batch_size:
+                return
+            after = (batch[-1]["created_at"], batch[-1]["_id"])
+
+    # --- Internos ---
+    def _insert(self, document: Dict[str, Any]) -> None:
+        object_id = document.setdefault("_id", ObjectId())
+        if object_id in self._documents:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: orders index: _id_ dup key: {{ _id: {object_id} }}",
+                DUPLICATE_KEY_ERROR_CODE,
+                {"keyValue": {"_id": object_id}},
+            )
+        stored = _copy_document(document)
+        self._documents[object_id] = stored
+        self._index(stored)
+
+    def _set_status(self, document: Dict[str, Any], new_status: str) -> bool:
+        """Altera o status em um documento armazenado, mantendo o índice de status; False se já estava nele."""
+        if document.get("status") == new_status:
+            return False
+        self._unindex(document)
+        document["status"] = new_status
+        document["version"] = document.get("version", 1) + 1
+        self._index(document)
+        return True
+
+    def _index(self, document: Dict[str, Any]) -> None:
+        key = (document["created_at"], document["_id"])
+        self._by_created_at.add(key)
+        self._by_customer.setdefault(document.get("customer_id"), SortedIndex()).add(key)
+        self._by_status.setdefault(document.get("status"), SortedIndex()).add(key)
+        for product_id in _product_ids(document):
+            self._by_product.setdefault(product_id, SortedIndex()).add(key)
+
+    def _unindex(self, document: Dict[str, Any]) -> None:
+        key = (document["created_at"], document["_id"])
+        self._by_created_at.remove(key)
+        entries = [(self._by_customer, document.get("customer_id")), (self._by_status, document.get("status"))]
+        entries += [(self._by_product, product_id) for product_id in _product_ids(document)]
+        for index_map, value in entries:
+            index = index_map.get(value)
+            if index is not None:
+                index.remove(key)
+                if not len(index):
+                    del index_map[value]
+
+    @staticmethod
+    def _matches(document: Dict[str, Any], query: OrderQuery) -> bool:
+        """Indica se o documento atende ao filtro (sem usar os índices)."""
+        if query.customer_id is not None and document.get("customer_id") != query.customer_id:
+            return False
+        if query.status is not None and document.get("status") != query.status:
+            return False
+        if query.product_id is not None and query.product_id not in _product_ids(document):
+            return False
+        created_at = document.get("created_at")
+        if query.created_from is not None and (created_at is None or _naive_utc(created_at) < _naive_utc(query.created_from)):
+            return False
+        if query.created_to is not None and (created_at is None or _naive_utc(created_at) >= _naive_utc(query.created_to)):
+            return False
+        return True
+
+    def _scan(self, query: OrderQuery, after: Optional[SortKey]) -> Iterator[Dict[str, Any]]:
+        """Escolhe o índice mais seletivo e percorre só o intervalo pedido, em ordem decrescente."""
+        if query.customer_id is not None:
+            index = self._by_customer.get(query.customer_id)
+        elif query.product_id is not None:
+            index = self._by_product.get(query.product_id)
+        elif query.status is not None:
+            index = self._by_status.get(query.status)
+        else:
+            index = self._by_created_at
+        if index is None:
+            return
+
+        lower = (_naive_utc(query.created_from), MIN_OBJECT_ID) if query.created_from is not None else None
+        upper = (_naive_utc(query.created_to), MIN_OBJECT_ID) if query.created_to is not None else None
+        if after is not None:
+            after = (_naive_utc(after[0]), after[1])
+            if upper is None or after < upper:
+                upper = after
+
+        for key in index.scan_desc(lower, upper):
+            document = self._documents[key[1]]
+            if query.status is not None and document.get("status") != query.status:
+                continue
+            if query.product_id is not None and query.product_id not in _product_ids(document):
+                continue
+            yield document
@@ -0,0 +1,338 @@
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+from src.admission import remaining_ms
+from src.config import db as db_config
+from src.schemas.order import compute_items_total
+from src.storage.base import (
+    DUPLICATE_KEY_ERROR_CODE,
+    OrderQuery,
+    OrderStorage,
+    SortKey,
+    TRANSITION_FIELDS,
+    StatusTransition,
+    UpdatedPair,
+    apply_order_update,
+)
+
+logger = logging.getLogger(__name__)
+
+# Ordenação estável usada na listagem (coberta pelos índices *_created_at_id_*)
+LIST_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+# Expressão de agregação que calcula o total a partir dos itens, equivalente a
+# `compute_items_total` (soma de quantity * price, com 2 casas).
+TOTAL_VALUE_EXPRESSION = {
+    "$round": [
+        {"$sum": {"$map": {"input": "$items", "in": {"$multiply": ["$$this.quantity", "$$this.price"]}}}},
+        2,
+    ]
+}
+
+# Total de um pedido nas agregações: o gravado ou, em documentos antigos (sem o campo,
+# que antes era calculado só na leitura), o calculado a partir dos itens
+ORDER_TOTAL_EXPRESSION = {"$ifNull": ["$total_value", TOTAL_VALUE_EXPRESSION]}
+
+
+def deadline_options(option: str = "max_time_ms") -> Dict[str, Any]:
+    """
+    Limite de tempo da consulta no servidor, derivado do prazo da requisição atual
+    (`maxTimeMS`): o MongoDB interrompe o trabalho que o cliente já abandonou.
+    """
+    timeout_ms = remaining_ms()
+    return {option: timeout_ms} if timeout_ms is not None else {}
+
+
+# Próxima versão do documento (documentos anteriores ao campo estão na versão 1)
+VERSION_INCREMENT_EXPRESSION = {"$add": [{"$ifNull": ["$version", 1]}, 1]}
+
+
+def version_filter(version: int) -> Any:
+    """Condição de igualdade de `version` (documentos anteriores ao campo estão na versão 1)."""
+    return {"$in": [1, None]} if version == 1 else version
+
+
+def build_order_filter(query: OrderQuery, after: Optional[SortKey] = None) -> Dict[str, Any]:
+    """
+    Monta o filtro do MongoDB para a listagem e a exportação (campos cobertos por índices compostos).
+    """
+    mongo_filter: Dict[str, Any] = {}
+    if query.customer_id is not None:
+        mongo_filter["customer_id"] = query.customer_id
+    if query.status is not None:
+        mongo_filter["status"] = query.status
+    if query.product_id is not None:
+        # Índice multikey (items.product_id, created_at, _id)
+        mongo_filter["items.product_id"] = query.product_id
+    if query.created_from is not None or query.created_to is not None:
+        date_range: Dict[str, Any] = {}
+        if query.created_from is not None:
+            date_range["$gte"] = query.created_from
+        if query.created_to is not None:
+            date_range["$lt"] = query.created_to
+        mongo_filter["created_at"] = date_range
+    if after:
+        created_at, object_id = after
+        mongo_filter["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": object_id}},
+        ]
+    return mongo_filter
+
+
+def build_projection(fields: Optional[Sequence[str]], *required: str) -> Optional[Dict[str, int]]:
+    """
+    Converte a lista de campos em uma projeção do MongoDB (None = documento inteiro).
+    O '_id' é sempre retornado; `required` acrescenta campos necessários internamente.
+    """
+    if fields is None:
+        return None
+    projection = {"_id": 1}
+    projection.update({field: 1 for field in (*fields, *required)})
+    return projection
+
+
+def build_update_pipeline(update_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Monta o pipeline de atualização: aplica os campos enviados e incrementa a `version`,
+    de forma atômica. Se `items` mudou, o `total_value` gravado é o calculado por
+    `compute_items_total` (o mesmo de `apply_order_update`), e não um `$round` do servidor,
+    que pode arredondar diferente: o documento derivado do anterior é idêntico ao gravado.
+    """
+    # $literal impede que valores do cliente (ex.: "$campo") sejam interpretados como expressões
+    fields_update: Dict[str, Any] = {field: {"$literal": value} for field, value in update_dict.items()}
+    if "items" in update_dict:
+        fields_update["total_value"] = {"$literal": compute_items_total(update_dict["items"])}
+    fields_update["version"] = VERSION_INCREMENT_EXPRESSION
+    return [{"$set": fields_update}]
+
+
+def build_status_update(new_status: str) -> List[Dict[str, Any]]:
+    """
+    Pipeline de troca de status (o filtro garante que o status muda): grava o novo status
+    e incrementa a `version`.
+    """
+    return [{"$set": {"status": {"$literal": new_status}, "version": VERSION_INCREMENT_EXPRESSION}}]
+
+
+class MongoOrderStorage(OrderStorage):
+    """Armazenamento de pedidos no MongoDB via Motor (backend padrão)."""
+
+    def __init__(self, collection_name: str = db_config.COLLECTION_NAME):
+        self.collection_name = collection_name
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return db_config.get_database()[self.collection_name]
+
+    def is_available(self) -> bool:
+        return db_config.get_database() is not None
+
+    async def has_documents(self) -> bool:
+        return await self.collection.find_one({}, {"_id": 1}) is not None
+
+    async def insert_one(self, document: Dict[str, Any]) -> None:
+        # insert_one preenche o '_id' no próprio dicionário
+        await self.collection.insert_one(document)
+
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> Dict[int, Exception]:
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            errors: Dict[int, Exception] = {}
+            for write_error in e.details.get("writeErrors", []):
+                code = write_error.get("code")
+                error_class = DuplicateKeyError if code == DUPLICATE_KEY_ERROR_CODE else WriteError
+                errors[write_error["index"]] = error_class(write_error.get("errmsg", ""), code, write_error)
+            return errors
+        return {}
+
+    async def replace_one(self, document: Dict[str, Any]) -> None:
+        await self.collection.replace_one({"_id": document["_id"]}, document, upsert=True)
+
+    async def find_by_id(self, object_id: ObjectId, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": object_id}, build_projection(fields), **deadline_options())
+
+    async def find_many(self, object_ids: Sequence[ObjectId], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        # Uma única consulta $in sobre o índice de '_id'
+        cursor_db = self.collection.find(
+            {"_id": {"$in": list(object_ids)}}, build_projection(fields), **deadline_options()
+        )
+        return await cursor_db.to_list(length=len(object_ids))
+
+    async def find_page(
+        self,
+        query: OrderQuery,
+        limit: int,
+        skip: int = 0,
+        after: Optional[SortKey] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        # created_at é a chave do próximo cursor: sempre projetado
+        cursor_db = self.collection.find(
+            build_order_filter(query, after), build_projection(fields, "created_at"), **deadline_options()
+        )
+        cursor_db.sort(LIST_SORT) # Ordena pelo mais recente (desempate por _id)
+        if skip:
+            cursor_db = cursor_db.skip(skip)
+        cursor_db = cursor_db.limit(limit) # Aplica Paginação
+        return await cursor_db.to_list(length=limit)
+
+    async def iter_orders(self, query: OrderQuery, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        cursor_db = self.collection.find(build_order_filter(query), batch_size=batch_size).sort(LIST_SORT)
+        try:
+            async for order_doc in cursor_db:
+                yield order_doc
+        finally:
+            await cursor_db.close()
+
+    async def update(self, object_id: ObjectId, update_dict: Dict[str, Any]) -> Optional[UpdatedPair]:
+        # Leitura, recálculo e escrita em um único round trip. O documento anterior é
+        # retornado pelo servidor; o posterior é derivado dele com os mesmos valores que o
+        # pipeline grava (campos enviados, total calculado no cliente e `version` + 1).
+        previous = await self.collection.find_one_and_update(
+            {"_id": object_id},
+            build_update_pipeline(update_dict),
+            return_document=ReturnDocument.BEFORE,
+        )
+        if previous is None:
+            return None
+        return previous, apply_order_update(previous, update_dict)
+
+    async def set_status_many(self, transitions: Sequence[StatusTransition]) -> List[UpdatedPair]:
+        pairs = [
+            (read_doc, {**read_doc, "status": new_status, "version": read_doc.get("version", 1) + 1})
+            for read_doc, new_status in transitions
+            if read_doc.get("status") != new_status
+        ]
+        if not pairs:
+            return []
+
+        # Condicionadas à versão lida: o documento lido é o anterior de cada pedido alterado
+        requests = [
+            UpdateOne(
+                {"_id": previous["_id"], "version": version_filter(previous.get("version", 1)), "status": previous.get("status")},
+                build_status_update(updated["status"]),
+            )
+            for previous, updated in pairs
+        ]
+        try:
+            result = await self.collection.bulk_write(requests, ordered=False)
+            modified_count = result.modified_count
+        except BulkWriteError as e:
+            # Não ordenado: as demais transições seguem aplicadas (e retornadas para os rollups)
+            logger.error("Erro na transição de status em lote: %s", e.details.get("writeErrors"))
+            modified_count = e.details.get("nModified", 0)
+        if modified_count == len(pairs):
+            return pairs
+
+        # Parte não aplicada (pedido alterado desde a leitura, ou erro): o bulk_write só
+        # informa contagens, então a nova versão de cada pedido indica quais foram alterados
+        current = {
+            order_doc["_id"]: order_doc
+            for order_doc in await self.find_many([previous["_id"] for previous, _ in pairs], fields=("status", "version"))
+        }
+        return [
+            (previous, updated)
+            for previous, updated in pairs
+            if previous["_id"] in current
+            and current[previous["_id"]].get("status") == updated["status"]
+            and current[previous["_id"]].get("version", 1) == updated["version"]
+        ]
+
+    async def set_status_where(
+        self,
+        query: OrderQuery,
+        new_status: str,
+        object_ids: Sequence[ObjectId],
+    ) -> Tuple[int, float]:
+        if not object_ids:
+            return 0, 0.0
+        status_filter = build_order_filter(query)
+        status_filter["_id"] = {"$in": list(object_ids)}
+        summary = await self.collection.aggregate([
+            {"$match": status_filter},
+            {"$group": {"_id": None, "count": {"$sum": 1}, "revenue": {"$sum": ORDER_TOTAL_EXPRESSION}}},
+        ]).to_list(length=1)
+        count, revenue = (summary[0]["count"], summary[0]["revenue"]) if summary else (0, 0.0)
+
+        result = await self.collection.update_many(status_filter, build_status_update(new_status))
+        if result.modified_count != count:
+            # Pedidos alterados por outra escrita entre o $group e o update_many
+            logger.warning(
+                "Transição de status por filtro alterou %d pedidos, %d somados na receita (corrija com o rebuild).",
+                result.modified_count, count,
+            )
+        return result.modified_count, revenue
+
+    async def summarize_products(
+        self,
+        query: OrderQuery,
+        product_ids: Optional[Sequence[int]],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        order_filter = build_order_filter(query)
+        item_filter: Dict[str, Any] = {}
+        if product_ids is not None:
+            order_filter["items.product_id"] = {"$in": list(product_ids)}
+            item_filter["items.product_id"] = {"$in": list(product_ids)}
+
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": order_filter},
+            {"$project": {"items.product_id": 1, "items.quantity": 1, "items.price": 1}},
+            {"$unwind": "$items"},
+        ]
+        if item_filter:
+            pipeline.append({"$match": item_filter})
+        pipeline += [
+            # Primeiro por (pedido, produto): um produto repetido no mesmo pedido conta uma vez
+            {"$group": {
+                "_id": {"order": "$_id", "product": "$items.product_id"},
+                "quantity": {"$sum": "$items.quantity"},
+                "revenue": {"$sum": {"$multiply": ["$items.quantity", "$items.price"]}},
+            }},
+            {"$group": {
+                "_id": "$_id.product",
+                "order_count": {"$sum": 1},
+                "quantity": {"$sum": "$quantity"},
+                "revenue": {"$sum": "$revenue"},
+            }},
+            {"$sort": {"revenue": -1, "_id": 1}},
+            {"$limit": limit},
+            {"$project": {
+                "_id": 0, "product_id": "$_id", "order_count": 1, "quantity": 1,
+                "revenue": {"$round": ["$revenue", 2]},
+            }},
+        ]
+        return await self.collection.aggregate(
+            pipeline, allowDiskUse=True, **deadline_options("maxTimeMS")
+        ).to_list(length=limit)
+
+    async def delete(self, object_id: ObjectId) -> Optional[Dict[str, Any]]:
+        # Retorna o documento excluído (usado na manutenção incremental dos rollups)
+        return await self.collection.find_one_and_delete({"_id": object_id})
+
+    async def delete_many(
+        self,
+        object_ids: Sequence[ObjectId],
+        query: OrderQuery = OrderQuery(),
+        versions: Optional[Sequence[int]] = None,
+    ) -> int:
+        if not object_ids:
+            return 0
+        delete_filter = build_order_filter(query)
+        if versions is None:
+            delete_filter["_id"] = {"$in": list(object_ids)}
+        else:
+            # Um ramo por pedido, cada um resolvido pelo índice de '_id'
+            delete_filter["$or"] = [
+                {"_id": object_id, "version": version_filter(version)}
+                for object_id, version in zip(object_ids, versions)
+            ]
+        result = await self.collection.delete_many(delete_filter)
+        return result.deleted_count
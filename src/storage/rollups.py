@@ -0,0 +1,257 @@
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DESCENDING, UpdateOne
+
+from src.config import db as db_config
+from src.storage.base import order_total
+from src.storage.mongo import ORDER_TOTAL_EXPRESSION
+
+# Dimensões agregadas: receita e quantidade de pedidos por dia, por cliente e por status
+ROLLUP_DIMENSIONS = ("daily", "customer", "status")
+
+# Coleções de rollup no MongoDB (uma por dimensão)
+ROLLUP_COLLECTIONS = {
+    "daily": "orders_rollup_daily",
+    "customer": "orders_rollup_customer",
+    "status": "orders_rollup_status",
+}
+
+# (dimensão, chave) -> (delta de order_count, delta de revenue)
+RollupDeltas = Dict[Tuple[str, Any], Tuple[int, float]]
+
+
+def _day_key(created_at: Any) -> Optional[str]:
+    if isinstance(created_at, (datetime, date)):
+        return created_at.strftime("%Y-%m-%d")
+    return None
+
+
+def order_rollup_keys(document: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """Chaves de rollup às quais um pedido contribui (dia de criação, cliente e status)."""
+    return [
+        ("daily", _day_key(document.get("created_at"))),
+        ("customer", document.get("customer_id")),
+        ("status", document.get("status", "PENDING")),
+    ]
+
+
+def compute_rollup_deltas(
+    before: Iterable[Dict[str, Any]] = (),
+    after: Iterable[Dict[str, Any]] = (),
+) -> RollupDeltas:
+    """
+    Diferença entre as contribuições dos documentos `after` e `before`.
+
+    Create: só `after`; delete: só `before`; update: os dois (um PATCH que muda só o
+    total gera apenas um delta de receita; um que muda o status move o pedido de chave).
+    Deltas nulos são descartados.
+    """
+    deltas: Dict[Tuple[str, Any], List[float]] = defaultdict(lambda: [0, 0.0])
+    for sign, documents in ((-1, before), (1, after)):
+        for document in documents:
+            revenue = order_total(document)
+            for key in order_rollup_keys(document):
+                deltas[key][0] += sign
+                deltas[key][1] += sign * revenue
+    return {
+        key: (int(count), revenue)
+        for key, (count, revenue) in deltas.items()
+        if key[1] is not None and (count or round(revenue, 2))
+    }
+
+
+def status_move_deltas(old_status: str, new_status: str, count: int, revenue: float) -> RollupDeltas:
+    """Deltas de `count` pedidos (com receita `revenue`) trocando de status: dia e cliente não mudam."""
+    if not count or old_status == new_status:
+        return {}
+    return {("status", old_status): (-count, -revenue), ("status", new_status): (count, revenue)}
+
+
+class RollupStore(ABC):
+    """
+    Agregados pré-computados de pedidos (receita e contagem por dia, cliente e status),
+    mantidos incrementalmente pela camada CRUD e lidos em O(1) por chave.
+    """
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Indica se o backend está pronto para receber operações."""
+
+    @abstractmethod
+    async def apply(self, deltas: RollupDeltas) -> None:
+        """Aplica os deltas de forma incremental (um $inc por chave)."""
+
+    @abstractmethod
+    async def find(
+        self,
+        dimension: str,
+        key_from: Any = None,
+        key_to: Any = None,
+        keys: Optional[List[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Lê os agregados de uma dimensão, ordenados pela chave.
+
+        :param key_from: Limite inferior inclusivo da chave.
+        :param key_to: Limite superior inclusivo da chave.
+        :param keys: Chaves específicas (ignora o intervalo).
+        """
+
+    @abstractmethod
+    async def top(self, dimension: str, limit: int) -> List[Dict[str, Any]]:
+        """Retorna as `limit` chaves de maior receita da dimensão."""
+
+    @abstractmethod
+    async def rebuild(self, orders: AsyncIterator[Dict[str, Any]], include_archive: bool) -> Dict[str, int]:
+        """
+        Recalcula todos os agregados a partir dos pedidos armazenados.
+
+        :param orders: Pedidos das camadas consultadas (backends que agregam no servidor não o percorrem).
+        :param include_archive: Se os pedidos arquivados entram na conta.
+        :return: Quantidade de chaves por dimensão após a reconstrução.
+        """
+
+
+def _rollup_output(key: Any, order_count: int, revenue: float) -> Dict[str, Any]:
+    # Somas sucessivas de float acumulam erro: arredonda na leitura
+    return {"key": key, "order_count": order_count, "revenue": round(revenue, 2)}
+
+
+class MongoRollupStore(RollupStore):
+    """Rollups em coleções do MongoDB, atualizados com `$inc` e reconstruídos com `$group`/`$merge`."""
+
+    def _collection(self, dimension: str):
+        return db_config.get_database()[ROLLUP_COLLECTIONS[dimension]]
+
+    def is_available(self) -> bool:
+        return db_config.get_database() is not None
+
+    async def apply(self, deltas: RollupDeltas) -> None:
+        now = datetime.utcnow()
+        operations: Dict[str, List[UpdateOne]] = defaultdict(list)
+        for (dimension, key), (count, revenue) in deltas.items():
+            operations[dimension].append(UpdateOne(
+                {"_id": key},
+                {"$inc": {"order_count": count, "revenue": revenue}, "$set": {"updated_at": now}},
+                upsert=True,
+            ))
+        for dimension, requests in operations.items():
+            await self._collection(dimension).bulk_write(requests, ordered=False)
+
+    async def find(
+        self,
+        dimension: str,
+        key_from: Any = None,
+        key_to: Any = None,
+        keys: Optional[List[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        rollup_filter: Dict[str, Any] = {}
+        if keys is not None:
+            rollup_filter["_id"] = {"$in": keys}
+        elif key_from is not None or key_to is not None:
+            key_range: Dict[str, Any] = {}
+            if key_from is not None:
+                key_range["$gte"] = key_from
+            if key_to is not None:
+                key_range["$lte"] = key_to
+            rollup_filter["_id"] = key_range
+
+        cursor_db = self._collection(dimension).find(rollup_filter).sort("_id")
+        return [
+            _rollup_output(doc["_id"], doc.get("order_count", 0), doc.get("revenue", 0.0))
+            async for doc in cursor_db
+            if doc.get("order_count", 0) > 0
+        ]
+
+    async def top(self, dimension: str, limit: int) -> List[Dict[str, Any]]:
+        cursor_db = self._collection(dimension).find({"order_count": {"$gt": 0}})
+        cursor_db = cursor_db.sort("revenue", DESCENDING).limit(limit) # Coberto por revenue_desc_index
+        return [
+            _rollup_output(doc["_id"], doc.get("order_count", 0), doc.get("revenue", 0.0))
+            async for doc in cursor_db
+        ]
+
+    async def rebuild(self, orders: AsyncIterator[Dict[str, Any]], include_archive: bool) -> Dict[str, int]:
+        # O recálculo roda inteiro no servidor; `orders` não é percorrido neste backend
+        database = db_config.get_database()
+        # Marca desta execução: independe dos relógios do cliente e do servidor
+        run = ObjectId()
+        group_keys = {
+            "daily": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+            "customer": "$customer_id",
+            "status": {"$ifNull": ["$status", "PENDING"]},
+        }
+
+        counts: Dict[str, int] = {}
+        for dimension, group_key in group_keys.items():
+            collection_name = ROLLUP_COLLECTIONS[dimension]
+            # Pedidos arquivados continuam contando nos agregados
+            pipeline = [{"$unionWith": db_config.ARCHIVE_COLLECTION_NAME}] if include_archive else []
+            pipeline += [
+                {"$group": {"_id": group_key, "order_count": {"$sum": 1}, "revenue": {"$sum": ORDER_TOTAL_EXPRESSION}}},
+                {"$set": {"updated_at": "$$NOW", "run": run}},
+                {"$merge": {"into": collection_name, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+            ]
+            await database[db_config.COLLECTION_NAME].aggregate(pipeline).to_list(length=None)
+            # Chaves que não aparecem mais nos pedidos não foram tocadas pelo $merge
+            await database[collection_name].delete_many({"run": {"$ne": run}})
+            counts[dimension] = await database[collection_name].count_documents({})
+        return counts
+
+
+class InMemoryRollupStore(RollupStore):
+    """Rollups em dicionários, usados com o backend de armazenamento em memória."""
+
+    def __init__(self):
+        self._rollups: Dict[str, Dict[Any, List[float]]] = {dimension: {} for dimension in ROLLUP_DIMENSIONS}
+
+    def is_available(self) -> bool:
+        return True
+
+    async def apply(self, deltas: RollupDeltas) -> None:
+        for (dimension, key), (count, revenue) in deltas.items():
+            totals = self._rollups[dimension].setdefault(key, [0, 0.0])
+            totals[0] += count
+            totals[1] += revenue
+
+    async def find(
+        self,
+        dimension: str,
+        key_from: Any = None,
+        key_to: Any = None,
+        keys: Optional[List[Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        rollup = self._rollups[dimension]
+        if keys is not None:
+            selected = [key for key in keys if key in rollup]
+        else:
+            selected = [
+                key for key in rollup
+                if (key_from is None or key >= key_from) and (key_to is None or key <= key_to)
+            ]
+        return [
+            _rollup_output(key, int(rollup[key][0]), rollup[key][1])
+            for key in sorted(selected)
+            if rollup[key][0] > 0
+        ]
+
+    async def top(self, dimension: str, limit: int) -> List[Dict[str, Any]]:
+        rollup = self._rollups[dimension]
+        ranked = sorted((key for key in rollup if rollup[key][0] > 0), key=lambda key: rollup[key][1], reverse=True)
+        return [_rollup_output(key, int(rollup[key][0]), rollup[key][1]) for key in ranked[:limit]]
+
+    async def rebuild(self, orders: AsyncIterator[Dict[str, Any]], include_archive: bool) -> Dict[str, int]:
+        self._rollups = {dimension: {} for dimension in ROLLUP_DIMENSIONS}
+        batch: List[Dict[str, Any]] = []
+        async for document in orders:
+            batch.append(document)
+            if len(batch) >= 1000:
+                await self.apply(compute_rollup_deltas(after=batch))
+                batch = []
+        if batch:
+            await self.apply(compute_rollup_deltas(after=batch))
+        return {dimension: len(rollup) for dimension, rollup in self._rollups.items()}
@@ -0,0 +1,44 @@
+"""
+Fixtures dos testes: a API roda no próprio processo (httpx + ASGITransport) sobre o
+backend de armazenamento em memória, recriado a cada teste (sem MongoDB).
+"""
+import os
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+import httpx
+import pytest
+
+from src.archival import order_archiver
+from src.config.storage import configure_storage
+from src.crud.orders import clear_order_cache
+from src.main import app
+from src.security import create_access_token
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+async def memory_storage(anyio_backend):
+    """Camadas quente e fria e rollups vazios, cache de pedidos limpo e arquivo fora das leituras."""
+    storage = configure_storage("memory")
+    await clear_order_cache()
+    order_archiver.reads_archive = False
+    order_archiver.configure(after_days=90, statuses=["DELIVERED"], batch_size=2, interval_seconds=3600)
+    return storage
+
+
+@pytest.fixture
+def auth_headers():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'tests'})}"}
+
+
+@pytest.fixture
+async def client():
+    # Sem lifespan: os hooks de startup (MongoDB, change stream, arquivamento) não rodam
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        yield async_client
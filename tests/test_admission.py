@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from pymongo.errors import ExecutionTimeout
+
+from src.admission import AdmissionLimiter, AdmissionMiddleware, remaining_ms, request_deadline_var
+
+pytestmark = pytest.mark.anyio
+
+
+def admission_client(app, **options):
+    middleware = AdmissionMiddleware(app, {"read": AdmissionLimiter("read", max_concurrent=1, max_queue=0)}, **options)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://test")
+
+
+async def test_request_over_the_limit_is_shed_with_retry_after():
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        started.set()
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async with admission_client(slow_app, retry_after_seconds=3) as client:
+        admitted = asyncio.ensure_future(client.get("/orders/"))
+        await started.wait()
+        shed = await client.get("/orders/")
+        release.set()
+
+        assert (await admitted).status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "3"
+    assert shed.json()["reason"] == "queue_full"
+
+
+async def test_zero_timeout_is_an_expired_deadline():
+    remaining = []
+
+    async def app(scope, receive, send):
+        try:
+            remaining.append(remaining_ms())
+        except ExecutionTimeout:
+            remaining.append("expired")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async with admission_client(app) as client:
+        await client.get("/orders/", headers={"X-Request-Timeout-Ms": "0"})
+        await client.get("/orders/", headers={"X-Request-Timeout-Ms": "60000"})
+        await client.get("/orders/")
+
+    assert remaining[0] == "expired"
+    assert 0 < remaining[1] <= 60000
+    assert remaining[2] is None
+
+
+async def test_remaining_ms_raises_after_the_deadline():
+    token = request_deadline_var.set(time.monotonic() - 0.01)
+    try:
+        with pytest.raises(ExecutionTimeout):
+            remaining_ms()
+    finally:
+        request_deadline_var.reset(token)
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from src.archival import order_archiver
+from src.config.storage import get_archive_storage, get_storage
+from src.storage.base import OrderQuery
+
+pytestmark = pytest.mark.anyio
+
+
+def old_order(days_ago: int = 200, status: str = "DELIVERED", version: int = 1, **extra):
+    return {
+        "_id": ObjectId(),
+        "customer_id": 1,
+        "items": [{"product_id": 7, "quantity": 1, "price": 10.0}],
+        "total_value": 10.0,
+        "created_at": datetime.utcnow() - timedelta(days=days_ago),
+        "status": status,
+        "version": version,
+        **extra,
+    }
+
+
+async def test_run_moves_eligible_orders_and_is_idempotent():
+    hot, archive = get_storage(), get_archive_storage()
+    eligible = [old_order() for _ in range(3)]
+    kept = [old_order(status="PENDING"), old_order(days_ago=10)]
+    for order_doc in eligible + kept:
+        await hot.insert_one(order_doc)
+
+    assert await order_archiver.run_once() == 3
+    assert await order_archiver.run_once() == 0
+
+    eligible_ids = [order_doc["_id"] for order_doc in eligible]
+    assert await hot.find_many(eligible_ids) == []
+    assert len(await archive.find_many(eligible_ids)) == 3
+    assert len(await hot.find_many([order_doc["_id"] for order_doc in kept])) == 2
+    assert order_archiver.reads_archive
+
+
+async def test_interrupted_run_replaces_stale_archive_copy():
+    hot, archive = get_storage(), get_archive_storage()
+    order_doc = old_order(version=2, shipping_address="Rua Nova, 2")
+    # Cópia de uma execução interrompida, anterior a um PATCH
+    await archive.insert_one({**order_doc, "version": 1, "shipping_address": "Rua Velha, 1"})
+    await hot.insert_one(order_doc)
+
+    assert await order_archiver.run_once() == 1
+
+    archived = await archive.find_by_id(order_doc["_id"])
+    assert (archived["version"], archived["shipping_address"]) == (2, "Rua Nova, 2")
+    assert await hot.find_by_id(order_doc["_id"]) is None
+
+
+async def test_order_changed_after_copy_stays_hot():
+    hot, archive = get_storage(), get_archive_storage()
+    order_doc = old_order(version=3)
+    await hot.insert_one(order_doc)
+    stale_batch = [{**order_doc, "version": 2}] # Lido antes de um PATCH concorrente
+
+    query = OrderQuery(status="DELIVERED", created_to=order_archiver.horizon())
+    moved = await order_archiver._move_batch(hot, archive, stale_batch, query)
+
+    assert moved == 0
+    assert (await hot.find_by_id(order_doc["_id"]))["version"] == 3
+    assert await archive.find_by_id(order_doc["_id"]) is None
+
+
+async def test_reads_fall_through_to_archive(client):
+    archived_doc, recent_doc = old_order(), old_order(days_ago=1, status="PENDING")
+    await get_storage().insert_one(archived_doc)
+    await get_storage().insert_one(recent_doc)
+    await order_archiver.run_once()
+
+    response = await client.get(f"/orders/{archived_doc['_id']}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "DELIVERED"
+
+    listed = await client.get("/orders/", params={"limit": 1, "skip": 1})
+    assert [order["id"] for order in listed.json()] == [str(archived_doc["_id"])]
+
+
+async def test_reads_skip_archive_until_enabled(client):
+    order_doc = old_order()
+    await get_archive_storage().insert_one(order_doc)
+
+    assert (await client.get(f"/orders/{order_doc['_id']}")).status_code == 404
+
+    await order_archiver.configure_reads(archive_enabled=False) # O arquivo não está vazio
+    assert (await client.get(f"/orders/{order_doc['_id']}")).status_code == 200
+
+
+async def test_delete_before_copy_discards_archive_copy():
+    hot, archive = get_storage(), get_archive_storage()
+    order_doc = old_order()
+    batch = [dict(order_doc)] # Lido pelo arquivamento antes do DELETE
+
+    query = OrderQuery(status="DELIVERED", created_to=order_archiver.horizon())
+    assert await order_archiver._move_batch(hot, archive, batch, query) == 0
+    assert await archive.find_by_id(order_doc["_id"]) is None
+
+
+async def test_delete_after_copy_removes_archive_copy(client, monkeypatch):
+    hot, archive = get_storage(), get_archive_storage()
+    order_doc = old_order()
+    await hot.insert_one(order_doc)
+    insert_many = archive.insert_many
+
+    async def insert_many_then_delete(documents):
+        errors = await insert_many(documents)
+        assert (await client.delete(f"/orders/{order_doc['_id']}")).status_code == 204
+        return errors
+
+    monkeypatch.setattr(archive, "insert_many", insert_many_then_delete)
+    assert await order_archiver.run_once() == 0
+
+    assert await hot.find_by_id(order_doc["_id"]) is None
+    assert await archive.find_by_id(order_doc["_id"]) is None
+    assert (await client.get(f"/orders/{order_doc['_id']}")).status_code == 404
+
+
+async def test_status_transition_by_id_reaches_archived_orders(client, auth_headers):
+    order_doc = old_order()
+    await get_storage().insert_one(order_doc)
+    await order_archiver.run_once()
+
+    response = await client.post(
+        "/orders/status/batch",
+        json={"transitions": [{"id": str(order_doc["_id"]), "status": "REFUNDED"}]},
+        headers=auth_headers,
+    )
+
+    assert (response.json()["matched_count"], response.json()["modified_count"]) == (1, 1)
+    assert response.json()["missing"] == []
+    assert (await client.get(f"/orders/{order_doc['_id']}")).json()["status"] == "REFUNDED"
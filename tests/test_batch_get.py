@@ -0,0 +1,32 @@
+import pytest
+from bson import ObjectId
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_batch_get_keeps_request_order_and_reports_missing(client, auth_headers):
+    response = await client.post(
+        "/orders/bulk",
+        json=[{"customer_id": i, "items": [{"product_id": 7, "quantity": 1, "price": 10.0}]} for i in range(3)],
+        headers=auth_headers,
+    )
+    created_ids = [result["id"] for result in response.json()["results"]]
+    unknown_id = str(ObjectId())
+    requested = [created_ids[2], unknown_id, created_ids[0], "invalid"]
+
+    response = await client.post("/orders/batch-get", json={"ids": requested})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [order["id"] for order in body["orders"]] == [created_ids[2], created_ids[0]]
+    assert (body["missing"], body["invalid"]) == ([unknown_id], ["invalid"])
+
+
+async def test_batch_get_applies_fields(client, auth_headers):
+    order = (await client.post(
+        "/orders/", json={"customer_id": 5, "items": [{"product_id": 7, "quantity": 1, "price": 10.0}]}, headers=auth_headers,
+    )).json()
+
+    response = await client.post("/orders/batch-get", params={"fields": "id,customer_id"}, json={"ids": [order["id"]]})
+
+    assert response.json()["orders"] == [{"id": order["id"], "customer_id": 5}]
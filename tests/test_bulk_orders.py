@@ -0,0 +1,34 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def make_order(customer_id: int):
+    return {"customer_id": customer_id, "items": [{"product_id": 7, "quantity": 1, "price": 10.0}]}
+
+
+async def test_bulk_reports_each_item_in_request_order(client, auth_headers):
+    invalid = {"customer_id": 3, "items": []}
+    response = await client.post("/orders/bulk", json=[make_order(1), invalid, make_order(2)], headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["inserted_count"] == 2
+    assert body["failed_count"] == 1
+    assert [result["index"] for result in body["results"]] == [0, 1, 2]
+    assert [result["status"] for result in body["results"]] == ["created", "error", "created"]
+
+    created = await client.get(f"/orders/{body['results'][2]['id']}")
+    assert created.json()["customer_id"] == 2
+
+
+async def test_bulk_accepts_ndjson(client, auth_headers):
+    lines = b'{"customer_id": 1, "items": [{"product_id": 1, "quantity": 2, "price": 5}]}\n' * 3
+    response = await client.post(
+        "/orders/bulk",
+        content=lines,
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["inserted_count"] == 3
@@ -0,0 +1,49 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def make_order(customer_id: int):
+    return {"customer_id": customer_id, "items": [{"product_id": 7, "quantity": 1, "price": 10.0}]}
+
+
+async def test_get_order_honours_if_none_match(client, auth_headers):
+    order = (await client.post("/orders/", json=make_order(1), headers=auth_headers)).json()
+    first = await client.get(f"/orders/{order['id']}")
+    etag = first.headers["ETag"]
+    assert etag == 'W/"v1"'
+    assert (await client.get(f"/orders/{order['id']}")).headers["ETag"] == etag # Lido do cache
+
+    not_modified = await client.get(f"/orders/{order['id']}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+    patched = await client.patch(f"/orders/{order['id']}", json={"status": "PAID"}, headers=auth_headers)
+    assert patched.headers["ETag"] == 'W/"v2"'
+    modified = await client.get(f"/orders/{order['id']}", headers={"If-None-Match": etag})
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] == 'W/"v2"'
+
+
+async def test_partial_read_etag_depends_on_fields(client, auth_headers):
+    order = (await client.post("/orders/", json=make_order(1), headers=auth_headers)).json()
+    await client.get(f"/orders/{order['id']}") # Pedido completo em cache
+
+    with_version = await client.get(f"/orders/{order['id']}", params={"fields": "id,version"})
+    without_version = await client.get(f"/orders/{order['id']}", params={"fields": "id,status"})
+
+    assert with_version.headers["ETag"] == 'W/"v1.id+version"'
+    assert "ETag" not in without_version.headers
+
+
+async def test_list_page_honours_if_none_match(client, auth_headers):
+    response = await client.post("/orders/bulk", json=[make_order(i) for i in range(5)], headers=auth_headers)
+    created_ids = [result["id"] for result in response.json()["results"]]
+    etag = (await client.get("/orders/", params={"limit": 5})).headers["ETag"]
+
+    not_modified = await client.get("/orders/", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+
+    await client.patch(f"/orders/{created_ids[0]}", json={"status": "PAID"}, headers=auth_headers)
+    modified = await client.get("/orders/", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert modified.status_code == 200
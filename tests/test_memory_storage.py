@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from src.storage.base import OrderQuery
+from src.storage.memory import InMemoryOrderStorage
+
+pytestmark = pytest.mark.anyio
+
+
+def make_document(customer_id: int, minutes: int, status: str = "PENDING", product_id: int = 7):
+    return {
+        "_id": ObjectId(),
+        "customer_id": customer_id,
+        "items": [{"product_id": product_id, "quantity": 1, "price": 10.0}],
+        "total_value": 10.0,
+        "created_at": datetime(2025, 1, 1) + timedelta(minutes=minutes),
+        "status": status,
+        "version": 1,
+    }
+
+
+async def test_find_page_filters_through_indexes_newest_first():
+    storage = InMemoryOrderStorage()
+    documents = [
+        make_document(1, 0),
+        make_document(2, 1),
+        make_document(1, 2, status="PAID"),
+        make_document(1, 3, product_id=9),
+    ]
+    for document in documents:
+        await storage.insert_one(document)
+
+    page = await storage.find_page(OrderQuery(customer_id=1), limit=10)
+    assert [document["_id"] for document in page] == [documents[3]["_id"], documents[2]["_id"], documents[0]["_id"]]
+
+    by_status_and_product = await storage.find_page(OrderQuery(status="PENDING", product_id=7), limit=10)
+    assert [document["_id"] for document in by_status_and_product] == [documents[1]["_id"], documents[0]["_id"]]
+
+
+async def test_find_page_resumes_after_keyset_and_projects_fields():
+    storage = InMemoryOrderStorage()
+    for minutes in range(5):
+        await storage.insert_one(make_document(1, minutes))
+
+    first = await storage.find_page(OrderQuery(), limit=2, fields=("status",))
+    after = (first[-1]["created_at"], first[-1]["_id"])
+    second = await storage.find_page(OrderQuery(), limit=2, after=after)
+
+    assert set(first[0]) == {"_id", "created_at", "status"}
+    assert [document["created_at"].minute for document in first + second] == [4, 3, 2, 1]
+
+
+async def test_status_update_moves_document_between_indexes():
+    storage = InMemoryOrderStorage()
+    document = make_document(1, 0)
+    await storage.insert_one(document)
+
+    await storage.update(document["_id"], {"status": "PAID"})
+
+    assert await storage.find_page(OrderQuery(status="PENDING"), limit=10) == []
+    assert len(await storage.find_page(OrderQuery(status="PAID"), limit=10)) == 1
+
+
+async def test_duplicate_ids_raise_like_mongo():
+    storage = InMemoryOrderStorage()
+    document = make_document(1, 0)
+    await storage.insert_one(document)
+
+    with pytest.raises(DuplicateKeyError):
+        await storage.insert_one(dict(document))
+    errors = await storage.insert_many([make_document(2, 1), dict(document)])
+    assert list(errors) == [1]
@@ -0,0 +1,49 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def make_order(customer_id: int):
+    return {"customer_id": customer_id, "items": [{"product_id": 7, "quantity": 1, "price": 10.0}]}
+
+
+async def create_orders(client, auth_headers, count: int):
+    response = await client.post("/orders/bulk", json=[make_order(i) for i in range(count)], headers=auth_headers)
+    assert response.status_code == 200
+    return [result["id"] for result in response.json()["results"]]
+
+
+async def test_cursor_pages_cover_every_order_once(client, auth_headers):
+    created_ids = await create_orders(client, auth_headers, 25)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/orders/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(order["id"] for order in page)
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert sorted(seen) == sorted(created_ids)
+    assert len(set(seen)) == len(seen)
+    created_at = [order["created_at"] for order in (await client.get("/orders/", params={"limit": 25})).json()]
+    assert created_at == sorted(created_at, reverse=True)
+
+
+async def test_filters_narrow_the_page(client, auth_headers):
+    await create_orders(client, auth_headers, 3)
+
+    response = await client.get("/orders/", params={"customer_id": 1})
+
+    assert [order["customer_id"] for order in response.json()] == [1]
+
+
+async def test_invalid_cursor_is_rejected(client):
+    response = await client.get("/orders/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
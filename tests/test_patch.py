@@ -0,0 +1,31 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def make_order(customer_id: int):
+    return {"customer_id": customer_id, "items": [{"product_id": 7, "quantity": 1, "price": 10.0}]}
+
+
+async def test_patch_bumps_version_and_recomputes_total(client, auth_headers):
+    order = (await client.post("/orders/", json=make_order(1), headers=auth_headers)).json()
+    assert order["version"] == 1
+    assert (await client.get(f"/orders/{order['id']}")).json()["version"] == 1 # Fica em cache
+
+    response = await client.patch(
+        f"/orders/{order['id']}",
+        json={"items": [{"product_id": 7, "quantity": 3, "price": 2.5}]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.json()["total_value"] == 7.5
+    current = (await client.get(f"/orders/{order['id']}")).json()
+    assert (current["version"], current["total_value"]) == (2, 7.5)
+
+
+async def test_patch_unknown_order_returns_404(client, auth_headers):
+    response = await client.patch("/orders/000000000000000000000000", json={"status": "PAID"}, headers=auth_headers)
+
+    assert response.status_code == 404
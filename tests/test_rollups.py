@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from src.config.storage import get_storage
+from src.crud.analytics import get_customer_revenue, get_status_revenue, rebuild_rollups
+
+pytestmark = pytest.mark.anyio
+
+
+def make_order(customer_id: int, quantity: int, price: float):
+    return {"customer_id": customer_id, "items": [{"product_id": 7, "quantity": quantity, "price": price}]}
+
+
+async def test_rebuild_matches_incremental_rollups(client, auth_headers):
+    created = [
+        (await client.post("/orders/", json=make_order(customer_id, quantity, 2.5), headers=auth_headers)).json()
+        for customer_id, quantity in ((1, 2), (1, 4), (2, 1))
+    ]
+    await client.patch(f"/orders/{created[0]['id']}", json={"status": "PAID"}, headers=auth_headers)
+    await client.delete(f"/orders/{created[2]['id']}", headers=auth_headers)
+
+    incremental = (await get_customer_revenue(1), await get_customer_revenue(2), await get_status_revenue())
+    assert incremental[0] == {"key": 1, "order_count": 2, "revenue": 15.0}
+    assert incremental[1] is None
+
+    await rebuild_rollups()
+
+    assert (await get_customer_revenue(1), await get_customer_revenue(2), await get_status_revenue()) == incremental
+
+
+async def test_rebuild_counts_orders_without_total_value():
+    # Pedido legado, gravado antes de `total_value` existir
+    await get_storage().insert_one({
+        "_id": ObjectId(),
+        "customer_id": 9,
+        "items": [{"product_id": 1, "quantity": 3, "price": 4.0}, {"product_id": 2, "quantity": 1, "price": 0.5}],
+        "created_at": datetime(2024, 1, 15),
+        "status": "DELIVERED",
+    })
+
+    await rebuild_rollups()
+
+    assert await get_customer_revenue(9) == {"key": 9, "order_count": 1, "revenue": 12.5}
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from src.config.storage import get_storage
+from src.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiting = [asyncio.ensure_future(flights.do("key", load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiting) == [1] * 5
+    assert flights.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+async def test_forget_starts_a_new_execution_for_later_callers():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    results = iter(["before", "after"])
+
+    async def load():
+        value = next(results)
+        await release.wait()
+        return value
+
+    early = asyncio.ensure_future(flights.do(("order", "1"), load))
+    await asyncio.sleep(0)
+    assert flights.forget(lambda key: key[1] == "1") == 1
+    late = asyncio.ensure_future(flights.do(("order", "1"), load))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert (await early, await late) == ("before", "after")
+    assert flights.stats()["executions"] == 2
+
+
+async def test_get_after_patch_does_not_join_a_read_started_before_it(client, auth_headers, monkeypatch):
+    order = (await client.post(
+        "/orders/", json={"customer_id": 1, "items": [{"product_id": 7, "quantity": 1, "price": 10.0}]}, headers=auth_headers,
+    )).json()
+    storage = get_storage()
+    find_by_id = storage.find_by_id
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_read(object_id, fields=None):
+        order_doc = await find_by_id(object_id, fields)
+        started.set()
+        await release.wait()
+        return order_doc
+
+    monkeypatch.setattr(storage, "find_by_id", slow_read)
+    stale_read = asyncio.ensure_future(client.get(f"/orders/{order['id']}"))
+    await started.wait() # Leitura iniciada antes do PATCH, concluída depois dele
+
+    await client.patch(f"/orders/{order['id']}", json={"status": "PAID"}, headers=auth_headers)
+    fresh_read = asyncio.ensure_future(client.get(f"/orders/{order['id']}"))
+    await asyncio.sleep(0.05)
+    release.set()
+
+    assert (await stale_read).json()["version"] == 1
+    assert (await fresh_read).json()["version"] == 2
@@ -0,0 +1,83 @@
+import pytest
+from bson import ObjectId
+
+from src.config.storage import get_storage
+from src.crud.analytics import get_status_revenue, rebuild_rollups
+from src.crud.orders import transition_orders_status_where
+from src.storage.base import TRANSITION_FIELDS, OrderQuery
+
+pytestmark = pytest.mark.anyio
+
+
+def make_order(customer_id: int, price: float):
+    return {"customer_id": customer_id, "items": [{"product_id": 7, "quantity": 1, "price": price}]}
+
+
+async def create_orders(client, auth_headers, prices):
+    response = await client.post(
+        "/orders/bulk", json=[make_order(i, price) for i, price in enumerate(prices)], headers=auth_headers,
+    )
+    return [result["id"] for result in response.json()["results"]]
+
+
+async def status_revenue():
+    return {row["key"]: (row["order_count"], row["revenue"]) for row in await get_status_revenue()}
+
+
+async def test_transition_is_skipped_when_order_changed_since_read(client, auth_headers):
+    [order_id] = await create_orders(client, auth_headers, [10.0])
+    storage = get_storage()
+    read_doc = await storage.find_by_id(ObjectId(order_id), fields=TRANSITION_FIELDS)
+
+    await client.patch(f"/orders/{order_id}", json={"status": "CANCELLED"}, headers=auth_headers)
+
+    assert await storage.set_status_many([(read_doc, "PAID")]) == []
+    assert (await storage.find_by_id(ObjectId(order_id)))["status"] == "CANCELLED"
+
+
+async def test_batch_transition_reports_and_records_only_modified_orders(client, auth_headers):
+    paid_id, pending_id = await create_orders(client, auth_headers, [10.0, 4.0])
+    await client.patch(f"/orders/{paid_id}", json={"status": "PAID"}, headers=auth_headers)
+
+    response = await client.post(
+        "/orders/status/batch",
+        json={"transitions": [
+            {"id": paid_id, "status": "PAID"},
+            {"id": pending_id, "status": "PAID"},
+            {"id": str(ObjectId()), "status": "PAID"},
+            {"id": "invalid", "status": "PAID"},
+        ]},
+        headers=auth_headers,
+    )
+
+    body = response.json()
+    assert (body["matched_count"], body["modified_count"]) == (2, 1)
+    assert len(body["missing"]) == 1 and body["invalid"] == ["invalid"]
+    assert await status_revenue() == {"PAID": (2, 14.0)}
+    assert (await client.get(f"/orders/{pending_id}")).json()["version"] == 2
+
+
+async def test_filter_transition_pages_while_statuses_move(client, auth_headers, monkeypatch):
+    order_ids = await create_orders(client, auth_headers, [1.0, 2.0, 3.0, 4.0, 5.0])
+    storage = get_storage()
+    set_status_where = storage.set_status_where
+    moved_elsewhere = []
+
+    async def set_status_where_with_concurrent_patch(query, new_status, object_ids):
+        # Outra escrita tira do filtro um pedido de uma página ainda não percorrida
+        if not moved_elsewhere:
+            pending = [order_id for order_id in order_ids if ObjectId(order_id) not in object_ids]
+            moved_elsewhere.append(pending[0])
+            await client.patch(f"/orders/{pending[0]}", json={"status": "CANCELLED"}, headers=auth_headers)
+        return await set_status_where(query, new_status, object_ids)
+
+    monkeypatch.setattr(storage, "set_status_where", set_status_where_with_concurrent_patch)
+    response = await transition_orders_status_where(OrderQuery(status="PENDING"), "PAID", chunk_size=2)
+
+    assert (response.matched_count, response.modified_count) == (4, 4)
+    statuses = {order_id: (await client.get(f"/orders/{order_id}")).json()["status"] for order_id in order_ids}
+    assert [order_id for order_id, status in statuses.items() if status != "PAID"] == moved_elsewhere
+
+    incremental = await status_revenue()
+    await rebuild_rollups()
+    assert await status_revenue() == incremental
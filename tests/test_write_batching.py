@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from src.batching import InsertBatcher
+from src.crud.orders import configure_order_write_batching, get_order_write_batching_stats
+from src.storage.memory import InMemoryOrderStorage
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_full_batch_is_written_in_one_insert_many():
+    batches = []
+
+    async def insert_many(documents):
+        batches.append(len(documents))
+        return {}
+
+    batcher = InsertBatcher(insert_many, max_batch_size=3, max_wait_ms=1000)
+    documents = await asyncio.gather(*(batcher.submit({"n": n}) for n in range(3)))
+
+    assert batches == [3]
+    assert [document["n"] for document in documents] == [0, 1, 2]
+
+
+async def test_partial_batch_is_flushed_after_max_wait():
+    storage = InMemoryOrderStorage()
+    batcher = InsertBatcher(storage.insert_many, max_batch_size=100, max_wait_ms=1)
+
+    document = await asyncio.wait_for(batcher.submit({"customer_id": 1}), timeout=1)
+
+    assert await storage.find_by_id(document["_id"]) is not None
+    assert batcher.stats()["batches"] == 1
+
+
+async def test_duplicate_fails_only_its_own_caller():
+    storage = InMemoryOrderStorage()
+    existing_id = ObjectId()
+    await storage.insert_one({"_id": existing_id})
+    batcher = InsertBatcher(storage.insert_many, max_batch_size=2, max_wait_ms=1000)
+
+    created, duplicate = await asyncio.gather(
+        batcher.submit({"customer_id": 1}),
+        batcher.submit({"_id": existing_id}),
+        return_exceptions=True,
+    )
+
+    assert await storage.find_by_id(created["_id"]) is not None
+    assert isinstance(duplicate, DuplicateKeyError)
+
+
+async def test_concurrent_posts_share_a_batch(client, auth_headers):
+    configure_order_write_batching(True, max_batch_size=5, max_wait_ms=50)
+    try:
+        order = {"customer_id": 1, "items": [{"product_id": 7, "quantity": 1, "price": 10.0}]}
+        responses = await asyncio.gather(*(client.post("/orders/", json=order, headers=auth_headers) for _ in range(5)))
+
+        assert [response.status_code for response in responses] == [201] * 5
+        assert get_order_write_batching_stats()["batches"] == 1
+    finally:
+        configure_order_write_batching(False)